@@ -0,0 +1,82 @@
+"""Micro-benchmark: per-chunk upstream audio send cost, probing vs resolved sender
+
+Usage: python benchmarks/bench_audio_sender.py [iterations]
+
+Uses a stub Live session so only the proxy-side overhead is measured.
+"""
+import asyncio
+import inspect
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Session
+from services.session_manager import session_manager
+from services.gemini_proxy import GeminiProxy, types
+
+CHUNK = b'\x00\x01' * 4096  # 4096 int16 samples, ~256 ms at 16 kHz
+MIME_TYPE = 'audio/pcm;rate=16000'
+
+
+class StubLiveSession:
+    """Stand-in for the SDK AsyncSession that accepts and discards audio"""
+    
+    async def send_realtime_input(self, *, audio=None, media=None):
+        pass
+    
+    async def send(self, input=None, end_of_turn=False):
+        pass
+    
+    async def send_tool_response(self, *, function_responses=None):
+        pass
+    
+    async def receive(self):
+        if False:
+            yield None
+
+
+async def legacy_send(gemini_session, audio_bytes: bytes, raw_mime_type: str) -> None:
+    """Per-chunk capability probing as done before the sender was cached"""
+    [attr for attr in dir(gemini_session) if not attr.startswith('_')]
+    if hasattr(gemini_session, 'send'):
+        str(inspect.signature(gemini_session.send))
+    if hasattr(gemini_session, 'send_realtime_input'):
+        str(inspect.signature(gemini_session.send_realtime_input))
+    hasattr(gemini_session, 'send')
+    callable(getattr(gemini_session, 'send', None))
+    if hasattr(gemini_session, 'send_realtime_input'):
+        mime_type = 'audio/pcm' if raw_mime_type.startswith('audio/pcm') else raw_mime_type
+        if types and hasattr(types, 'Blob'):
+            await gemini_session.send_realtime_input(audio=types.Blob(data=audio_bytes, mime_type=mime_type))
+        else:
+            await gemini_session.send_realtime_input(audio={'data': audio_bytes, 'mime_type': mime_type})
+
+
+async def run(iterations: int):
+    proxy = GeminiProxy.__new__(GeminiProxy)  # No API client needed
+    stub = StubLiveSession()
+    session = Session(id='bench', gemini_session=stub, audio_sender=GeminiProxy._resolve_audio_sender(stub))
+    session_manager.sessions[session.id] = session
+    
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await legacy_send(stub, CHUNK, MIME_TYPE)
+    legacy = (time.perf_counter() - start) / iterations
+    
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await proxy.send_pcm(session.id, CHUNK, MIME_TYPE)
+    resolved = (time.perf_counter() - start) / iterations
+    
+    session_manager.delete_session(session.id)
+    
+    print(f"iterations:        {iterations}")
+    print(f"probe per chunk:   {legacy * 1e6:8.2f} us")
+    print(f"resolved sender:   {resolved * 1e6:8.2f} us")
+    print(f"speedup:           {legacy / resolved:8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,61 @@
+"""Throughput benchmark: ingress PCM conversion in realtime factor per core
+
+Usage: python benchmarks/bench_resampler.py [seconds_of_audio]
+
+Realtime factor = seconds of audio converted per second of CPU time on one
+thread (e.g. 500x means one core can keep up with ~500 concurrent callers).
+"""
+import os
+
+# Measure a single core
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+os.environ.setdefault('OPENBLAS_NUM_THREADS', '1')
+
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils.resampler import PcmConverter, INT16, FLOAT32
+
+CHUNK_MS = 100
+CASES = [
+    # (input rate, channels, encoding)
+    (48000, 1, INT16),
+    (44100, 1, INT16),
+    (48000, 2, FLOAT32),
+    (44100, 2, FLOAT32),
+    (8000, 1, INT16),
+]
+
+
+def make_stream(rate: int, channels: int, encoding: str, seconds: float) -> bytes:
+    """Speech-band test signal in the requested format"""
+    t = np.arange(int(rate * seconds)) / rate
+    mono = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.1 * np.sin(2 * np.pi * 3100 * t)
+    samples = np.repeat(mono[:, None], channels, axis=1).reshape(-1)
+    if encoding == FLOAT32:
+        return samples.astype('<f4').tobytes()
+    return (samples * 32767).astype('<i2').tobytes()
+
+
+def run(seconds: float):
+    print(f"{'input':<24}{'chunk':>8}{'RTF/core':>12}")
+    for rate, channels, encoding in CASES:
+        stream = make_stream(rate, channels, encoding, seconds)
+        width = (4 if encoding == FLOAT32 else 2) * channels
+        chunk = rate * CHUNK_MS // 1000 * width
+        converter = PcmConverter(rate, 16000, channels, encoding)
+        
+        start = time.process_time()
+        for i in range(0, len(stream), chunk):
+            converter.process(stream[i:i + chunk])
+        elapsed = time.process_time() - start
+        
+        label = f"{rate} Hz {channels}ch {encoding}"
+        print(f"{label:<24}{CHUNK_MS:>6}ms{seconds / elapsed:>11.0f}x")
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 60.0)
@@ -0,0 +1,103 @@
+"""Throughput benchmark: short concurrent queries through the pooled SQLite backend
+
+Usage: python benchmarks/bench_sqlite_backend.py [queries] [concurrency]
+
+Builds a temporary WAL database with a 200-table schema, then runs the
+same mix of short analytics queries with the prepared-statement cache on
+and off, and once more with a fresh connection per query for comparison
+with the pool. Opening a connection means parsing the whole schema before
+the first query, which is what pooling avoids.
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.sqlite_backend import SQLiteBackend, SQLiteConfig
+
+QUERIES = [
+    "SELECT * FROM orders WHERE id = 4242",
+    "SELECT COUNT(*) AS orders FROM orders WHERE customer = 'customer-42'",
+    "SELECT id, customer, amount FROM orders ORDER BY amount DESC LIMIT 10",
+    "SELECT * FROM orders WHERE region = 'north'",  # Stopped at the row cap
+]
+
+
+def build(path: str, rows: int = 20000, extra_tables: int = 200):
+    """Create the sample orders table in a WAL database with a realistically sized schema"""
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    for i in range(extra_tables):
+        # Every new connection parses the whole schema before its first query
+        conn.execute(f"CREATE TABLE dim_{i} (id INTEGER PRIMARY KEY, code TEXT, label TEXT, parent INTEGER, updated_at TEXT)")
+        conn.execute(f"CREATE INDEX dim_{i}_code ON dim_{i} (code)")
+    conn.execute('CREATE TABLE orders (id INTEGER PRIMARY KEY, customer TEXT, region TEXT, status TEXT, amount REAL)')
+    conn.executemany(
+        'INSERT INTO orders (customer, region, status, amount) VALUES (?, ?, ?, ?)',
+        ((f"customer-{i % 500}", ('north', 'south', 'east', 'west')[i % 4], ('shipped', 'pending')[i % 3 == 0], i % 997 * 1.5) for i in range(rows))
+    )
+    conn.execute('CREATE INDEX orders_customer ON orders (customer)')
+    conn.execute('CREATE INDEX orders_amount ON orders (amount)')
+    conn.commit()
+    conn.close()
+
+
+async def pooled(data_dir: str, total: int, concurrency: int, statement_cache: int) -> float:
+    """Queries per second through the pool"""
+    backend = SQLiteBackend(SQLiteConfig(data_dir=data_dir, pool_size=concurrency, workers=concurrency, max_rows=200, statement_cache=statement_cache))
+    await backend.query('bench', QUERIES[0])  # Open the first connection outside the timing
+    slots = asyncio.Semaphore(concurrency)
+    
+    async def one(i: int):
+        async with slots:
+            await backend.query('bench', QUERIES[i % len(QUERIES)])
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    await backend.close()
+    return total / elapsed
+
+
+def connect_and_query(path: str, sql: str):
+    """Open a connection, run one query and close it"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.execute(sql).fetchmany(200)
+    conn.close()
+
+
+async def unpooled(path: str, total: int, concurrency: int) -> float:
+    """Queries per second opening a connection per query on the same number of threads, for comparison"""
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        slots = asyncio.Semaphore(concurrency)
+        
+        async def one(i: int):
+            async with slots:
+                await loop.run_in_executor(executor, connect_and_query, path, QUERIES[i % len(QUERIES)])
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return total / (time.perf_counter() - started)
+
+
+def run(total: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, 'bench.db')
+        build(path)
+        print(f"{'mode':<32}{'queries/s':>12}")
+        print(f"{'pooled, statement cache':<32}{asyncio.run(pooled(data_dir, total, concurrency, 256)):>12.0f}")
+        print(f"{'pooled, no statement cache':<32}{asyncio.run(pooled(data_dir, total, concurrency, 0)):>12.0f}")
+        print(f"{'connection per query':<32}{asyncio.run(unpooled(path, total, concurrency)):>12.0f}")
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    )
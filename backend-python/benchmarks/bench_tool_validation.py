@@ -0,0 +1,48 @@
+"""Latency benchmark: compiled tool argument validation in microseconds per call
+
+Usage: python benchmarks/bench_tool_validation.py [iterations]
+
+Validates typical model arguments against the example tools' schemas, plus
+a case that needs coercion and one that is rejected.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools.example_tools  # Register example tools
+from tools.tool_registry import tool_registry
+from tools.validation import ArgumentError
+
+CASES = [
+    # (tool, arguments)
+    ('get_weather', {'location': 'New York', 'units': 'celsius'}),
+    ('search_knowledge_base', {'query': 'AI safety', 'maxResults': 5}),
+    ('search_knowledge_base', {'query': 'AI safety', 'maxResults': 5.0}),  # Coerced to int
+    ('get_analytics', {'metric': 'active_users', 'startDate': '2024-01-01', 'endDate': '2024-01-31'}),
+    ('call_external_api', {'url': 'https://example.com', 'method': 'POST', 'body': {'a': 1}}),
+    ('execute_sql_query', {'database': 'main'}),  # Rejected: missing query
+]
+
+
+def run(iterations: int):
+    print(f"{'tool':<24}{'case':>10}{'us/call':>10}")
+    for name, args in CASES:
+        validate = tool_registry.validators[name]
+        try:
+            case = 'valid' if validate(args) is args else 'coerced'
+        except ArgumentError:
+            case = 'rejected'
+        started = time.perf_counter()
+        for _ in range(iterations):
+            try:
+                validate(args)
+            except ArgumentError:
+                pass
+        per_call = (time.perf_counter() - started) / iterations * 1e6
+        print(f"{name:<24}{case:>10}{per_call:>10.2f}")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
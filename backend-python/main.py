@@ -1,4 +1,5 @@
 """Main FastAPI application for Gemini Live Backend"""
+import json
 import os
 import sys
 from pathlib import Path
@@ -14,8 +15,16 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from services.gemini_proxy import GeminiProxy
 from services.websocket_handler import WebSocketHandler
+from services.ingress_pipeline import IngressConfig
+from services.session_pool import WarmPoolConfig
+from services.resumption import ResumptionConfig
+from services.admission import AdmissionConfig
+from services.tool_dispatcher import ToolConfig
+from services.tool_scheduler import ToolSchedulerConfig
 from services.session_manager import session_manager
+from services.tracing import tracer
 from tools.tool_registry import tool_registry
+from tools.sqlite_backend import sqlite_backend
 import tools.example_tools  # Register example tools
 
 # Load environment variables
@@ -35,39 +44,47 @@ app.add_middleware(
 )
 
 # Initialize services
-# #region agent log
-import json
-log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-try:
-    with open(log_path, 'a', encoding='utf-8') as f:
-        f.write(json.dumps({"location":"main.py:38","message":"Initializing services","data":{"has_api_key":bool(os.getenv('GEMINI_API_KEY'))},"sessionId":"debug-session","runId":"run1","hypothesisId":"B","timestamp":int(__import__('time').time()*1000)}) + '\n')
-except: pass
-# #endregion
+tracer.configure_from_env()
+tool_registry.configure_from_env()
+sqlite_backend.configure_from_env()
+tracer.emit('startup', 'main.py', 'Initializing services', {'has_api_key': bool(os.getenv('GEMINI_API_KEY'))})
 
 try:
-    gemini_proxy = GeminiProxy(os.getenv('GEMINI_API_KEY', ''))
-    # #region agent log
-    try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"location":"main.py:46","message":"GeminiProxy created","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"B","timestamp":int(__import__('time').time()*1000)}) + '\n')
-    except: pass
-    # #endregion
-    ws_handler = WebSocketHandler(gemini_proxy)
-    # #region agent log
-    try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"location":"main.py:50","message":"WebSocketHandler created","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"B","timestamp":int(__import__('time').time()*1000)}) + '\n')
-    except: pass
-    # #endregion
+    gemini_proxy = GeminiProxy(
+        os.getenv('GEMINI_API_KEY', ''),
+        warm_pool=WarmPoolConfig.from_env(),
+        resumption=ResumptionConfig.from_env(),
+        admission=AdmissionConfig.from_env(),
+        tools=ToolConfig.from_env(),
+        tool_scheduler=ToolSchedulerConfig.from_env()
+    )
+    if os.getenv('LIVE_CONFIG_VARIANTS'):
+        gemini_proxy.live_config.load_variants(os.getenv('LIVE_CONFIG_VARIANTS'))
+    ws_handler = WebSocketHandler(
+        gemini_proxy,
+        send_queue_size=int(os.getenv('CLIENT_SEND_QUEUE_SIZE', 256)),
+        slow_client_policy=[p.strip() for p in os.getenv('CLIENT_SLOW_POLICY', 'drop_audio,coalesce,disconnect').split(',') if p.strip()],
+        ingress_config=IngressConfig.from_env()
+    )
 except Exception as e:
-    # #region agent log
-    try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"location":"main.py:54","message":"Service initialization error","data":{"error":str(e),"error_type":type(e).__name__},"sessionId":"debug-session","runId":"run1","hypothesisId":"B","timestamp":int(__import__('time').time()*1000)}) + '\n')
-    except: pass
-    # #endregion
+    tracer.emit('startup', 'main.py', 'Service initialization error', {'error': str(e), 'error_type': type(e).__name__})
     raise
 
+
+@app.on_event("startup")
+async def start_services():
+    """Start background services (warm session pool)"""
+    gemini_proxy.start()
+
+
+@app.on_event("shutdown")
+async def stop_services():
+    """Stop background services, close pooled upstream sessions, stop tool worker pools and close SQLite connections"""
+    await gemini_proxy.close()
+    tool_registry.shutdown()
+    await sqlite_backend.close()
+
+
 # REST API Routes (must be defined before static file mount)
 
 @app.get("/health")
@@ -83,101 +100,33 @@ async def health_check():
 @app.post("/api/sessions")
 async def create_session(request: Request):
     """Create a new session"""
-    # #region agent log
-    import json
-    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-    try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"location":"main.py:84","message":"create_session called","data":{"content_type":request.headers.get("content-type"),"has_body":hasattr(request, '_body')},"sessionId":"debug-session","runId":"run1","hypothesisId":"F","timestamp":int(__import__('time').time()*1000)}) + '\n')
-    except: pass
-    # #endregion
-    
     try:
         # Try to parse JSON body
         body = {}
         content_type = request.headers.get("content-type", "")
-        # #region agent log
-        try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"main.py:92","message":"Parsing request body","data":{"content_type":content_type},"sessionId":"debug-session","runId":"run1","hypothesisId":"F","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
         
         if "application/json" in content_type:
             try:
                 # Check if there's actually a body to parse
                 body_bytes = await request.body()
-                # #region agent log
-                try:
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"main.py:99","message":"Request body read","data":{"body_length":len(body_bytes),"body_preview":body_bytes[:100].decode('utf-8', errors='ignore') if body_bytes else "empty"},"sessionId":"debug-session","runId":"run1","hypothesisId":"F","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-                
                 if body_bytes:
-                    import json as json_lib
-                    body = json_lib.loads(body_bytes.decode('utf-8'))
-                    # #region agent log
-                    try:
-                        with open(log_path, 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"location":"main.py:108","message":"JSON body parsed","data":{"body_keys":list(body.keys()) if isinstance(body, dict) else "not_dict"},"sessionId":"debug-session","runId":"run1","hypothesisId":"F","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
-                else:
-                    # #region agent log
-                    try:
-                        with open(log_path, 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"location":"main.py:115","message":"Empty body, using empty dict","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"F","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
-                    body = {}
+                    body = json.loads(body_bytes.decode('utf-8'))
             except Exception as e:
-                # #region agent log
-                try:
-                    import traceback
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"main.py:122","message":"JSON parse error","data":{"error":str(e),"error_type":type(e).__name__,"traceback":traceback.format_exc()},"sessionId":"debug-session","runId":"run1","hypothesisId":"F","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
+                tracer.emit('http', 'main.py:create_session', 'JSON parse error', {'error': str(e), 'error_type': type(e).__name__})
                 # If JSON parsing fails, body remains empty dict
                 body = {}
         
         user_id = body.get('userId') or request.headers.get('x-user-id')
-        # #region agent log
-        try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"main.py:115","message":"Extracting user_id","data":{"user_id":user_id,"from_body":body.get('userId'),"from_header":request.headers.get('x-user-id')},"sessionId":"debug-session","runId":"run1","hypothesisId":"F","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
-        
-        # #region agent log
-        try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"main.py:122","message":"Calling session_manager.create_session","data":{"user_id":user_id},"sessionId":"debug-session","runId":"run1","hypothesisId":"F","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
-        
-        session = session_manager.create_session(user_id)
-        
-        # #region agent log
-        try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"main.py:128","message":"Session created successfully","data":{"session_id":session.id,"user_id":session.user_id},"sessionId":"debug-session","runId":"run1","hypothesisId":"F","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
+        tenant_id = body.get('tenantId') or request.headers.get('x-tenant-id')
+        session = session_manager.create_session(user_id, tenant_id)
+        tracer.emit('http', 'main.py:create_session', 'Session created', {'user_id': user_id, 'tenant_id': tenant_id}, session.id)
         
         return {
             "sessionId": session.id,
             "createdAt": session.created_at.isoformat()
         }
     except Exception as e:
-        # #region agent log
-        try:
-            import traceback
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"main.py:138","message":"create_session error","data":{"error":str(e),"error_type":type(e).__name__,"traceback":traceback.format_exc()},"sessionId":"debug-session","runId":"run1","hypothesisId":"F","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
+        tracer.emit('http', 'main.py:create_session', 'create_session error', {'error': str(e), 'error_type': type(e).__name__})
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to create session: {str(e)}")
@@ -193,8 +142,11 @@ async def get_session(session_id: str):
     return {
         "sessionId": session.id,
         "userId": session.user_id,
+        "tenantId": session.tenant_id,
         "createdAt": session.created_at.isoformat(),
-        "memoryLength": len(session.memory)
+        "memoryLength": len(session.memory),
+        "queues": ws_handler.get_client_stats(session_id),
+        "upstream": gemini_proxy.get_session_stats(session_id)
     }
 
 
@@ -224,6 +176,22 @@ async def get_tools():
     }
 
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """Get runtime metrics"""
+    return {
+        "trace": tracer.get_stats(),
+        "clients": ws_handler.get_stats(),
+        "warmPool": gemini_proxy.pool.get_stats() if gemini_proxy.pool else None,
+        "liveConfig": gemini_proxy.live_config.get_stats(),
+        "upstream": gemini_proxy.get_stats(),
+        "admission": gemini_proxy.admission.get_stats(),
+        "tools": tool_registry.get_stats(),
+        "toolScheduler": gemini_proxy.tool_scheduler.get_stats(),
+        "sql": sqlite_backend.get_stats()
+    }
+
+
 # WebSocket endpoint
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -255,14 +223,6 @@ if public_dir.exists():
         """Serve index.html"""
         index_file = public_dir / 'index.html'
         if index_file.exists():
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"main.py:165","message":"Serving index.html","data":{"index_file":str(index_file)},"sessionId":"debug-session","runId":"run1","hypothesisId":"E","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
             return FileResponse(str(index_file))
         return HTMLResponse(content="<h1>Gemini Live Backend API</h1><p>Frontend not found. <a href='/docs'>API Docs</a></p>")
     
@@ -278,35 +238,9 @@ if public_dir.exists():
         
         file_full_path = public_dir / file_path
         if file_full_path.exists() and file_full_path.is_file():
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"main.py:182","message":"Serving static file","data":{"file_path":file_path,"exists":file_full_path.exists()},"sessionId":"debug-session","runId":"run1","hypothesisId":"E","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
             return FR(str(file_full_path))
         raise HTTPException(status_code=404, detail="File not found")
-    
-    # #region agent log
-    try:
-        import json
-        log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"location":"main.py:192","message":"Static file routes configured","data":{"public_dir":str(public_dir),"exists":public_dir.exists()},"sessionId":"debug-session","runId":"run1","hypothesisId":"E","timestamp":int(__import__('time').time()*1000)}) + '\n')
-    except: pass
-    # #endregion
 else:
-    # #region agent log
-    try:
-        import json
-        log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"location":"main.py:200","message":"Public directory not found","data":{"public_dir":str(public_dir)},"sessionId":"debug-session","runId":"run1","hypothesisId":"E","timestamp":int(__import__('time').time()*1000)}) + '\n')
-    except: pass
-    # #endregion
-    
     # Fallback if public directory doesn't exist
     @app.get("/", response_class=HTMLResponse)
     async def read_root():
@@ -315,44 +249,15 @@ else:
 
 
 if __name__ == "__main__":
-    # #region agent log
-    import json
-    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-    try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"location":"main.py:147","message":"Server startup initiated","data":{"timestamp":__import__('time').time()},"sessionId":"debug-session","runId":"run1","hypothesisId":"A","timestamp":int(__import__('time').time()*1000)}) + '\n')
-    except: pass
-    # #endregion
-    
     port = int(os.getenv('PORT', 3001))
     ws_port = int(os.getenv('WS_PORT', 3002))
     
-    # #region agent log
-    try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"location":"main.py:155","message":"Port configuration","data":{"port":port,"ws_port":ws_port,"env_port":os.getenv('PORT'),"env_ws_port":os.getenv('WS_PORT')},"sessionId":"debug-session","runId":"run1","hypothesisId":"A","timestamp":int(__import__('time').time()*1000)}) + '\n')
-    except: pass
-    # #endregion
-    
     print(f"[HTTP] Server starting on http://localhost:{port}")
     print(f"[HTTP] Health check: http://localhost:{port}/health")
     print(f"[WS] WebSocket server will be available at ws://localhost:{port}/ws")
     print(f"[WS] Connect with: ws://localhost:{port}/ws?sessionId=<your-session-id>")
     
-    # #region agent log
-    try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"location":"main.py:164","message":"About to start uvicorn","data":{"host":"0.0.0.0","port":port},"sessionId":"debug-session","runId":"run1","hypothesisId":"A","timestamp":int(__import__('time').time()*1000)}) + '\n')
-    except: pass
-    # #endregion
-    
     try:
-        # #region agent log
-        try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"main.py:172","message":"Calling uvicorn.run","data":{"app":"main:app","host":"0.0.0.0","port":port},"sessionId":"debug-session","runId":"run1","hypothesisId":"C","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
         uvicorn.run(
             "main:app",
             host="0.0.0.0",
@@ -361,21 +266,8 @@ if __name__ == "__main__":
             log_level="info"
         )
     except KeyboardInterrupt:
-        # #region agent log
-        try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"main.py:185","message":"Server stopped by user","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"C","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
         print("\n[Server] Shutting down...")
     except Exception as e:
-        # #region agent log
-        try:
-            import traceback
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"main.py:192","message":"Uvicorn startup error","data":{"error":str(e),"error_type":type(e).__name__,"traceback":traceback.format_exc()},"sessionId":"debug-session","runId":"run1","hypothesisId":"C","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
         print(f"[ERROR] Failed to start server: {e}")
         import traceback
         traceback.print_exc()
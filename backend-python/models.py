@@ -11,6 +11,7 @@ class ConnectionState(str, Enum):
     CONNECTING = "CONNECTING"
     CONNECTED = "CONNECTED"
     ERROR = "ERROR"
+    REJECTED = "REJECTED"  # Over capacity; the client may retry later
 
 
 @dataclass
@@ -35,6 +36,7 @@ class FunctionResult:
     call_id: str
     result: Any
     error: Optional[str] = None
+    error_type: Optional[str] = None  # Machine-readable error kind, e.g. "timeout"
 
 
 @dataclass
@@ -42,8 +44,13 @@ class Session:
     """Session data structure"""
     id: str
     user_id: Optional[str] = None
+    tenant_id: Optional[str] = None  # Selects a Live config variant
     created_at: datetime = field(default_factory=datetime.now)
     gemini_session: Any = None
     gemini_context_manager: Any = None  # Store context manager for proper cleanup
+    audio_sender: Any = None  # Upstream audio send strategy, resolved once on connect
+    resumption_handle: Optional[str] = None  # Latest Live API session resumption handle
+    reconnecting: bool = False  # Upstream is being resumed; caller audio goes to replay_buffer
+    replay_buffer: Any = None  # Caller audio held for replay after an upstream reconnect
     memory: List[Dict[str, str]] = field(default_factory=list)
 
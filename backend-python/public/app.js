@@ -18,6 +18,10 @@ let audioSources = new Set();
 const INPUT_SAMPLE_RATE = 16000;
 const OUTPUT_SAMPLE_RATE = 24000;
 const BUFFER_SIZE = 4096;
+const AUDIO_FRAME_HEADER_SIZE = 8;
+const MODEL_AUDIO_FRAME_HEADER_SIZE = 12;
+let audioSequence = 0;
+let interruptedTurn = -1;
 
 // DOM elements
 const connectBtn = document.getElementById('connectBtn');
@@ -77,6 +81,8 @@ async function connect() {
 
         const data = await response.json();
         sessionId = data.sessionId;
+        audioSequence = 0;
+        interruptedTurn = -1;
         addTranscription('system', `Session created: ${sessionId.substring(0, 8)}...`);
 
         // 2. Setup audio contexts
@@ -105,6 +111,7 @@ async function connect() {
 
         // 5. Connect WebSocket
         ws = new WebSocket(`${wsUrl}?sessionId=${sessionId}`);
+        ws.binaryType = 'arraybuffer';
 
         ws.onopen = () => {
             addTranscription('system', 'WebSocket connected');
@@ -115,11 +122,17 @@ async function connect() {
             ws.send(JSON.stringify({
                 type: 'connect',
                 sessionId: sessionId,
+                data: { binaryAudio: true },
             }));
             updateStatus('CONNECTING', 'Connecting to Gemini...');
         };
 
         ws.onmessage = (event) => {
+            // Binary frames carry model audio; everything else is JSON
+            if (event.data instanceof ArrayBuffer) {
+                handleAudioFrame(event.data);
+                return;
+            }
             const message = JSON.parse(event.data);
             handleMessage(message);
         };
@@ -162,17 +175,10 @@ function setupAudioProcessing() {
         // #endregion
 
         const inputData = e.inputBuffer.getChannelData(0);
-        const pcmBlob = createPcmBlob(inputData);
-        
-        // #region agent log
-        fetch('http://127.0.0.1:7245/ingest/15e3bf2d-33c4-432b-b85e-7b4628f43030',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({location:'app.js:163',message:'Sending audio chunk',data:{dataLen:inputData.length,pcmDataLen:pcmBlob.data?.length||0,hasData:!!pcmBlob.data},timestamp:Date.now(),sessionId:'debug-session',runId:'run1',hypothesisId:'O'})}).catch(()=>{});
-        // #endregion
 
-        ws.send(JSON.stringify({
-            type: 'audio',
-            data: pcmBlob,
-            sessionId: sessionId,
-        }));
+        // Send raw PCM as a binary frame (no base64/JSON round trip)
+        ws.send(createPcmFrame(inputData, audioSequence));
+        audioSequence = (audioSequence + 1) >>> 0;
     };
 }
 
@@ -190,6 +196,9 @@ function handleMessage(message) {
                 connectBtn.disabled = true;
                 disconnectBtn.disabled = false;
                 infoBox.textContent = 'Connected! Start speaking...';
+            } else if (status === 'REJECTED') {
+                updateStatus('ERROR', 'Server busy');
+                showError(message.data.message || 'Server is at capacity, please try again shortly');
             } else if (status === 'ERROR') {
                 updateStatus('ERROR', 'Error');
                 showError('Connection error');
@@ -201,6 +210,7 @@ function handleMessage(message) {
 
         case 'audio':
             if (message.data.interrupt) {
+                interruptedTurn = message.data.turn ?? interruptedTurn;
                 stopAllAudio();
                 nextStartTime = outputAudioContext?.currentTime || 0;
             } else if (message.data.audio && outputAudioContext && outputNode) {
@@ -226,6 +236,18 @@ function handleMessage(message) {
     }
 }
 
+// Handle a binary model audio frame (turn, sequence, sample rate, PCM)
+function handleAudioFrame(frame) {
+    if (frame.byteLength <= MODEL_AUDIO_FRAME_HEADER_SIZE || !outputAudioContext || !outputNode) return;
+    const header = new DataView(frame, 0, MODEL_AUDIO_FRAME_HEADER_SIZE);
+    const turn = header.getUint32(0, true);
+    const sampleRate = header.getUint32(8, true);
+    // Drop audio of a turn that was interrupted while the frame was in flight
+    if (turn <= interruptedTurn) return;
+    const sampleCount = Math.floor((frame.byteLength - MODEL_AUDIO_FRAME_HEADER_SIZE) / 2);
+    playPcm(new Int16Array(frame, MODEL_AUDIO_FRAME_HEADER_SIZE, sampleCount), sampleRate);
+}
+
 // Play audio from server
 async function playAudio(base64Audio) {
     if (!outputAudioContext || !outputNode) return;
@@ -255,9 +277,17 @@ async function playAudio(base64Audio) {
         const sampleCount = bytes.length / 2;
         // Create Int16Array view of the bytes buffer
         // After slice(), bytes.buffer might have a different offset, so use bytes.byteOffset
-        const dataInt16 = new Int16Array(bytes.buffer, bytes.byteOffset, sampleCount);
+        playPcm(new Int16Array(bytes.buffer, bytes.byteOffset, sampleCount), OUTPUT_SAMPLE_RATE);
+    } catch (error) {
+        console.error('Error playing audio:', error);
+    }
+}
+
+// Schedule 16-bit PCM samples for playback
+function playPcm(dataInt16, sampleRate) {
+    try {
         const frameCount = dataInt16.length;
-        const buffer = outputAudioContext.createBuffer(1, frameCount, OUTPUT_SAMPLE_RATE);
+        const buffer = outputAudioContext.createBuffer(1, frameCount, sampleRate);
         const channelData = buffer.getChannelData(0);
 
         // Convert Int16 samples to Float32 (-1.0 to 1.0)
@@ -292,27 +322,21 @@ function stopAllAudio() {
     audioSources.clear();
 }
 
-// Create PCM blob from Float32Array
-function createPcmBlob(data) {
+// Create binary PCM frame from Float32Array
+// Layout: uint32 sequence, uint32 sample rate (little-endian), then int16 PCM samples
+function createPcmFrame(data, sequence) {
     const l = data.length;
-    const int16 = new Int16Array(l);
+    const frame = new ArrayBuffer(AUDIO_FRAME_HEADER_SIZE + l * 2);
+    const header = new DataView(frame, 0, AUDIO_FRAME_HEADER_SIZE);
+    header.setUint32(0, sequence, true);
+    header.setUint32(4, INPUT_SAMPLE_RATE, true);
+
+    const int16 = new Int16Array(frame, AUDIO_FRAME_HEADER_SIZE, l);
     for (let i = 0; i < l; i++) {
         const sample = Math.max(-1, Math.min(1, data[i]));
         int16[i] = sample < 0 ? sample * 32768 : sample * 32767;
     }
-
-    // Convert to base64
-    let binary = '';
-    const bytes = new Uint8Array(int16.buffer);
-    for (let i = 0; i < bytes.byteLength; i++) {
-        binary += String.fromCharCode(bytes[i]);
-    }
-    const base64 = btoa(binary);
-
-    return {
-        data: base64,
-        mimeType: 'audio/pcm;rate=16000',
-    };
+    return frame;
 }
 
 // Volume monitoring
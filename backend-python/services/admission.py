@@ -0,0 +1,159 @@
+"""Admission Control - Caps concurrent upstream Live sessions globally and per user"""
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional
+
+
+# Rejection reasons reported to the client
+QUEUE_FULL = 'queue_full'
+TIMEOUT = 'timeout'
+
+
+@dataclass
+class AdmissionConfig:
+    """Admission limits (0 disables a limit)"""
+    max_sessions: int = 0
+    max_sessions_per_user: int = 0
+    queue_size: int = 20  # Callers allowed to wait for a slot; beyond this they are rejected at once
+    queue_timeout: float = 5.0  # Seconds a caller waits before being rejected
+    
+    @classmethod
+    def from_env(cls) -> 'AdmissionConfig':
+        """Load from MAX_LIVE_SESSIONS* and ADMISSION_* environment variables"""
+        return cls(
+            max_sessions=int(os.getenv('MAX_LIVE_SESSIONS', cls.max_sessions)),
+            max_sessions_per_user=int(os.getenv('MAX_LIVE_SESSIONS_PER_USER', cls.max_sessions_per_user)),
+            queue_size=int(os.getenv('ADMISSION_QUEUE_SIZE', cls.queue_size)),
+            queue_timeout=int(os.getenv('ADMISSION_QUEUE_TIMEOUT_MS', int(cls.queue_timeout * 1000))) / 1000
+        )
+
+
+class AdmissionRejected(Exception):
+    """Raised when a caller cannot be admitted"""
+    
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class _Waiter:
+    """A caller queued for a slot"""
+    __slots__ = ('session_id', 'user_id', 'future')
+    
+    def __init__(self, session_id: str, user_id: Optional[str]):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class AdmissionController:
+    """Admits callers up to a global and per-user cap of concurrent sessions
+    
+    Callers over a cap wait in a bounded FIFO queue. A freed slot goes to the
+    oldest waiter whose user is under its own cap, so one busy user cannot
+    block everyone behind them. A full queue or an expired wait raises
+    ``AdmissionRejected`` so the client can be told immediately.
+    """
+    
+    def __init__(self, config: Optional[AdmissionConfig] = None):
+        self.config = config or AdmissionConfig()
+        self.admitted: Dict[str, Optional[str]] = {}  # session_id -> user_id
+        self.per_user: Dict[str, int] = {}
+        self.waiters: Deque[_Waiter] = deque()
+        self.admitted_total = 0
+        self.rejected: Dict[str, int] = {QUEUE_FULL: 0, TIMEOUT: 0}
+        self.peak = 0
+        self.total_wait = 0.0
+    
+    def available(self) -> Optional[int]:
+        """Free global slots, or None when there is no global cap"""
+        if not self.config.max_sessions:
+            return None
+        return max(0, self.config.max_sessions - len(self.admitted))
+    
+    async def acquire(self, session_id: str, user_id: Optional[str] = None):
+        """Admit a session, waiting in the queue if needed"""
+        if session_id in self.admitted:
+            return
+        # Anyone still queued is blocked by a cap, so a caller that fits now is not jumping ahead
+        if self._has_room(user_id):
+            self._admit(session_id, user_id)
+            return
+        if len(self.waiters) >= self.config.queue_size:
+            self.rejected[QUEUE_FULL] += 1
+            raise AdmissionRejected(QUEUE_FULL, 'Server is at capacity, please try again shortly')
+        
+        waiter = _Waiter(session_id, user_id)
+        self.waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.config.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                self.waiters.remove(waiter)
+                waiter.future.cancel()
+                self.rejected[TIMEOUT] += 1
+                raise AdmissionRejected(TIMEOUT, 'Timed out waiting for capacity, please try again shortly')
+        except asyncio.CancelledError:
+            # Caller went away while queued: give the slot back if it was granted meanwhile
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+            elif waiter.future.done():
+                self.release(session_id)
+            raise
+        finally:
+            self.total_wait += time.monotonic() - started
+    
+    def release(self, session_id: str):
+        """Free a session's slot and admit waiters that now fit"""
+        if session_id not in self.admitted:
+            return
+        user_id = self.admitted.pop(session_id)
+        if user_id is not None:
+            self.per_user[user_id] -= 1
+            if not self.per_user[user_id]:
+                del self.per_user[user_id]
+        self._admit_waiters()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get admission gauges and counters"""
+        return {
+            'admitted': len(self.admitted),
+            'waiting': len(self.waiters),
+            'peakAdmitted': self.peak,
+            'admittedTotal': self.admitted_total,
+            'rejected': dict(self.rejected),
+            'totalWaitMs': round(self.total_wait * 1000),
+            'maxSessions': self.config.max_sessions or None,
+            'maxSessionsPerUser': self.config.max_sessions_per_user or None
+        }
+    
+    def _has_room(self, user_id: Optional[str]) -> bool:
+        """Whether one more session fits under both caps"""
+        if self.config.max_sessions and len(self.admitted) >= self.config.max_sessions:
+            return False
+        if user_id is not None and self.config.max_sessions_per_user:
+            return self.per_user.get(user_id, 0) < self.config.max_sessions_per_user
+        return True
+    
+    def _admit(self, session_id: str, user_id: Optional[str]):
+        """Record an admitted session"""
+        self.admitted[session_id] = user_id
+        if user_id is not None:
+            self.per_user[user_id] = self.per_user.get(user_id, 0) + 1
+        self.admitted_total += 1
+        self.peak = max(self.peak, len(self.admitted))
+    
+    def _admit_waiters(self):
+        """Hand free slots to the oldest waiters that fit"""
+        for waiter in list(self.waiters):
+            if self.config.max_sessions and len(self.admitted) >= self.config.max_sessions:
+                break
+            if waiter.future.done() or not self._has_room(waiter.user_id):
+                continue
+            self.waiters.remove(waiter)
+            self._admit(waiter.session_id, waiter.user_id)
+            waiter.future.set_result(None)
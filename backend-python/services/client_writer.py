@@ -0,0 +1,226 @@
+"""Client Writer - Per-connection outbound queue and writer task"""
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, NamedTuple, Optional, Tuple, Union
+from fastapi import WebSocket
+
+
+# Outbound message kinds
+AUDIO = 'audio'
+PARTIAL = 'partial'  # Non-final transcription text
+CONTROL = 'control'  # Everything else (status, errors, finals, interrupts)
+
+# Slow-client policy actions, applied in this order when the queue is full
+DROP_AUDIO = 'drop_audio'
+COALESCE = 'coalesce'
+DISCONNECT = 'disconnect'
+SLOW_CLIENT_ACTIONS = (DROP_AUDIO, COALESCE, DISCONNECT)
+
+# JSON messages go out as text frames; pre-packed audio frames as binary
+OutboundMessage = Union[Dict[str, Any], bytes]
+
+
+class OutboundEntry(NamedTuple):
+    """A queued outbound message"""
+    kind: str
+    message: OutboundMessage
+    turn: Optional[int] = None  # Model turn for audio frames
+    audio_bytes: int = 0  # Raw PCM size for audio frames
+
+
+def classify_message(message: OutboundMessage) -> str:
+    """Get the outbound kind of a client message"""
+    if isinstance(message, bytes):
+        return AUDIO
+    msg_type = message.get('type')
+    data = message.get('data') or {}
+    if msg_type == 'audio' and not data.get('interrupt'):
+        return AUDIO
+    if msg_type == 'transcription' and not data.get('isFinal'):
+        return PARTIAL
+    return CONTROL
+
+
+class ClientWriter:
+    """Owns all sends to one WebSocket so slow clients never block the caller
+
+    ``enqueue`` never awaits. A dedicated task drains the bounded queue. When
+    the queue is full, the slow-client policy runs in order: drop the oldest
+    queued audio frame, coalesce queued transcription partials, and finally
+    disconnect the client. If no enabled action frees a slot, the new message
+    is dropped (counted as dropped audio when it is an audio frame).
+    """
+    
+    def __init__(
+        self,
+        ws: WebSocket,
+        session_id: str,
+        max_queue: int = 256,
+        policy: Iterable[str] = SLOW_CLIENT_ACTIONS
+    ):
+        self.ws = ws
+        self.session_id = session_id
+        self.max_queue = max_queue
+        self.policy = frozenset(policy)
+        self.queue: Deque[OutboundEntry] = deque()
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.sent = 0
+        self.max_depth = 0
+        self.dropped_audio = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.disconnected_slow = False
+        self.interrupts = 0
+        self.discarded_audio_frames = 0
+        self.discarded_audio_bytes = 0
+    
+    def start(self):
+        """Start the writer task"""
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+    
+    async def close(self):
+        """Stop the writer task, discarding anything still queued"""
+        self.closed = True
+        self.queue.clear()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+    
+    def enqueue(self, message: OutboundMessage, turn: Optional[int] = None, audio_bytes: int = 0) -> bool:
+        """Queue a message for the client; returns False if it was dropped"""
+        if self.closed:
+            return False
+        
+        kind = classify_message(message)
+        if kind == PARTIAL and COALESCE in self.policy and self._coalesce_into_tail(message):
+            return True
+        
+        if len(self.queue) >= self.max_queue and not self._make_room(kind):
+            if kind == AUDIO:
+                self.dropped_audio += 1
+            else:
+                self.dropped += 1
+            return False
+        
+        self.queue.append(OutboundEntry(kind, message, turn, audio_bytes))
+        if len(self.queue) > self.max_depth:
+            self.max_depth = len(self.queue)
+        self._ready.set()
+        return True
+    
+    def interrupt(self, message: Dict[str, Any], turn: int) -> Tuple[int, int]:
+        """Drop unsent audio up to the interrupted turn and queue message ahead of everything
+
+        Returns the number of audio frames and raw PCM bytes discarded.
+        """
+        if self.closed:
+            return 0, 0
+        frames = 0
+        discarded = 0
+        kept: Deque[OutboundEntry] = deque()
+        for entry in self.queue:
+            if entry.kind == AUDIO and entry.turn is not None and entry.turn <= turn:
+                frames += 1
+                discarded += entry.audio_bytes
+            else:
+                kept.append(entry)
+        kept.appendleft(OutboundEntry(CONTROL, message))
+        self.queue = kept
+        self.interrupts += 1
+        self.discarded_audio_frames += frames
+        self.discarded_audio_bytes += discarded
+        self._ready.set()
+        return frames, discarded
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and drop counters"""
+        return {
+            'queueDepth': len(self.queue),
+            'maxQueueDepth': self.max_depth,
+            'sent': self.sent,
+            'droppedAudio': self.dropped_audio,
+            'coalescedPartials': self.coalesced,
+            'dropped': self.dropped,
+            'disconnectedSlow': self.disconnected_slow,
+            'interrupts': self.interrupts,
+            'discardedAudioFrames': self.discarded_audio_frames,
+            'discardedAudioBytes': self.discarded_audio_bytes
+        }
+    
+    def _merge_partial(self, entry: OutboundEntry, message: Dict[str, Any]) -> bool:
+        """Append partial text to a queued partial from the same speaker"""
+        queued = entry.message
+        if entry.kind != PARTIAL or queued['data'].get('isUser') != message['data'].get('isUser'):
+            return False
+        queued['data'] = {**queued['data'], 'text': queued['data'].get('text', '') + message['data'].get('text', '')}
+        self.coalesced += 1
+        return True
+    
+    def _coalesce_into_tail(self, message: Dict[str, Any]) -> bool:
+        """Merge a new partial into the newest queued message if possible"""
+        return bool(self.queue) and self._merge_partial(self.queue[-1], message)
+    
+    def _make_room(self, kind: str) -> bool:
+        """Apply the slow-client policy; returns True if a slot was freed"""
+        if DROP_AUDIO in self.policy:
+            for i, entry in enumerate(self.queue):
+                if entry.kind == AUDIO:
+                    del self.queue[i]
+                    self.dropped_audio += 1
+                    return True
+            if kind == AUDIO:
+                # Nothing older to drop; the new frame is the one to discard
+                return False
+        
+        if COALESCE in self.policy and self._coalesce_queued_partials():
+            return True
+        
+        if DISCONNECT in self.policy:
+            print(f"[WS] Client {self.session_id} too slow ({len(self.queue)} queued), disconnecting")
+            self.disconnected_slow = True
+            self.closed = True
+            self.queue.clear()
+            asyncio.create_task(self._close_socket())
+        return False
+    
+    def _coalesce_queued_partials(self) -> bool:
+        """Merge adjacent queued partials from the same speaker"""
+        depth = len(self.queue)
+        items = list(self.queue)
+        self.queue.clear()
+        for entry in items:
+            if entry.kind == PARTIAL and self._coalesce_into_tail(entry.message):
+                continue
+            self.queue.append(entry)
+        return len(self.queue) < depth
+    
+    async def _close_socket(self):
+        """Close the socket after a slow-client disconnect"""
+        try:
+            await self.ws.close(code=1008, reason='Client too slow')
+        except Exception as e:
+            print(f"[WS] Error closing slow client {self.session_id}: {e}")
+    
+    async def _run(self):
+        """Drain the queue to the socket"""
+        while not self.closed:
+            if not self.queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            entry = self.queue.popleft()
+            try:
+                if isinstance(entry.message, bytes):
+                    await self.ws.send_bytes(entry.message)
+                else:
+                    await self.ws.send_json(entry.message)
+                self.sent += 1
+            except Exception as e:
+                print(f"[WS] Error sending message to {self.session_id}: {e}")
@@ -2,10 +2,12 @@
 import sys
 import os
 import asyncio
+import time
+from functools import lru_cache
 import urllib.parse  # Workaround for google-genai library bug: ensure urllib is imported before library uses it
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Callable, Optional, Any, Dict, Awaitable
+from typing import Callable, Optional, Any, Dict, Awaitable, Tuple
 try:
     # Monkey-patch fix for google-genai library bug: urllib is not imported in _api_client.py
     # Import the module first, then inject urllib into its namespace
@@ -27,9 +29,26 @@ except Exception as e:
     except ImportError:
         Client = None
         types = None
-from models import Session
+from models import Session, FunctionResult
 from services.session_manager import session_manager
 from tools.tool_registry import tool_registry
+from services.tracing import tracer
+from services.session_pool import WarmSessionPool, WarmPoolConfig
+from services.live_config import LiveConfigBuilder
+from services.resumption import ResumptionConfig, ReplayBuffer
+from services.admission import AdmissionController, AdmissionConfig
+from services.tool_dispatcher import ToolDispatcher, ToolConfig, INTERRUPT, MODEL, EXPIRED
+from services.tool_scheduler import ToolScheduler, ToolSchedulerConfig, ToolShed
+
+
+# Sends (audio_bytes, mime_type) upstream; resolved once per session on connect
+AudioSender = Callable[[bytes, str], Awaitable[None]]
+
+
+@lru_cache(maxsize=32)
+def _upstream_mime_type(raw_mime_type: str) -> str:
+    """Normalize a client MIME type to what the Live API expects ("audio/pcm" without rate)"""
+    return 'audio/pcm' if raw_mime_type.startswith('audio/pcm') else raw_mime_type
 
 
 class GeminiProxy:
@@ -37,41 +56,56 @@ class GeminiProxy:
     
     MODEL_NAME = 'gemini-2.5-flash-native-audio-preview-12-2025'
     
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        warm_pool: Optional[WarmPoolConfig] = None,
+        resumption: Optional[ResumptionConfig] = None,
+        admission: Optional[AdmissionConfig] = None,
+        tools: Optional[ToolConfig] = None,
+        tool_scheduler: Optional[ToolSchedulerConfig] = None
+    ):
         """Initialize Gemini client"""
-        # #region agent log
-        import json
-        log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-        try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"gemini_proxy.py:20","message":"Initializing GeminiProxy","data":{"has_api_key":bool(api_key),"api_key_length":len(api_key) if api_key else 0},"sessionId":"debug-session","runId":"run1","hypothesisId":"D","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
-        try:
-            if not Client:
-                # #region agent log
-                try:
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"gemini_proxy.py:28","message":"Client is None - google.genai not imported","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"D","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-                raise ImportError("google.genai package is not installed. Install it with: pip install google-genai")
-            self.client = Client(api_key=api_key)
-            # #region agent log
-            try:
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"gemini_proxy.py:35","message":"GeminiProxy client created successfully","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"D","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-        except Exception as e:
-            # #region agent log
-            try:
-                import traceback
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"gemini_proxy.py:40","message":"GeminiProxy initialization error","data":{"error":str(e),"error_type":type(e).__name__,"traceback":traceback.format_exc()},"sessionId":"debug-session","runId":"run1","hypothesisId":"D","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            raise
+        tracer.emit('startup', 'gemini_proxy.py:__init__', 'Initializing GeminiProxy', {'has_api_key': bool(api_key), 'warm_pool': bool(warm_pool and warm_pool.enabled)})
+        if not Client:
+            raise ImportError("google.genai package is not installed. Install it with: pip install google-genai")
+        self.client = Client(api_key=api_key)
+        self.resumption = resumption or ResumptionConfig()
+        self.admission = AdmissionController(admission)
+        self.tool_dispatcher = ToolDispatcher(tools)
+        self.tool_scheduler = ToolScheduler(tool_scheduler, lambda name: getattr(tool_registry.get(name), 'max_concurrency', None))
+        self.live_config = LiveConfigBuilder(tool_registry, session_resumption=self.resumption.enabled)
+        self.resumes = 0
+        self.resume_failures = 0
+        self.go_aways = 0
+        self.pool = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        if warm_pool and warm_pool.enabled:
+            # Idle pooled sessions count against upstream quota too, so they only fill free admission slots
+            self.pool = WarmSessionPool(self._open_upstream, warm_pool, lambda: self.live_config.version, self.admission.available)
+    
+    def start(self):
+        """Start background work (warm pool refill) and watch for expired sessions"""
+        self._loop = asyncio.get_running_loop()
+        session_manager.delete_listeners.append(self._on_session_deleted)
+        if self.pool:
+            self.pool.start()
+    
+    async def close(self):
+        """Stop background work and close pooled sessions"""
+        if self._on_session_deleted in session_manager.delete_listeners:
+            session_manager.delete_listeners.remove(self._on_session_deleted)
+        if self.pool:
+            await self.pool.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get upstream resumption and tool counters"""
+        return {
+            'resumes': self.resumes,
+            'resumeFailures': self.resume_failures,
+            'goAways': self.go_aways,
+            'tools': self.tool_dispatcher.get_stats()
+        }
     
     async def connect_session(
         self,
@@ -79,136 +113,67 @@ class GeminiProxy:
         on_message: Callable[[Dict[str, Any]], Awaitable[None]],
         on_error: Callable[[Exception], Awaitable[None]]
     ) -> Any:
-        """Connect to Gemini Live API for a session"""
+        """Connect to Gemini Live API for a session
+
+        Raises ``AdmissionRejected`` when the session cannot be admitted
+        under the concurrency limits.
+        """
         session = session_manager.get_session(session_id)
         if not session:
             raise ValueError('Session not found')
         
-        # Get available tools for function calling
-        tools = tool_registry.get_gemini_tools_format()
-        
-        # Format per Live API documentation: [{"function_declarations": [...]}]
-        tools_to_use = None
-        if tools:
-            tools_to_use = [{
-                'function_declarations': [
-                    {
-                        'name': tool['name'],
-                        'description': tool['description'],
-                        'parameters': tool['parameters']
-                    }
-                    for tool in tools
-                ]
-            }]
-        
+        await self.admission.acquire(session_id, session.user_id)
         try:
-            # Connect to Gemini Live API per official documentation
-            if not self.client:
-                raise ImportError("google.genai package is not installed. Install it with: pip install google-genai")
-            
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"gemini_proxy.py:95","message":"Connecting to Gemini Live API","data":{"model":self.MODEL_NAME,"has_tools":bool(tools_to_use)},"sessionId":"debug-session","runId":"run1","hypothesisId":"H","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            
-            config = {
-                'response_modalities': ['AUDIO'],
-                'input_audio_transcription': {},
-                'output_audio_transcription': {},
-                'system_instruction': (
-                    "You are a helpful AI voice assistant with access to various tools and APIs.\n\n"
-                    "LANGUAGE POLICY:\n"
-                    "- You MUST initially speak ONLY in English.\n"
-                    "- Do NOT switch to other languages (like Hindi, Spanish, etc.) unless the user explicitly asks you to speak in that language.\n"
-                    "- If a user speaks to you in another language, respond in English and ask if they would like you to switch to their language.\n"
-                    "- Only switch languages when the user explicitly requests it (e.g., 'speak in Hindi', 'talk in Spanish', etc.).\n\n"
-                    "IMPORTANT: You have access to function calling tools. When a user asks about:\n"
-                    "- Weather information → Use the get_weather function\n"
-                    "- Analytics or data queries → Use get_analytics or execute_sql_query functions\n"
-                    "- Searching for information → Use search_knowledge_base function\n"
-                    "- External API calls → Use call_external_api function\n\n"
-                    "You MUST use function calls when users request data, information retrieval, or external service interactions. "
-                    "Do not just respond without calling functions when they are needed.\n\n"
-                    "Always explain what you're doing when calling functions."
-                )
-            }
-            
-            if tools_to_use:
-                config['tools'] = tools_to_use
-            
-            # Connect returns an async context manager, need to enter it manually
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"gemini_proxy.py:120","message":"Getting context manager from connect","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"I","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            
-            # Get the context manager
-            context_manager = self.client.aio.live.connect(
-                model=self.MODEL_NAME,
-                config=config
-            )
-            
-            # Enter the context manager to get the actual session
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"gemini_proxy.py:132","message":"Entering context manager","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"I","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            
-            gemini_session = await context_manager.__aenter__()
-            
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"gemini_proxy.py:140","message":"Context manager entered, session obtained","data":{"has_session":bool(gemini_session)},"sessionId":"debug-session","runId":"run1","hypothesisId":"I","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
+            # Hand out a pre-connected session if the warm pool has one (pooled sessions use the default config)
+            variant = session.tenant_id if session.tenant_id in self.live_config.variants else None
+            pooled = self.pool.acquire() if self.pool and variant is None else None
+            tracer.emit('connect', 'gemini_proxy.py:connect_session', 'Connecting to Gemini Live API', {'model': self.MODEL_NAME, 'warm': bool(pooled), 'variant': variant}, session_id)
+            if pooled:
+                context_manager, gemini_session = pooled.context_manager, pooled.session
+            else:
+                context_manager, gemini_session = await self._open_upstream(variant)
             
             # Store the context manager so we can exit it later
-            session_manager.update_session(session_id, {'gemini_context_manager': context_manager})
+            session_manager.update_session(session_id, {
+                'gemini_context_manager': context_manager,
+                'resumption_handle': None,
+                'reconnecting': False,
+                'replay_buffer': ReplayBuffer(self.resumption.buffer_ms) if self.resumption.enabled else None
+            })
             
             # Start background task to receive messages using receive() pattern
             asyncio.create_task(self._receive_messages(gemini_session, session_id, on_message, on_error))
             
-            # Store gemini session
-            session_manager.update_session(session_id, {'gemini_session': gemini_session})
-            
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"gemini_proxy.py:145","message":"Gemini session connected and stored","data":{"session_id":session_id},"sessionId":"debug-session","runId":"run1","hypothesisId":"H","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
+            # Store gemini session along with its audio send strategy
+            session_manager.update_session(session_id, {
+                'gemini_session': gemini_session,
+                'audio_sender': self._resolve_audio_sender(gemini_session)
+            })
             
+            tracer.emit('connect', 'gemini_proxy.py:connect_session', 'Gemini session connected', {'warm': bool(pooled)}, session_id)
             return gemini_session
             
         except Exception as e:
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                import traceback
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"gemini_proxy.py:155","message":"connect_session error","data":{"error":str(e),"error_type":type(e).__name__,"traceback":traceback.format_exc()},"sessionId":"debug-session","runId":"run1","hypothesisId":"H","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
+            tracer.emit('connect', 'gemini_proxy.py:connect_session', 'connect_session error', {'error': str(e), 'error_type': type(e).__name__}, session_id)
+            self.admission.release(session_id)
             raise
     
+    async def _open_upstream(self, variant: Optional[str] = None, resume_handle: Optional[str] = None) -> Tuple[Any, Any]:
+        """Open a Live API session with the cached config for a variant; returns (context_manager, session)"""
+        # Connect to Gemini Live API per official documentation
+        if not self.client:
+            raise ImportError("google.genai package is not installed. Install it with: pip install google-genai")
+        
+        # Connect returns an async context manager, need to enter it manually
+        context_manager = self.client.aio.live.connect(
+            model=self.MODEL_NAME,
+            config=self.live_config.get(variant, resume_handle)
+        )
+        
+        # Enter the context manager to get the actual session
+        gemini_session = await context_manager.__aenter__()
+        return context_manager, gemini_session
+    
     async def _receive_messages(
         self,
         session: Any,
@@ -216,84 +181,169 @@ class GeminiProxy:
         on_message: Callable[[Dict[str, Any]], Awaitable[None]],
         on_error: Callable[[Exception], Awaitable[None]]
     ):
-        """Receive messages using async iterator pattern"""
-        # #region agent log
-        try:
-            import json
-            log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"gemini_proxy.py:195","message":"Starting message receiver","data":{"session_id":session_id,"has_receive":hasattr(session, 'receive')},"sessionId":"debug-session","runId":"run1","hypothesisId":"I","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
+        """Receive messages using async iterator pattern, resuming upstream if the stream drops"""
+        if not hasattr(session, 'receive'):
+            print(f"[Gemini] Session {session_id} does not support receive() method")
+            return
         
         try:
-            if hasattr(session, 'receive'):
-                # #region agent log
-                try:
-                    import json
-                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"gemini_proxy.py:203","message":"Starting receive() iterator","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"I","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-                
+            # receive() ends after each complete model turn; keep reading until the stream closes
+            while True:
+                received = False
                 async for response in session.receive():
-                    # #region agent log
-                    try:
-                        import json
-                        log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                        # Get all attributes of response
-                        response_attrs = [attr for attr in dir(response) if not attr.startswith('_')]
-                        response_data = None
-                        response_data_type = None
-                        if hasattr(response, 'data'):
-                            response_data = response.data
-                            response_data_type = type(response.data).__name__
-                            if isinstance(response.data, bytes):
-                                response_data = f"<bytes: {len(response.data)}>"
-                        server_content_data = None
-                        if hasattr(response, 'server_content') and response.server_content:
-                            sc = response.server_content
-                            server_content_data = {
-                                "has_model_turn": hasattr(sc, 'model_turn') and sc.model_turn is not None,
-                                "has_parts": hasattr(sc, 'model_turn') and hasattr(sc.model_turn, 'parts') if sc.model_turn else False
-                            }
-                        with open(log_path, 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"location":"gemini_proxy.py:236","message":"Received message from Gemini","data":{"response_attrs":response_attrs[:20],"has_data":hasattr(response, 'data'),"data_type":response_data_type,"data_len":len(response.data) if hasattr(response, 'data') and isinstance(response.data, bytes) else None,"has_server_content":hasattr(response, 'server_content'),"server_content":server_content_data,"has_tool_call":hasattr(response, 'tool_call')},"sessionId":"debug-session","runId":"run1","hypothesisId":"L","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except Exception as log_err:
-                        try:
-                            import json
-                            log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                            with open(log_path, 'a', encoding='utf-8') as f:
-                                f.write(json.dumps({"location":"gemini_proxy.py:236","message":"Error logging response","data":{"error":str(log_err)},"sessionId":"debug-session","runId":"run1","hypothesisId":"L","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                        except: pass
-                    # #endregion
+                    received = True
+                    if tracer.enabled('gemini'):
+                        data = getattr(response, 'data', None)
+                        tracer.emit('gemini', 'gemini_proxy.py:_receive_messages', 'Received message from Gemini', {
+                            'data_len': len(data) if isinstance(data, bytes) else None,
+                            'has_server_content': getattr(response, 'server_content', None) is not None,
+                            'has_tool_call': getattr(response, 'tool_call', None) is not None
+                        }, session_id)
                     
-                    # Handle function calls before passing message to client
-                    await self._handle_function_calls(response, session_id)
+                    if self._track_resumption(response, session_id, session):
+                        # Server is about to close this connection; move to a new one now
+                        asyncio.create_task(self._resume(session_id, session, on_message, on_error, ConnectionError('Upstream sent GoAway')))
+                    
+                    self._route_tool_messages(response, session_id)
                     # Pass the message to client
                     await on_message(response)
-            else:
-                # #region agent log
-                try:
-                    import json
-                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"gemini_proxy.py:220","message":"Session does not have receive() method","data":{"session_type":type(session).__name__},"sessionId":"debug-session","runId":"run1","hypothesisId":"I","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-                print(f"[Gemini] Session {session_id} does not support receive() method")
+                if not received:
+                    raise ConnectionError('Upstream stream ended')
         except Exception as e:
-            # #region agent log
+            current = session_manager.get_session(session_id)
+            if not current or current.gemini_session is not session:
+                return  # Disconnected or already replaced by a resumed session
+            tracer.emit('gemini', 'gemini_proxy.py:_receive_messages', 'Error in receive loop', {'error': str(e), 'error_type': type(e).__name__}, session_id)
+            await self._resume(session_id, session, on_message, on_error, e)
+    
+    def _route_tool_messages(self, message: Any, session_id: str):
+        """Start function calls in the background, and cancel them when the turn is abandoned"""
+        server_content = getattr(message, 'server_content', None)
+        if server_content is not None and getattr(server_content, 'interrupted', None):
+            self.tool_dispatcher.cancel(session_id, INTERRUPT)
+        cancellation = getattr(message, 'tool_call_cancellation', None)
+        if cancellation is not None and getattr(cancellation, 'ids', None):
+            self.tool_dispatcher.cancel(session_id, MODEL, cancellation.ids)
+        
+        # Run function calls in the background so relaying continues while tools execute
+        tool_call = getattr(message, 'tool_call', None)
+        if tool_call:
+            call_ids = [fc.id for fc in getattr(tool_call, 'function_calls', None) or [] if getattr(fc, 'id', None)]
+            self.tool_dispatcher.dispatch(session_id, lambda: self._handle_function_calls(message, session_id), call_ids)
+        else:
+            self.tool_dispatcher.note_relay(session_id)
+    
+    def _on_session_deleted(self, session_id: str):
+        """Cancel tool calls of a deleted or expired session (may run on the session manager's timer thread)"""
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self.tool_dispatcher.cancel_session(session_id, EXPIRED)))
+    
+    def get_session_stats(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get upstream connection and replay state for a session"""
+        session = session_manager.get_session(session_id)
+        if not session:
+            return None
+        return {
+            'connected': session.gemini_session is not None,
+            'resumable': bool(session.resumption_handle),
+            'reconnecting': session.reconnecting,
+            'replay': session.replay_buffer.get_stats() if session.replay_buffer is not None else None,
+            'tools': self.tool_dispatcher.get_session_stats(session_id)
+        }
+    
+    def _track_resumption(self, response: Any, session_id: str, gemini_session: Any) -> bool:
+        """Remember the latest resumption handle; returns True on a GoAway for this connection"""
+        session = session_manager.get_session(session_id)
+        if not session or session.gemini_session is not gemini_session:
+            return False
+        update = getattr(response, 'session_resumption_update', None)
+        if update and getattr(update, 'resumable', None) and getattr(update, 'new_handle', None):
+            session.resumption_handle = update.new_handle
+        if getattr(response, 'go_away', None) is not None:
+            self.go_aways += 1
+            return True
+        return False
+    
+    async def _resume(
+        self,
+        session_id: str,
+        gemini_session: Any,
+        on_message: Callable[[Dict[str, Any]], Awaitable[None]],
+        on_error: Callable[[Exception], Awaitable[None]],
+        error: Exception
+    ):
+        """Reconnect upstream with the resumption handle, then replay audio buffered meanwhile
+
+        The client keeps its WebSocket; it only sees an error if every
+        attempt fails or the session was never resumable.
+        """
+        session = session_manager.get_session(session_id)
+        if not session or session.gemini_session is not gemini_session or session.reconnecting:
+            return
+        if not self.resumption.enabled or not session.resumption_handle:
+            await on_error(error)
+            return
+        
+        session.reconnecting = True
+        old_context_manager = session.gemini_context_manager
+        print(f"[Gemini] Upstream lost for {session_id} ({error}); resuming")
+        tracer.emit('connect', 'gemini_proxy.py:_resume', 'Resuming upstream session', {'error': str(error), 'error_type': type(error).__name__}, session_id)
+        try:
+            await old_context_manager.__aexit__(None, None, None)
+        except Exception:
+            pass
+        
+        variant = session.tenant_id if session.tenant_id in self.live_config.variants else None
+        opened = None
+        for attempt in range(self.resumption.max_attempts):
             try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                import traceback
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"gemini_proxy.py:227","message":"Error in receive loop","data":{"error":str(e),"error_type":type(e).__name__,"traceback":traceback.format_exc()},"sessionId":"debug-session","runId":"run1","hypothesisId":"I","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            await on_error(e)
+                opened = await self._open_upstream(variant, session.resumption_handle)
+                break
+            except Exception as e:
+                error = e
+                tracer.emit('connect', 'gemini_proxy.py:_resume', 'Resume attempt failed', {'attempt': attempt + 1, 'error': str(e)}, session_id)
+                if attempt + 1 < self.resumption.max_attempts:
+                    await asyncio.sleep(self.resumption.retry_delay(attempt))
+        
+        # The caller may have disconnected while we were reconnecting
+        current = session_manager.get_session(session_id)
+        if current is not session or session.gemini_session is not gemini_session:
+            if opened:
+                await opened[0].__aexit__(None, None, None)
+            return
+        
+        if not opened:
+            self.resume_failures += 1
+            session.reconnecting = False
+            if session.replay_buffer:
+                session.replay_buffer.clear()
+            session_manager.update_session(session_id, {'gemini_session': None, 'gemini_context_manager': None, 'audio_sender': None, 'resumption_handle': None})
+            self.admission.release(session_id)
+            await self.tool_dispatcher.cancel_session(session_id)
+            await on_error(error)
+            return
+        
+        context_manager, new_session = opened
+        audio_sender = self._resolve_audio_sender(new_session)
+        session_manager.update_session(session_id, {
+            'gemini_context_manager': context_manager,
+            'gemini_session': new_session,
+            'audio_sender': audio_sender
+        })
+        asyncio.create_task(self._receive_messages(new_session, session_id, on_message, on_error))
+        
+        # Replay until the buffer is empty; audio arriving meanwhile is appended and replayed in order
+        buffer = session.replay_buffer
+        try:
+            while buffer and audio_sender:
+                pcm, mime_type = buffer.pop()
+                await audio_sender(pcm, _upstream_mime_type(mime_type))
+        except Exception as e:
+            print(f"[Gemini] Error replaying buffered audio for {session_id}: {e}")
+            buffer.clear()
+        session.reconnecting = False
+        self.resumes += 1
+        tracer.emit('connect', 'gemini_proxy.py:_resume', 'Upstream session resumed', buffer.get_stats() if buffer is not None else {}, session_id)
     
     async def _handle_message(
         self,
@@ -302,8 +352,8 @@ class GeminiProxy:
         on_message: Callable[[Dict[str, Any]], Awaitable[None]]
     ):
         """Handle messages from Gemini, including function calls"""
-        # Handle function calls before passing message to client
-        await self._handle_function_calls(message, session_id)
+        # Run function calls in the background so the message is relayed right away
+        self._route_tool_messages(message, session_id)
         
         # Pass the message to client
         await on_message(message)
@@ -326,11 +376,8 @@ class GeminiProxy:
         if not session or not session.gemini_session:
             return
         
-        function_calls = tool_call.function_calls
-        function_responses = []
-        
-        # Process each function call
-        for fc in function_calls:
+        function_calls = []
+        for fc in tool_call.function_calls:
             tool_name = getattr(fc, 'name', '') or ''
             args = getattr(fc, 'args', {}) or {}
             call_id = getattr(fc, 'id', '') or (tool_name + '_' + str(int(__import__('time').time() * 1000)))
@@ -339,27 +386,46 @@ class GeminiProxy:
                 continue
             
             print(f"[Function Call] {tool_name}", args)
-            
-            # Execute the function
-            result = await tool_registry.execute(tool_name, args)
+            function_calls.append((call_id, tool_name, args))
+        if not function_calls:
+            return
+        
+        # Execute independent calls concurrently; calls still queued at the deadline are shed
+        deadline = time.monotonic() + self.tool_scheduler.config.max_wait
+        results = await self.tool_dispatcher.run_calls(session_id, [
+            lambda name=tool_name, args=args: self._execute_tool(name, args, session, deadline)
+            for _, tool_name, args in function_calls
+        ])
+        
+        function_responses = []
+        for (call_id, tool_name, _), result in zip(function_calls, results):
+            if result.error_type == 'timeout':
+                self.tool_dispatcher.note_timeout(session_id)
+            response = result.result
+            if result.error:
+                response = {'error': result.error}
+                if result.error_type:
+                    response['errorType'] = result.error_type
             
             # Build function response per Live API documentation using types.FunctionResponse
             if types:
                 function_response = types.FunctionResponse(
                     id=call_id,
                     name=tool_name,
-                    response={'error': result.error} if result.error else result.result
+                    response=response
                 )
             else:
                 # Fallback if types not available
                 function_response = {
                     'id': call_id,
                     'name': tool_name,
-                    'response': {'error': result.error} if result.error else result.result
+                    'response': response
                 }
             function_responses.append(function_response)
         
-        # Send function results back to Gemini using send_tool_response
+        # Send function results back to Gemini using send_tool_response (the session may have resumed or closed meanwhile)
+        if not session.gemini_session:
+            return
         try:
             if hasattr(session.gemini_session, 'send_tool_response'):
                 await session.gemini_session.send_tool_response(function_responses=function_responses)
@@ -368,373 +434,123 @@ class GeminiProxy:
             else:
                 print("[Function Call] send_tool_response method not available on session")
         except Exception as e:
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                import traceback
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"gemini_proxy.py:203","message":"Function response send error","data":{"error":str(e),"error_type":type(e).__name__,"traceback":traceback.format_exc()},"sessionId":"debug-session","runId":"run1","hypothesisId":"H","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
+            tracer.emit('tools', 'gemini_proxy.py:_handle_function_calls', 'Function response send error', {'error': str(e), 'error_type': type(e).__name__}, session_id)
             print(f"[Function Call] Error sending function responses: {e}")
     
-    async def send_audio(self, session_id: str, audio_blob: Dict[str, Any]) -> None:
-        """Send audio data to Gemini"""
+    async def _execute_tool(self, name: str, args: Dict[str, Any], session: Session, deadline: float) -> FunctionResult:
+        """Execute a tool once the scheduler admits it, bounded by the tool's timeout"""
+        try:
+            return await self.tool_scheduler.run(
+                name, session.user_id, session.tenant_id, deadline,
+                lambda: tool_registry.execute(name, args, self.tool_dispatcher.config.default_timeout)
+            )
+        except ToolShed as e:
+            return FunctionResult(call_id='', result=None, error=str(e), error_type='shed')
+    
+    async def send_pcm(self, session_id: str, audio_bytes: bytes, raw_mime_type: str) -> None:
+        """Send raw PCM bytes to Gemini"""
         session = session_manager.get_session(session_id)
         if not session or not session.gemini_session:
             raise ValueError('Session not found or not connected')
-        
-        # #region agent log
-        try:
-            import json
-            log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-            # Get all methods/attributes of the session object
-            session_attrs = [attr for attr in dir(session.gemini_session) if not attr.startswith('_')]
-            # Check specifically for send_realtime_input
-            has_send_realtime_input = hasattr(session.gemini_session, 'send_realtime_input')
-            has_send = hasattr(session.gemini_session, 'send')
-            # Get method signatures if possible
-            send_sig = None
-            send_realtime_sig = None
-            try:
-                import inspect
-                if has_send:
-                    send_sig = str(inspect.signature(session.gemini_session.send))
-                if has_send_realtime_input:
-                    send_realtime_sig = str(inspect.signature(session.gemini_session.send_realtime_input))
-            except:
-                pass
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"gemini_proxy.py:350","message":"Sending audio","data":{"session_id":session_id,"has_audio_data":bool(audio_blob.get('data')),"session_type":type(session.gemini_session).__name__,"session_attrs":session_attrs[:20],"has_send_realtime_input":has_send_realtime_input,"has_send":has_send,"send_sig":send_sig,"send_realtime_sig":send_realtime_sig},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
+        if session.reconnecting and session.replay_buffer is not None:
+            session.replay_buffer.append(audio_bytes, raw_mime_type)
+            return
+        if not session.audio_sender:
+            raise ValueError('Session does not support sending audio input')
         
         try:
-            # The session is an AsyncSession with a 'send' method
-            # Per Python SDK: use send() with types.Blob for audio
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                has_send = hasattr(session.gemini_session, 'send')
-                send_callable = callable(getattr(session.gemini_session, 'send', None))
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"gemini_proxy.py:375","message":"Checking send method","data":{"has_send":has_send,"send_callable":send_callable,"has_types":types is not None},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            
-            # Check for send_realtime_input method first (preferred for audio)
-            # Based on official example: await session.send_realtime_input(audio={"data": bytes, "mime_type": "audio/pcm"})
-            if hasattr(session.gemini_session, 'send_realtime_input'):
-                # #region agent log
-                try:
-                    import json
-                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"gemini_proxy.py:387","message":"Using send_realtime_input method","data":{"has_types":types is not None},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-                
-                # Convert audio_blob dict to the format expected by send_realtime_input
-                # Signature shows: audio: Union[google.genai.types.Blob, google.genai.types.BlobDict]
-                # Try using types.Blob first (preferred), fallback to dict format
-                import base64
-                audio_data = audio_blob.get('data', '')
-                # Simplify mime_type to match user's example: "audio/pcm" not "audio/pcm;rate=16000"
-                raw_mime_type = audio_blob.get('mimeType', 'audio/pcm')
-                mime_type = 'audio/pcm' if raw_mime_type.startswith('audio/pcm') else raw_mime_type
-                
-                # Decode base64 if it's a string, otherwise use as-is
-                if isinstance(audio_data, str):
-                    audio_bytes = base64.b64decode(audio_data)
-                else:
-                    audio_bytes = audio_data
-                
-                # #region agent log
-                try:
-                    import json
-                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                    has_blob = types and hasattr(types, 'Blob')
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"gemini_proxy.py:413","message":"Preparing audio for send_realtime_input","data":{"has_types":types is not None,"has_blob":has_blob,"mime_type":mime_type,"audio_bytes_len":len(audio_bytes)},"sessionId":"debug-session","runId":"run1","hypothesisId":"K","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-                
-                # Try using types.Blob if available (signature expects Blob or BlobDict)
-                if types and hasattr(types, 'Blob'):
-                    try:
-                        audio_blob_obj = types.Blob(data=audio_bytes, mime_type=mime_type)
-                        # #region agent log
-                        try:
-                            import json
-                            log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                            with open(log_path, 'a', encoding='utf-8') as f:
-                                f.write(json.dumps({"location":"gemini_proxy.py:425","message":"Calling send_realtime_input with types.Blob","data":{"mime_type":mime_type,"audio_bytes_len":len(audio_bytes)},"sessionId":"debug-session","runId":"run1","hypothesisId":"K","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                        except: pass
-                        # #endregion
-                        await session.gemini_session.send_realtime_input(audio=audio_blob_obj)
-                    except Exception as blob_error:
-                        # #region agent log
-                        try:
-                            import json
-                            log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                            with open(log_path, 'a', encoding='utf-8') as f:
-                                f.write(json.dumps({"location":"gemini_proxy.py:432","message":"types.Blob failed, trying dict format","data":{"error":str(blob_error),"error_type":type(blob_error).__name__},"sessionId":"debug-session","runId":"run1","hypothesisId":"K","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                        except: pass
-                        # #endregion
-                        # Fallback to dict format (as shown in user's example)
-                        audio_msg = {"data": audio_bytes, "mime_type": mime_type}
-                        # #region agent log
-                        try:
-                            import json
-                            log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                            with open(log_path, 'a', encoding='utf-8') as f:
-                                f.write(json.dumps({"location":"gemini_proxy.py:440","message":"Calling send_realtime_input with audio dict (fallback)","data":{"mime_type":mime_type,"audio_bytes_len":len(audio_bytes)},"sessionId":"debug-session","runId":"run1","hypothesisId":"K","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                        except: pass
-                        # #endregion
-                        await session.gemini_session.send_realtime_input(audio=audio_msg)
-                else:
-                    # No types.Blob available, use dict format
-                    audio_msg = {"data": audio_bytes, "mime_type": mime_type}
-                    # #region agent log
-                    try:
-                        import json
-                        log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                        with open(log_path, 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"location":"gemini_proxy.py:450","message":"Calling send_realtime_input with audio dict (no types.Blob)","data":{"mime_type":mime_type,"audio_bytes_len":len(audio_bytes)},"sessionId":"debug-session","runId":"run1","hypothesisId":"K","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
-                    await session.gemini_session.send_realtime_input(audio=audio_msg)
-            elif hasattr(session.gemini_session, 'send'):
-                # Fallback to send() method if send_realtime_input doesn't exist
-                # #region agent log
-                try:
-                    import json
-                    import inspect
-                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                    send_sig = None
-                    try:
-                        send_sig = str(inspect.signature(session.gemini_session.send))
-                    except:
-                        pass
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"gemini_proxy.py:447","message":"Using send method (fallback)","data":{"has_types":types is not None,"send_signature":send_sig},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
+            await session.audio_sender(audio_bytes, _upstream_mime_type(raw_mime_type))
+        except Exception:
+            # A resumable upstream that just dropped keeps the chunk for replay instead of failing the caller
+            if session.resumption_handle and session.replay_buffer is not None:
+                session.replay_buffer.append(audio_bytes, raw_mime_type)
+                return
+            raise
+    
+    async def send_audio_stream_end(self, session_id: str) -> None:
+        """Tell Gemini the audio stream paused (e.g. VAD detected end of speech)"""
+        session = session_manager.get_session(session_id)
+        if not session or not session.gemini_session or session.reconnecting:
+            return
+        send_realtime_input = getattr(session.gemini_session, 'send_realtime_input', None)
+        if send_realtime_input:
+            await send_realtime_input(audio_stream_end=True)
+    
+    @staticmethod
+    def _resolve_audio_sender(gemini_session: Any) -> Optional[AudioSender]:
+        """Pick the audio send strategy once from what the SDK session supports"""
+        # Preferred: send_realtime_input(audio=Blob) per the Live API examples
+        send_realtime_input = getattr(gemini_session, 'send_realtime_input', None)
+        if send_realtime_input:
+            if types and hasattr(types, 'Blob'):
+                blob_type = types.Blob
                 
-                # Convert audio_blob dict to proper input format
-                # Based on signature, send() accepts input as positional arg with types like LiveClientRealtimeInput
-                if types:
-                    import base64
-                    audio_data = audio_blob.get('data', '')
-                    mime_type = audio_blob.get('mimeType', 'audio/pcm;rate=16000')
-                    
-                    if isinstance(audio_data, str):
-                        audio_bytes = base64.b64decode(audio_data)
-                    else:
-                        audio_bytes = audio_data
-                    
-                    audio_blob_obj = types.Blob(data=audio_bytes, mime_type=mime_type)
-                    
-                    # Try different approaches based on send() signature
-                    # The signature shows it accepts Part, Content, LiveClientContent, etc.
-                    # Based on documentation, audio should be sent as Part with inline_data
-                    # #region agent log
-                    try:
-                        import json
-                        log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                        with open(log_path, 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"location":"gemini_proxy.py:478","message":"Trying to send audio","data":{"mime_type":mime_type,"audio_bytes_len":len(audio_bytes),"has_Part":hasattr(types, 'Part'),"has_InlineData":hasattr(types, 'InlineData')},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
-                    
-                    # Option 1: Try Part with inline_data (most likely based on API structure)
-                    try:
-                        if hasattr(types, 'Part') and hasattr(types, 'InlineData'):
-                            # Create InlineData with the Blob
-                            inline_data = types.InlineData(data=audio_bytes, mime_type=mime_type)
-                            # Create Part with inline_data
-                            part = types.Part(inline_data=inline_data)
-                            # #region agent log
-                            try:
-                                import json
-                                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                                with open(log_path, 'a', encoding='utf-8') as f:
-                                    f.write(json.dumps({"location":"gemini_proxy.py:490","message":"Trying send with Part(inline_data=InlineData)","data":{"mime_type":mime_type},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                            except: pass
-                            # #endregion
-                            await session.gemini_session.send(part)
-                        else:
-                            raise ValueError("Part or InlineData types not available")
-                    except Exception as e1:
-                        # Option 2: Try Part with inline_data using dict format
-                        try:
-                            part_dict = {'inline_data': {'data': audio_bytes, 'mime_type': mime_type}}
-                            # #region agent log
-                            try:
-                                import json
-                                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                                with open(log_path, 'a', encoding='utf-8') as f:
-                                    f.write(json.dumps({"location":"gemini_proxy.py:500","message":"Trying send with Part dict format","data":{"error1":str(e1)[:100]},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                            except: pass
-                            # #endregion
-                            await session.gemini_session.send(part_dict)
-                        except Exception as e2:
-                            # Option 3: Try Content with parts containing Part
-                            try:
-                                if hasattr(types, 'Content'):
-                                    if hasattr(types, 'Part') and hasattr(types, 'InlineData'):
-                                        inline_data = types.InlineData(data=audio_bytes, mime_type=mime_type)
-                                        part = types.Part(inline_data=inline_data)
-                                        content = types.Content(parts=[part])
-                                    else:
-                                        # Use dict format
-                                        part_dict = {'inline_data': {'data': audio_bytes, 'mime_type': mime_type}}
-                                        content = types.Content(parts=[part_dict])
-                                    # #region agent log
-                                    try:
-                                        import json
-                                        log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                                        with open(log_path, 'a', encoding='utf-8') as f:
-                                            f.write(json.dumps({"location":"gemini_proxy.py:515","message":"Trying send with Content(parts=[Part])","data":{"error2":str(e2)[:100]},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                                    except: pass
-                                    # #endregion
-                                    await session.gemini_session.send(content)
-                                else:
-                                    raise e2
-                            except Exception as e3:
-                                # Log all attempts and re-raise
-                                # #region agent log
-                                try:
-                                    import json
-                                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                                    with open(log_path, 'a', encoding='utf-8') as f:
-                                        f.write(json.dumps({"location":"gemini_proxy.py:525","message":"All send attempts failed","data":{"error1":str(e1)[:100],"error2":str(e2)[:100],"error3":str(e3)[:100]},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                                except: pass
-                                # #endregion
-                                raise e3
-                else:
-                    # #region agent log
-                    try:
-                        import json
-                        log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                        with open(log_path, 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"location":"gemini_proxy.py:478","message":"Trying send with dict (no types)","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
-                    await session.gemini_session.send({'audio': audio_blob})
+                async def send_realtime_blob(audio_bytes: bytes, mime_type: str) -> None:
+                    await send_realtime_input(audio=blob_type(data=audio_bytes, mime_type=mime_type))
+                return send_realtime_blob
+            
+            async def send_realtime_dict(audio_bytes: bytes, mime_type: str) -> None:
+                await send_realtime_input(audio={'data': audio_bytes, 'mime_type': mime_type})
+            return send_realtime_dict
+        
+        # Older SDK versions: send() with a Part carrying inline data
+        send = getattr(gemini_session, 'send', None)
+        if send:
+            if types and hasattr(types, 'Part') and hasattr(types, 'Blob'):
+                part_type, blob_type = types.Part, types.Blob
                 
-                # #region agent log
-                try:
-                    import json
-                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"gemini_proxy.py:395","message":"Audio sent via send method","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-            # Fallback methods (for different SDK versions)
-            elif hasattr(session.gemini_session, 'send_realtime_input'):
-                # #region agent log
-                try:
-                    import json
-                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"gemini_proxy.py:402","message":"Using send_realtime_input method","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-                if types:
-                    import base64
-                    audio_data = audio_blob.get('data', '')
-                    mime_type = audio_blob.get('mimeType', 'audio/pcm;rate=16000')
-                    if isinstance(audio_data, str):
-                        audio_bytes = base64.b64decode(audio_data)
-                    else:
-                        audio_bytes = audio_data
-                    audio_blob_obj = types.Blob(data=audio_bytes, mime_type=mime_type)
-                    await session.gemini_session.send_realtime_input(audio=audio_blob_obj)
-                else:
-                    await session.gemini_session.send_realtime_input(media=audio_blob)
-            elif hasattr(session.gemini_session, 'send_client_content'):
-                # #region agent log
-                try:
-                    import json
-                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"gemini_proxy.py:420","message":"Using send_client_content method","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-                await session.gemini_session.send_client_content(
-                    turns={"parts": [{"inline_data": audio_blob}]}
+                async def send_part(audio_bytes: bytes, mime_type: str) -> None:
+                    await send(part_type(inline_data=blob_type(data=audio_bytes, mime_type=mime_type)))
+                return send_part
+            
+            async def send_part_dict(audio_bytes: bytes, mime_type: str) -> None:
+                await send({'inline_data': {'data': audio_bytes, 'mime_type': mime_type}})
+            return send_part_dict
+        
+        send_client_content = getattr(gemini_session, 'send_client_content', None)
+        if send_client_content:
+            async def send_content(audio_bytes: bytes, mime_type: str) -> None:
+                await send_client_content(
+                    turns={"parts": [{"inline_data": {'data': audio_bytes, 'mime_type': mime_type}}]}
                 )
-            else:
-                # #region agent log
-                try:
-                    import json
-                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                    session_attrs = [attr for attr in dir(session.gemini_session) if not attr.startswith('_')]
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"gemini_proxy.py:430","message":"No audio send method found","data":{"session_attrs":session_attrs},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-                raise ValueError('Session does not support sending audio input')
-        except Exception as e:
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                import traceback
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"gemini_proxy.py:405","message":"Audio send error","data":{"error":str(e),"error_type":type(e).__name__,"traceback":traceback.format_exc()},"sessionId":"debug-session","runId":"run1","hypothesisId":"J","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            raise
+            return send_content
+        
+        return None
     
     async def disconnect_session(self, session_id: str) -> None:
         """Disconnect a Gemini session"""
+        self.admission.release(session_id)
+        await self.tool_dispatcher.cancel_session(session_id)
         session = session_manager.get_session(session_id)
         if not session:
             return
         
-        # #region agent log
-        try:
-            import json
-            log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"gemini_proxy.py:250","message":"Disconnecting session","data":{"session_id":session_id,"has_gemini_session":bool(session.gemini_session)},"sessionId":"debug-session","runId":"run1","hypothesisId":"I","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
+        tracer.emit('connect', 'gemini_proxy.py:disconnect_session', 'Disconnecting session', {'has_gemini_session': bool(session.gemini_session)}, session_id)
+        
+        # Detach first so the receive loop sees an intentional close and does not try to resume
+        context_manager = session.gemini_context_manager
+        gemini_session = session.gemini_session
+        if session.replay_buffer:
+            session.replay_buffer.clear()
+        session_manager.update_session(session_id, {
+            'gemini_session': None,
+            'gemini_context_manager': None,
+            'audio_sender': None,
+            'resumption_handle': None,
+            'reconnecting': False
+        })
         
         # Exit the context manager if it exists
-        if hasattr(session, 'gemini_context_manager') and session.gemini_context_manager:
+        if context_manager:
             try:
-                await session.gemini_context_manager.__aexit__(None, None, None)
-                # #region agent log
-                try:
-                    import json
-                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"gemini_proxy.py:260","message":"Context manager exited","data":{},"sessionId":"debug-session","runId":"run1","hypothesisId":"I","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
+                await context_manager.__aexit__(None, None, None)
             except Exception as e:
-                # #region agent log
-                try:
-                    import json
-                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                    import traceback
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"location":"gemini_proxy.py:267","message":"Error exiting context manager","data":{"error":str(e)},"sessionId":"debug-session","runId":"run1","hypothesisId":"I","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-                pass
+                tracer.emit('connect', 'gemini_proxy.py:disconnect_session', 'Error exiting context manager', {'error': str(e)}, session_id)
         
         # Also try close method if available
-        if session.gemini_session and hasattr(session.gemini_session, 'close'):
+        if gemini_session and hasattr(gemini_session, 'close'):
             try:
-                await session.gemini_session.close()
+                await gemini_session.close()
             except:
                 pass
-        
-        session_manager.update_session(session_id, {'gemini_session': None, 'gemini_context_manager': None})
 
@@ -0,0 +1,380 @@
+"""Ingress Pipeline - Per-session audio queue between the client reader and Gemini"""
+import asyncio
+import os
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from utils.audio_utils import parse_pcm_rate, pcm_mime_type
+from utils.resampler import PcmConverter, RESAMPLER_AVAILABLE, INT16, parse_pcm_format
+from utils.vad import VoiceActivityDetector, VAD_AVAILABLE
+
+
+# Sends (pcm, mime_type) upstream
+PcmSender = Callable[[bytes, str], Awaitable[None]]
+# Signals the end of an utterance upstream (audio stream end)
+StreamEndSender = Callable[[], Awaitable[None]]
+ErrorHandler = Callable[[Exception], Awaitable[None]]
+
+
+@dataclass
+class IngressConfig:
+    """Per-deployment ingress settings"""
+    max_queue: int = 50
+    max_audio_age: float = 1.0  # Seconds a chunk may wait before it is dropped
+    target_rate: int = 16000  # Upstream input rate; other declared rates are resampled (requires numpy)
+    frame_ms: int = 100  # Target upstream frame duration; 0 disables re-framing
+    max_hold_ms: int = 200  # Longest buffered audio is held before a partial frame is sent
+    silence_peak: int = 500  # Chunks with a lower int16 peak count as silence and flush the buffer
+    vad: bool = False  # Suppress silent audio upstream (requires numpy)
+    vad_threshold_db: float = -45.0
+    vad_hangover_ms: int = 300
+    vad_preroll_ms: int = 200
+    
+    @classmethod
+    def from_env(cls) -> 'IngressConfig':
+        """Load from INGRESS_* environment variables"""
+        return cls(
+            max_queue=int(os.getenv('INGRESS_QUEUE_SIZE', cls.max_queue)),
+            max_audio_age=int(os.getenv('INGRESS_MAX_AUDIO_AGE_MS', int(cls.max_audio_age * 1000))) / 1000,
+            target_rate=int(os.getenv('INGRESS_TARGET_RATE', cls.target_rate)),
+            frame_ms=int(os.getenv('INGRESS_FRAME_MS', cls.frame_ms)),
+            max_hold_ms=int(os.getenv('INGRESS_MAX_HOLD_MS', cls.max_hold_ms)),
+            silence_peak=int(os.getenv('INGRESS_SILENCE_PEAK', cls.silence_peak)),
+            vad=os.getenv('INGRESS_VAD', '').lower() in ('1', 'true', 'yes'),
+            vad_threshold_db=float(os.getenv('INGRESS_VAD_THRESHOLD_DB', cls.vad_threshold_db)),
+            vad_hangover_ms=int(os.getenv('INGRESS_VAD_HANGOVER_MS', cls.vad_hangover_ms)),
+            vad_preroll_ms=int(os.getenv('INGRESS_VAD_PREROLL_MS', cls.vad_preroll_ms))
+        )
+
+
+def pcm_peak(pcm: bytes) -> int:
+    """Peak absolute amplitude of 16-bit PCM"""
+    samples = array('h', pcm)
+    if not samples:
+        return 0
+    return max(max(samples), -min(samples))
+
+
+class AudioReframer:
+    """Accumulates small PCM chunks into frames of at least the target duration
+
+    Chunks that already reach the target pass straight through (they are
+    never split). A buffered partial frame is released when a silent chunk
+    arrives, when the MIME type changes, or once it has been held for
+    ``max_hold_ms``.
+    """
+    
+    def __init__(self, frame_ms: int, max_hold_ms: int, silence_peak: int):
+        self.frame_ms = frame_ms
+        self.max_hold = max_hold_ms / 1000
+        self.silence_peak = silence_peak
+        self.buffer = bytearray()
+        self.mime_type: Optional[str] = None
+        self.target_bytes = 0
+        self.held_since: Optional[float] = None
+        self.flushed_on_hold = 0
+        self.flushed_on_silence = 0
+    
+    @property
+    def deadline(self) -> Optional[float]:
+        """Monotonic time by which buffered audio must be sent, if any is buffered"""
+        return self.held_since + self.max_hold if self.held_since is not None else None
+    
+    def push(self, pcm: bytes, mime_type: str) -> List[Tuple[bytes, str]]:
+        """Add a chunk; returns frames ready to send"""
+        if not self.frame_ms:
+            return [(pcm, mime_type)]
+        
+        ready = []
+        if mime_type != self.mime_type:
+            if self.buffer:
+                ready.append(self.flush())
+            self.mime_type = mime_type
+            self.target_bytes = parse_pcm_rate(mime_type) * 2 * self.frame_ms // 1000
+        
+        if not self.buffer and len(pcm) >= self.target_bytes:
+            ready.append((pcm, mime_type))
+            return ready
+        
+        if not self.buffer:
+            self.held_since = time.monotonic()
+        self.buffer += pcm
+        if len(self.buffer) >= self.target_bytes:
+            ready.append(self.flush())
+        elif pcm_peak(pcm) < self.silence_peak:
+            self.flushed_on_silence += 1
+            ready.append(self.flush())
+        return ready
+    
+    def flush(self) -> Tuple[bytes, str]:
+        """Release whatever is buffered as one frame"""
+        frame = bytes(self.buffer)
+        self.buffer.clear()
+        self.held_since = None
+        return frame, self.mime_type
+    
+    def flush_expired(self) -> Optional[Tuple[bytes, str]]:
+        """Release the buffer if it has been held past max_hold_ms"""
+        deadline = self.deadline
+        if deadline is None or time.monotonic() < deadline:
+            return None
+        self.flushed_on_hold += 1
+        return self.flush()
+
+
+class IngressPipeline:
+    """Decouples reading client frames from sending audio upstream
+
+    The client reader calls ``enqueue`` and goes straight back to reading, so
+    control messages are never stuck behind a slow upstream send. A sender
+    task drains the bounded queue through an ``AudioReframer`` so upstream
+    sees fewer, right-sized writes. Audio declared at another rate, with
+    several channels or as float32 is first converted to 16-bit mono at
+    ``target_rate``. With VAD enabled, silent audio is dropped
+    and each utterance is closed with an audio-stream-end signal instead.
+    Chunks that wait longer than
+    ``max_audio_age`` seconds are dropped rather than delivered late, and the
+    oldest chunk is dropped when the queue is full.
+    """
+    
+    def __init__(
+        self,
+        session_id: str,
+        send: PcmSender,
+        on_error: ErrorHandler,
+        config: Optional[IngressConfig] = None,
+        end_stream: Optional[StreamEndSender] = None
+    ):
+        self.session_id = session_id
+        self.send = send
+        self.on_error = on_error
+        self.end_stream = end_stream
+        self.config = config or IngressConfig()
+        self.reframer = AudioReframer(self.config.frame_ms, self.config.max_hold_ms, self.config.silence_peak)
+        self.use_vad = self.config.vad and VAD_AVAILABLE
+        if self.config.vad and not VAD_AVAILABLE:
+            print("[Ingress] INGRESS_VAD is set but numpy is not installed; VAD disabled")
+        self.converter: Optional[PcmConverter] = None
+        self.converter_mime: Optional[str] = None
+        self.vad: Optional[VoiceActivityDetector] = None
+        self.vad_stats: Dict[str, int] = {'forwardedMs': 0, 'suppressedMs': 0, 'streamEnds': 0}
+        self.queue: Deque[Tuple[float, bytes, str]] = deque()
+        self._ready = asyncio.Event()
+        self._send_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.closed = False
+        self.enqueued = 0
+        self.sent = 0
+        self.sent_bytes = 0
+        self.dropped_full = 0
+        self.dropped_stale = 0
+        self.send_errors = 0
+        self.process_errors = 0
+        self.max_depth = 0
+        self.max_wait = 0.0
+    
+    def start(self):
+        """Start the upstream sender task"""
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+    
+    async def close(self):
+        """Stop the sender task, discarding queued audio"""
+        self.closed = True
+        self.clear()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+    
+    def clear(self) -> int:
+        """Discard queued and buffered audio; returns the number of chunks discarded"""
+        discarded = len(self.queue)
+        self.queue.clear()
+        self.reframer.flush()
+        return discarded
+    
+    async def flush(self):
+        """Send queued and buffered audio now (e.g. before the upstream session closes)
+        
+        The sender task is stopped between chunks first, so its re-framer,
+        converter and VAD state are never driven from two places at once and
+        frames keep their order; it is restarted afterwards.
+        """
+        await self._stop_sender()
+        try:
+            while self.queue:
+                _, pcm, mime_type = self.queue.popleft()
+                await self._process_safely(pcm, mime_type)
+            if self.reframer.buffer:
+                await self._send_frame(self.reframer.flush())
+        finally:
+            if not self.closed:
+                self.start()
+    
+    def enqueue(self, pcm: bytes, mime_type: str):
+        """Queue audio for upstream (never waits)"""
+        if self.closed:
+            return
+        if len(self.queue) >= self.config.max_queue:
+            self.queue.popleft()
+            self.dropped_full += 1
+        self.queue.append((time.monotonic(), pcm, mime_type))
+        self.enqueued += 1
+        if len(self.queue) > self.max_depth:
+            self.max_depth = len(self.queue)
+        self._ready.set()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, age, framing and drop counters"""
+        oldest_age = time.monotonic() - self.queue[0][0] if self.queue else 0.0
+        return {
+            'queueDepth': len(self.queue),
+            'maxQueueDepth': self.max_depth,
+            'oldestAgeMs': round(oldest_age * 1000, 1),
+            'maxWaitMs': round(self.max_wait * 1000, 1),
+            'enqueued': self.enqueued,
+            'sent': self.sent,
+            'sentBytes': self.sent_bytes,
+            'bufferedBytes': len(self.reframer.buffer),
+            'flushedOnHold': self.reframer.flushed_on_hold,
+            'flushedOnSilence': self.reframer.flushed_on_silence,
+            'droppedFull': self.dropped_full,
+            'droppedStale': self.dropped_stale,
+            'sendErrors': self.send_errors,
+            'processErrors': self.process_errors,
+            'vad': self._vad_stats() if self.use_vad else None
+        }
+    
+    def _vad_stats(self) -> Dict[str, Any]:
+        """Forwarded vs suppressed totals across detectors (one per sample rate seen)"""
+        current = self.vad.get_stats() if self.vad else {'forwardedMs': 0, 'suppressedMs': 0, 'streamEnds': 0}
+        return {key: self.vad_stats[key] + current[key] for key in self.vad_stats}
+    
+    async def _send_frame(self, frame: Tuple[bytes, str]):
+        """Send one frame upstream, reporting failures"""
+        pcm, mime_type = frame
+        if not pcm:
+            return
+        async with self._send_lock:
+            try:
+                await self.send(pcm, mime_type)
+                self.sent += 1
+                self.sent_bytes += len(pcm)
+            except Exception as e:
+                self.send_errors += 1
+                await self.on_error(e)
+    
+    async def _process_safely(self, pcm: bytes, mime_type: str):
+        """Process one chunk, reporting a malformed chunk instead of stopping the sender"""
+        try:
+            await self._process(pcm, mime_type)
+        except Exception as e:
+            self.process_errors += 1
+            await self.on_error(e)
+    
+    async def _process(self, pcm: bytes, mime_type: str):
+        """Run one chunk through VAD and the re-framer, sending what is ready"""
+        pcm, mime_type = self._convert(pcm, mime_type)
+        if len(pcm) % 2:
+            # Checked before VAD or re-framer state is touched, so one bad chunk cannot misalign later frames
+            raise ValueError('Audio chunk is not whole 16-bit samples')
+        ended = False
+        if self.use_vad:
+            pcm, ended = self._detect_voice(pcm, mime_type)
+        if pcm:
+            for frame in self.reframer.push(pcm, mime_type):
+                await self._send_frame(frame)
+        if ended:
+            if self.reframer.buffer:
+                await self._send_frame(self.reframer.flush())
+            if self.end_stream:
+                try:
+                    await self.end_stream()
+                except Exception as e:
+                    self.send_errors += 1
+                    await self.on_error(e)
+    
+    def _convert(self, pcm: bytes, mime_type: str) -> Tuple[bytes, str]:
+        """Convert to 16-bit mono at the target rate, keeping converter state per stream format"""
+        if mime_type != self.converter_mime:
+            self.converter_mime = mime_type
+            self.converter = None
+            rate, channels, encoding = parse_pcm_format(mime_type, self.config.target_rate)
+            if (rate, channels, encoding) != (self.config.target_rate, 1, INT16):
+                if RESAMPLER_AVAILABLE:
+                    self.converter = PcmConverter(rate, self.config.target_rate, channels, encoding)
+                else:
+                    print(f"[Ingress] Cannot convert {mime_type} without numpy; forwarding as-is")
+        if not self.converter:
+            return pcm, mime_type
+        return self.converter.process(pcm), pcm_mime_type(self.config.target_rate)
+    
+    def _detect_voice(self, pcm: bytes, mime_type: str) -> Tuple[bytes, bool]:
+        """Apply the VAD for this chunk's sample rate"""
+        sample_rate = parse_pcm_rate(mime_type)
+        if not self.vad or self.vad.sample_rate != sample_rate:
+            if self.vad:
+                stats = self.vad.get_stats()
+                for key in self.vad_stats:
+                    self.vad_stats[key] += stats[key]
+            self.vad = VoiceActivityDetector(
+                sample_rate,
+                threshold_db=self.config.vad_threshold_db,
+                hangover_ms=self.config.vad_hangover_ms,
+                preroll_ms=self.config.vad_preroll_ms
+            )
+        return self.vad.process(pcm)
+    
+    async def _wait_for_audio(self):
+        """Wait for the next chunk, or until buffered audio must be flushed"""
+        self._ready.clear()
+        deadline = self.reframer.deadline
+        if deadline is None:
+            await self._ready.wait()
+            return
+        try:
+            await asyncio.wait_for(self._ready.wait(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            pass
+    
+    async def _stop_sender(self):
+        """Stop the sender task once it finishes the chunk in hand"""
+        if not self._task:
+            return
+        self._stopping = True
+        self._ready.set()
+        try:
+            await self._task
+        except Exception:
+            pass
+        finally:
+            self._task = None
+            self._stopping = False
+    
+    async def _run(self):
+        """Drain queued audio through the re-framer to the upstream sender"""
+        while not self.closed and not self._stopping:
+            expired = self.reframer.flush_expired()
+            if expired:
+                await self._send_frame(expired)
+                continue
+            if not self.queue:
+                await self._wait_for_audio()
+                continue
+            
+            enqueued_at, pcm, mime_type = self.queue.popleft()
+            wait = time.monotonic() - enqueued_at
+            if wait > self.config.max_audio_age:
+                self.dropped_stale += 1
+                continue
+            if wait > self.max_wait:
+                self.max_wait = wait
+            
+            await self._process_safely(pcm, mime_type)
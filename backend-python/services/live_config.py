@@ -0,0 +1,170 @@
+"""Live Config - Cached Gemini Live connect config, versioned on the tool registry"""
+import sys
+import os
+import json
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+try:
+    from google.genai import types
+except ImportError:
+    types = None
+from tools.tool_registry import ToolRegistry
+
+
+DEFAULT_SYSTEM_INSTRUCTION = (
+    "You are a helpful AI voice assistant with access to various tools and APIs.\n\n"
+    "LANGUAGE POLICY:\n"
+    "- You MUST initially speak ONLY in English.\n"
+    "- Do NOT switch to other languages (like Hindi, Spanish, etc.) unless the user explicitly asks you to speak in that language.\n"
+    "- If a user speaks to you in another language, respond in English and ask if they would like you to switch to their language.\n"
+    "- Only switch languages when the user explicitly requests it (e.g., 'speak in Hindi', 'talk in Spanish', etc.).\n\n"
+    "IMPORTANT: You have access to function calling tools. When a user asks about:\n"
+    "- Weather information → Use the get_weather function\n"
+    "- Analytics or data queries → Use get_analytics or execute_sql_query functions\n"
+    "- Searching for information → Use search_knowledge_base function\n"
+    "- External API calls → Use call_external_api function\n\n"
+    "You MUST use function calls when users request data, information retrieval, or external service interactions. "
+    "Do not just respond without calling functions when they are needed.\n\n"
+    "Always explain what you're doing when calling functions."
+)
+
+
+@dataclass
+class LiveConfigVariant:
+    """Per-tenant overrides on top of the shared Live config"""
+    system_instruction: Optional[str] = None  # Replaces the default instruction
+    tools: Optional[List[str]] = None  # Tool names to expose; None exposes every registered tool
+    overrides: Dict[str, Any] = field(default_factory=dict)  # Extra LiveConnectConfig fields, e.g. speech_config
+
+
+class LiveConfigBuilder:
+    """Builds the Live connect config once per variant and registry version
+    
+    Tool declarations and system instructions are converted to SDK ``types``
+    objects once and shared by every variant that uses them, so a connect
+    only pays for a shallow copy. Registering a tool bumps the registry
+    version, which drops all cached configs on the next ``get``.
+    """
+    
+    def __init__(self, registry: ToolRegistry, system_instruction: str = DEFAULT_SYSTEM_INSTRUCTION, session_resumption: bool = True):
+        self.registry = registry
+        self.system_instruction = system_instruction
+        self.session_resumption = session_resumption  # Ask the server for resumption handles
+        self.variants: Dict[str, LiveConfigVariant] = {}
+        self._variants_version = 0
+        self._cached_version: Optional[Tuple[int, int]] = None
+        self._configs: Dict[Optional[str], Any] = {}
+        self._declarations: Dict[str, Any] = {}  # Tool name -> prepared declaration, shared by variants
+        self._instructions: Dict[str, Any] = {}  # Instruction text -> prepared content, shared by variants
+        self.builds = 0
+        self.hits = 0
+    
+    @property
+    def version(self) -> Tuple[int, int]:
+        """Changes whenever a tool or variant is registered"""
+        return self.registry.version, self._variants_version
+    
+    def register_variant(self, name: str, variant: LiveConfigVariant):
+        """Add or replace a tenant config variant"""
+        self.variants[name] = variant
+        self._variants_version += 1
+    
+    def load_variants(self, path: str):
+        """Load variants from a JSON file: {tenant: {systemInstruction, tools, config}}"""
+        with open(path, 'r', encoding='utf-8') as f:
+            for name, spec in json.load(f).items():
+                self.register_variant(name, LiveConfigVariant(
+                    system_instruction=spec.get('systemInstruction'),
+                    tools=spec.get('tools'),
+                    overrides=spec.get('config') or {}
+                ))
+    
+    def get(self, variant: Optional[str] = None, resume_handle: Optional[str] = None) -> Any:
+        """Get a connect config for a variant (the default config for unknown names)
+        
+        Returns a shallow copy: the SDK may assign fields on the config it is
+        given, but nested objects are shared and must not be mutated. With
+        ``resume_handle``, the copy resumes that upstream session.
+        """
+        version = self.version
+        if version != self._cached_version:
+            self._configs.clear()
+            self._declarations.clear()
+            self._cached_version = version
+        
+        key = variant if variant in self.variants else None
+        config = self._configs.get(key)
+        if config is None:
+            config = self._configs[key] = self._build(self.variants.get(key))
+            self.builds += 1
+        else:
+            self.hits += 1
+        if not hasattr(config, 'model_copy'):
+            config = dict(config)
+            if resume_handle:
+                config['session_resumption'] = {'handle': resume_handle}
+            return config
+        config = config.model_copy()
+        if resume_handle:
+            config.session_resumption = types.SessionResumptionConfig(handle=resume_handle)
+        return config
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        return {
+            'registryVersion': self.registry.version,
+            'variants': len(self.variants),
+            'cached': len(self._configs),
+            'builds': self.builds,
+            'hits': self.hits
+        }
+    
+    def _build(self, variant: Optional[LiveConfigVariant]) -> Any:
+        """Assemble the config for a variant from the shared prepared parts"""
+        variant = variant or LiveConfigVariant()
+        names = variant.tools if variant.tools is not None else list(self.registry.tools)
+        declarations = [self._declaration(name) for name in names if name in self.registry.tools]
+        instruction = self._instruction(variant.system_instruction or self.system_instruction)
+        
+        if not types:
+            config = {
+                'response_modalities': ['AUDIO'],
+                'input_audio_transcription': {},
+                'output_audio_transcription': {},
+                'system_instruction': instruction
+            }
+            if self.session_resumption:
+                config['session_resumption'] = {}
+            if declarations:
+                config['tools'] = [{'function_declarations': declarations}]
+            config.update(variant.overrides)
+            return config
+        
+        config = {
+            'response_modalities': [types.Modality.AUDIO],
+            'input_audio_transcription': types.AudioTranscriptionConfig(),
+            'output_audio_transcription': types.AudioTranscriptionConfig(),
+            'system_instruction': instruction,
+            'tools': [types.Tool(function_declarations=declarations)] if declarations else None,
+            'session_resumption': types.SessionResumptionConfig() if self.session_resumption else None
+        }
+        config.update(variant.overrides)  # Overrides win, as in the dict fallback above
+        return types.LiveConnectConfig(**config)
+    
+    def _declaration(self, name: str) -> Any:
+        """Prepared function declaration for a registered tool"""
+        declaration = self._declarations.get(name)
+        if declaration is None:
+            tool = self.registry.tools[name]
+            spec = {'name': tool.name, 'description': tool.description, 'parameters': tool.parameters}
+            declaration = self._declarations[name] = types.FunctionDeclaration(**spec) if types else spec
+        return declaration
+    
+    def _instruction(self, text: str) -> Any:
+        """Prepared system instruction content"""
+        instruction = self._instructions.get(text)
+        if instruction is None:
+            instruction = self._instructions[text] = types.Content(parts=[types.Part(text=text)]) if types else text
+        return instruction
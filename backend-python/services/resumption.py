@@ -0,0 +1,84 @@
+"""Upstream Resumption - Settings and audio replay buffer for Gemini session resumption"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Tuple
+from utils.audio_utils import parse_pcm_rate
+
+
+@dataclass
+class ResumptionConfig:
+    """Upstream reconnect settings"""
+    enabled: bool = True
+    max_attempts: int = 5
+    backoff: float = 0.25  # Seconds before the first retry; doubles per attempt
+    max_backoff: float = 4.0
+    buffer_ms: int = 5000  # Caller audio kept for replay while reconnecting
+    
+    @classmethod
+    def from_env(cls) -> 'ResumptionConfig':
+        """Load from UPSTREAM_RESUME* environment variables"""
+        return cls(
+            enabled=os.getenv('UPSTREAM_RESUME', '1').lower() in ('1', 'true', 'yes'),
+            max_attempts=int(os.getenv('UPSTREAM_RESUME_ATTEMPTS', cls.max_attempts)),
+            backoff=int(os.getenv('UPSTREAM_RESUME_BACKOFF_MS', int(cls.backoff * 1000))) / 1000,
+            max_backoff=int(os.getenv('UPSTREAM_RESUME_MAX_BACKOFF_MS', int(cls.max_backoff * 1000))) / 1000,
+            buffer_ms=int(os.getenv('UPSTREAM_RESUME_BUFFER_MS', cls.buffer_ms))
+        )
+    
+    def retry_delay(self, attempt: int) -> float:
+        """Backoff before retry ``attempt`` (0-based), with jitter so sessions do not retry in lockstep"""
+        return min(self.max_backoff, self.backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+
+class ReplayBuffer:
+    """Bounded ring buffer of caller audio that could not be sent upstream
+    
+    Holds at most ``max_ms`` of audio; when full, the oldest chunks are
+    dropped so the replay after a reconnect stays close to real time.
+    """
+    
+    def __init__(self, max_ms: int):
+        self.max_ms = max_ms
+        self.chunks: Deque[Tuple[bytes, str, float]] = deque()
+        self.buffered_ms = 0.0
+        self.replayed_ms = 0.0
+        self.dropped_ms = 0.0
+    
+    def append(self, pcm: bytes, mime_type: str):
+        """Buffer a chunk, evicting the oldest audio beyond capacity"""
+        duration = len(pcm) / 2 / parse_pcm_rate(mime_type) * 1000
+        self.chunks.append((pcm, mime_type, duration))
+        self.buffered_ms += duration
+        while self.buffered_ms > self.max_ms and self.chunks:
+            _, _, dropped = self.chunks.popleft()
+            self.buffered_ms -= dropped
+            self.dropped_ms += dropped
+    
+    def pop(self) -> Tuple[bytes, str]:
+        """Take the oldest chunk for replay"""
+        pcm, mime_type, duration = self.chunks.popleft()
+        self.buffered_ms -= duration
+        self.replayed_ms += duration
+        return pcm, mime_type
+    
+    def clear(self):
+        """Discard buffered audio"""
+        self.dropped_ms += self.buffered_ms
+        self.chunks.clear()
+        self.buffered_ms = 0.0
+    
+    def __len__(self) -> int:
+        return len(self.chunks)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffered, replayed and dropped audio in milliseconds"""
+        return {
+            'bufferedMs': round(self.buffered_ms),
+            'replayedMs': round(self.replayed_ms),
+            'droppedMs': round(self.dropped_ms)
+        }
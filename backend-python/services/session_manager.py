@@ -1,12 +1,13 @@
 """Session Manager - Handles user sessions and memory"""
 import uuid
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict, List
 from threading import Timer
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models import Session
+from services.tracing import tracer
 
 
 class SessionManager:
@@ -15,77 +16,28 @@ class SessionManager:
     def __init__(self):
         self.sessions: Dict[str, Session] = {}
         self.SESSION_TIMEOUT = timedelta(minutes=30)
+        self.delete_listeners: List[Callable[[str], None]] = []  # Called with the id of each deleted session, possibly from a timer thread
         self._start_cleanup_timer()
     
-    def create_session(self, user_id: Optional[str] = None) -> Session:
+    def create_session(self, user_id: Optional[str] = None, tenant_id: Optional[str] = None) -> Session:
         """Create a new session"""
-        # #region agent log
-        import json
-        import sys
-        import os
-        log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-        try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"session_manager.py:20","message":"create_session called","data":{"user_id":user_id},"sessionId":"debug-session","runId":"run1","hypothesisId":"G","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
+        session = Session(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            tenant_id=tenant_id,
+            created_at=datetime.now(),
+            gemini_session=None,
+            memory=[]
+        )
+        self.sessions[session.id] = session
         
-        try:
-            session_id = str(uuid.uuid4())
-            # #region agent log
-            try:
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"session_manager.py:28","message":"UUID generated","data":{"session_id":session_id},"sessionId":"debug-session","runId":"run1","hypothesisId":"G","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            
-            created_at = datetime.now()
-            # #region agent log
-            try:
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"session_manager.py:34","message":"Creating Session object","data":{"created_at":created_at.isoformat()},"sessionId":"debug-session","runId":"run1","hypothesisId":"G","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            
-            session = Session(
-                id=session_id,
-                user_id=user_id,
-                created_at=created_at,
-                gemini_session=None,
-                memory=[]
-            )
-            
-            # #region agent log
-            try:
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"session_manager.py:47","message":"Session object created","data":{"session_id":session.id,"has_created_at":hasattr(session, 'created_at')},"sessionId":"debug-session","runId":"run1","hypothesisId":"G","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            
-            self.sessions[session.id] = session
-            
-            # Auto-cleanup after timeout
-            timer = Timer(self.SESSION_TIMEOUT.total_seconds(), self.delete_session, args=[session.id])
-            timer.daemon = True
-            timer.start()
-            
-            # #region agent log
-            try:
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"session_manager.py:58","message":"Session stored and timer started","data":{"session_id":session.id},"sessionId":"debug-session","runId":"run1","hypothesisId":"G","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            
-            return session
-        except Exception as e:
-            # #region agent log
-            try:
-                import traceback
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"session_manager.py:65","message":"create_session error","data":{"error":str(e),"error_type":type(e).__name__,"traceback":traceback.format_exc()},"sessionId":"debug-session","runId":"run1","hypothesisId":"G","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            raise
+        # Auto-cleanup after timeout
+        timer = Timer(self.SESSION_TIMEOUT.total_seconds(), self.delete_session, args=[session.id])
+        timer.daemon = True
+        timer.start()
+        
+        tracer.emit('session', 'session_manager.py:create_session', 'Session created', {'user_id': user_id, 'tenant_id': tenant_id}, session.id)
+        return session
     
     def get_session(self, session_id: str) -> Optional[Session]:
         """Get a session by ID"""
@@ -118,6 +70,8 @@ class SessionManager:
         """Delete a session"""
         if session_id in self.sessions:
             del self.sessions[session_id]
+            for listener in self.delete_listeners:
+                listener(session_id)
             return True
         return False
     
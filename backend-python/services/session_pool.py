@@ -0,0 +1,210 @@
+"""Session Pool - Warm pool of pre-connected Gemini Live sessions"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, NamedTuple, Optional, Set, Tuple
+
+
+# Opens one upstream Live session; returns (context_manager, live_session)
+SessionOpener = Callable[[], Awaitable[Tuple[Any, Any]]]
+# Identifies the config new sessions would be opened with; pooled sessions with another key are stale
+ConfigKey = Callable[[], Any]
+# Upstream sessions the pool may hold beyond those in use (None for no limit)
+Capacity = Callable[[], Optional[int]]
+
+
+@dataclass
+class WarmPoolConfig:
+    """Warm pool settings"""
+    enabled: bool = False
+    min_size: int = 1  # Sessions kept ready even without recent traffic
+    max_size: int = 8
+    max_age: float = 300.0  # Seconds before an unused session is closed, kept below upstream idle limits
+    rate_window: float = 60.0  # Seconds of connection history used to size the pool
+    check_interval: float = 1.0
+    
+    @classmethod
+    def from_env(cls) -> 'WarmPoolConfig':
+        """Load from WARM_POOL* environment variables"""
+        return cls(
+            enabled=os.getenv('WARM_POOL', '').lower() in ('1', 'true', 'yes'),
+            min_size=int(os.getenv('WARM_POOL_MIN', cls.min_size)),
+            max_size=int(os.getenv('WARM_POOL_MAX', cls.max_size)),
+            max_age=float(os.getenv('WARM_POOL_MAX_AGE_S', cls.max_age)),
+            rate_window=float(os.getenv('WARM_POOL_RATE_WINDOW_S', cls.rate_window))
+        )
+
+
+class PooledSession(NamedTuple):
+    """An idle upstream session waiting to be handed out"""
+    context_manager: Any
+    session: Any
+    opened_at: float
+    config_key: Any = None
+
+
+class WarmSessionPool:
+    """Keeps pre-established upstream sessions so connects skip the handshake
+    
+    ``acquire`` never waits: it hands out an idle session or reports a miss,
+    and the caller connects as usual. A background task closes sessions that
+    reach ``max_age`` and refills the pool to a target size: the number of
+    connections expected to arrive during one handshake (recent arrival rate
+    times measured connect latency, doubled for bursts), clamped to
+    ``min_size``..``max_size``.
+    """
+    
+    LATENCY_SMOOTHING = 0.2
+    
+    def __init__(
+        self,
+        opener: SessionOpener,
+        config: Optional[WarmPoolConfig] = None,
+        config_key: Optional[ConfigKey] = None,
+        capacity: Optional[Capacity] = None
+    ):
+        self.opener = opener
+        self.config_key = config_key or (lambda: None)
+        self.capacity = capacity or (lambda: None)
+        self.config = config or WarmPoolConfig()
+        self.idle: Deque[PooledSession] = deque()
+        self.arrivals: Deque[float] = deque()
+        self.opening = 0
+        self.connect_latency = 1.0  # Seconds, smoothed; a guess until the first open completes
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._opens: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.opened = 0
+        self.expired = 0
+        self.stale = 0
+        self.open_errors = 0
+    
+    def start(self):
+        """Start the refill task"""
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+    
+    async def close(self):
+        """Stop refilling and close all idle sessions"""
+        tasks = list(self._opens)
+        if self._task:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        while self.idle:
+            await self._discard(self.idle.popleft())
+    
+    def acquire(self) -> Optional[PooledSession]:
+        """Take a ready session, or None on a miss"""
+        now = time.monotonic()
+        self.arrivals.append(now)
+        key = self.config_key()
+        entry = None
+        while self.idle:
+            candidate = self.idle.popleft()
+            if candidate.config_key != key:
+                self.stale += 1
+            elif now - candidate.opened_at >= self.config.max_age:
+                self.expired += 1
+            else:
+                entry = candidate
+                break
+            asyncio.create_task(self._discard(candidate))
+        
+        if entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._wake.set()
+        return entry
+    
+    def target_size(self) -> int:
+        """Sessions to keep ready for the recent arrival rate"""
+        self._trim_arrivals(time.monotonic())
+        rate = len(self.arrivals) / self.config.rate_window
+        wanted = math.ceil(2 * rate * self.connect_latency)
+        size = max(self.config.min_size, min(self.config.max_size, wanted))
+        capacity = self.capacity()
+        return size if capacity is None else min(size, capacity)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool size, hit rate and refill counters"""
+        requests = self.hits + self.misses
+        return {
+            'idle': len(self.idle),
+            'opening': self.opening,
+            'target': self.target_size(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': round(self.hits / requests, 3) if requests else None,
+            'arrivalsPerMin': round(len(self.arrivals) * 60 / self.config.rate_window, 2),
+            'connectLatencyMs': round(self.connect_latency * 1000),
+            'opened': self.opened,
+            'expired': self.expired,
+            'stale': self.stale,
+            'openErrors': self.open_errors
+        }
+    
+    def _trim_arrivals(self, now: float):
+        """Forget connections older than the rate window"""
+        while self.arrivals and now - self.arrivals[0] > self.config.rate_window:
+            self.arrivals.popleft()
+    
+    async def _run(self):
+        """Age out idle sessions, drop ones opened with an outdated config, and refill to the target size"""
+        while True:
+            now = time.monotonic()
+            while self.idle and now - self.idle[0].opened_at >= self.config.max_age:
+                self.expired += 1
+                await self._discard(self.idle.popleft())
+            key = self.config_key()
+            for entry in [entry for entry in self.idle if entry.config_key != key]:
+                self.idle.remove(entry)
+                self.stale += 1
+                await self._discard(entry)
+            
+            for _ in range(self.target_size() - len(self.idle) - self.opening):
+                self.opening += 1
+                task = asyncio.create_task(self._open())
+                self._opens.add(task)
+                task.add_done_callback(self._opens.discard)
+            
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.config.check_interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _open(self):
+        """Open one session into the pool"""
+        started = time.monotonic()
+        key = self.config_key()
+        try:
+            context_manager, session = await self.opener()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.open_errors += 1
+            print(f"[Pool] Error opening warm session: {e}")
+            return
+        finally:
+            self.opening -= 1
+        
+        now = time.monotonic()
+        self.connect_latency += self.LATENCY_SMOOTHING * (now - started - self.connect_latency)
+        self.opened += 1
+        self.idle.append(PooledSession(context_manager, session, now, key))
+    
+    async def _discard(self, entry: PooledSession):
+        """Close an idle session"""
+        try:
+            await entry.context_manager.__aexit__(None, None, None)
+        except Exception as e:
+            print(f"[Pool] Error closing warm session: {e}")
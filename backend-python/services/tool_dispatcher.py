@@ -0,0 +1,179 @@
+"""Tool Dispatcher - Runs function calls as tracked per-session tasks"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional
+
+
+# Why in-flight tool calls were cancelled
+INTERRUPT = 'interrupt'  # The user barged in
+MODEL = 'model'  # The model sent a tool call cancellation
+DISCONNECT = 'disconnect'
+EXPIRED = 'expired'  # The session timed out
+
+
+@dataclass
+class ToolConfig:
+    """Tool execution settings"""
+    max_concurrency: int = 4  # Tool calls run at once per session (0 for no limit)
+    default_timeout: float = 10.0  # Seconds, for tools without their own timeout (0 disables)
+    
+    @classmethod
+    def from_env(cls) -> 'ToolConfig':
+        """Load from TOOL_* environment variables"""
+        return cls(
+            max_concurrency=int(os.getenv('TOOL_CONCURRENCY', cls.max_concurrency)),
+            default_timeout=int(os.getenv('TOOL_TIMEOUT_MS', int(cls.default_timeout * 1000))) / 1000
+        )
+
+
+class SessionTools:
+    """In-flight tool tasks and counters for one session"""
+    
+    def __init__(self, max_concurrency: int):
+        self.tasks: Dict[asyncio.Task, FrozenSet[str]] = {}  # Tool-call task -> function call ids
+        self.slots = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self.calls = 0
+        self.timeouts = 0
+        self.started = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.busy_since: Optional[float] = None
+        self.busy_time = 0.0  # Seconds with at least one tool call in flight
+        self.relayed_while_busy = 0  # Upstream messages relayed while tools were running
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get in-flight count and overlap counters"""
+        busy = self.busy_time + (time.monotonic() - self.busy_since if self.busy_since is not None else 0)
+        return {
+            'inFlight': len(self.tasks),
+            'started': self.started,
+            'completed': self.completed,
+            'cancelled': self.cancelled,
+            'failed': self.failed,
+            'calls': self.calls,
+            'timeouts': self.timeouts,
+            'busyMs': round(busy * 1000),
+            'relayedWhileBusy': self.relayed_while_busy
+        }
+
+
+class ToolDispatcher:
+    """Runs tool-call handling off the upstream receive loop
+    
+    ``dispatch`` starts the work as a task and returns at once, so the
+    receive loop keeps relaying messages in order while tools run. Tasks are
+    tracked per session and cancelled when the user interrupts, the model
+    cancels the calls, or the session ends; cancellation reaches the tool
+    handlers, so abandoned work stops instead of running to completion.
+    """
+    
+    def __init__(self, config: Optional[ToolConfig] = None):
+        self.config = config or ToolConfig()
+        self.sessions: Dict[str, SessionTools] = {}
+        self.cancelled: Dict[str, int] = {INTERRUPT: 0, MODEL: 0, DISCONNECT: 0, EXPIRED: 0}
+    
+    def dispatch(self, session_id: str, work: Callable[[], Awaitable[Any]], call_ids: Iterable[str] = ()) -> asyncio.Task:
+        """Start tool-call handling for a session in the background"""
+        tools = self._session(session_id)
+        task = asyncio.create_task(work())
+        if not tools.tasks:
+            tools.busy_since = time.monotonic()
+        tools.tasks[task] = frozenset(call_ids)
+        tools.started += 1
+        task.add_done_callback(lambda done: self._finished(tools, done))
+        return task
+    
+    async def run_calls(self, session_id: str, calls: List[Callable[[], Awaitable[Any]]]) -> List[Any]:
+        """Run independent function calls concurrently, bounded per session; results keep call order"""
+        tools = self._session(session_id)
+        
+        async def run(call: Callable[[], Awaitable[Any]]) -> Any:
+            if tools.slots is None:
+                return await call()
+            async with tools.slots:
+                return await call()
+        
+        tools.calls += len(calls)
+        return await asyncio.gather(*(run(call) for call in calls))
+    
+    def note_timeout(self, session_id: str):
+        """Count a function call that hit its timeout"""
+        tools = self.sessions.get(session_id)
+        if tools:
+            tools.timeouts += 1
+    
+    def in_flight(self, session_id: str) -> int:
+        """Number of tool tasks running for a session"""
+        tools = self.sessions.get(session_id)
+        return len(tools.tasks) if tools else 0
+    
+    def note_relay(self, session_id: str):
+        """Count a relayed upstream message that overlapped with tool execution"""
+        tools = self.sessions.get(session_id)
+        if tools and tools.tasks:
+            tools.relayed_while_busy += 1
+    
+    def cancel(self, session_id: str, reason: str, call_ids: Optional[Iterable[str]] = None) -> int:
+        """Cancel a session's in-flight tool calls (only those covering ``call_ids`` if given)"""
+        tools = self.sessions.get(session_id)
+        if not tools:
+            return 0
+        wanted = frozenset(call_ids) if call_ids is not None else None
+        tasks = [task for task, ids in tools.tasks.items() if wanted is None or ids & wanted]
+        return self._cancel_tasks(tasks, reason)
+    
+    async def cancel_session(self, session_id: str, reason: str = DISCONNECT):
+        """Cancel a session's tool tasks and forget its counters"""
+        tools = self.sessions.pop(session_id, None)
+        if not tools or not tools.tasks:
+            return
+        tasks = list(tools.tasks)
+        self._cancel_tasks(tasks, reason)
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def get_session_stats(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get tool stats for a session"""
+        tools = self.sessions.get(session_id)
+        return tools.get_stats() if tools else None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get in-flight tool counts across sessions"""
+        return {
+            'inFlight': sum(len(tools.tasks) for tools in self.sessions.values()),
+            'sessionsWithToolsInFlight': sum(1 for tools in self.sessions.values() if tools.tasks),
+            'cancelled': dict(self.cancelled)
+        }
+    
+    def _session(self, session_id: str) -> SessionTools:
+        """Get or create a session's tool state"""
+        tools = self.sessions.get(session_id)
+        if tools is None:
+            tools = self.sessions[session_id] = SessionTools(self.config.max_concurrency)
+        return tools
+    
+    def _cancel_tasks(self, tasks: List[asyncio.Task], reason: str) -> int:
+        """Cancel unfinished tasks and count them under ``reason``"""
+        cancelled = 0
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+                cancelled += 1
+        self.cancelled[reason] = self.cancelled.get(reason, 0) + cancelled
+        return cancelled
+    
+    def _finished(self, tools: SessionTools, task: asyncio.Task):
+        """Record a finished tool task"""
+        tools.tasks.pop(task, None)
+        if task.cancelled():
+            tools.cancelled += 1
+        elif task.exception() is not None:
+            tools.failed += 1
+            print(f"[Function Call] Tool task failed: {task.exception()}")
+        else:
+            tools.completed += 1
+        if not tools.tasks and tools.busy_since is not None:
+            tools.busy_time += time.monotonic() - tools.busy_since
+            tools.busy_since = None
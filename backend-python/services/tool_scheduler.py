@@ -0,0 +1,260 @@
+"""Tool Scheduler - Fair, deadline-aware admission of tool executions across sessions and tenants"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+# Why a queued tool call was dropped
+SHED_DEADLINE = 'deadline'  # Waited past the point where its turn has most likely moved on
+SHED_OVERFLOW = 'overflow'  # Pushed out of a full queue
+
+
+@dataclass
+class ToolSchedulerConfig:
+    """Tool scheduling limits (0 disables a limit)"""
+    max_concurrent: int = 32  # Tool executions at once across the process
+    max_per_user: int = 0
+    max_per_tool: int = 0  # Default for tools that do not set their own max_concurrency
+    max_queue: int = 256
+    max_wait: float = 8.0  # Seconds after the tool call arrived before a still-queued call is shed
+    tenant_weights: Dict[str, float] = field(default_factory=dict)  # Share of capacity under contention; default 1
+    
+    @classmethod
+    def from_env(cls) -> 'ToolSchedulerConfig':
+        """Load from TOOL_MAX_*, TOOL_QUEUE_* and TOOL_TENANT_WEIGHTS environment variables
+        
+        TOOL_TENANT_WEIGHTS is a comma-separated list of ``tenant=weight`` pairs.
+        """
+        weights: Dict[str, float] = {}
+        for item in os.getenv('TOOL_TENANT_WEIGHTS', '').split(','):
+            if '=' in item:
+                tenant, weight = item.split('=', 1)
+                try:
+                    weights[tenant.strip()] = max(0.01, float(weight))
+                except ValueError:
+                    print(f"[Scheduler] Ignoring invalid tenant weight: {item}")
+        return cls(
+            max_concurrent=int(os.getenv('TOOL_MAX_CONCURRENT', cls.max_concurrent)),
+            max_per_user=int(os.getenv('TOOL_MAX_PER_USER', cls.max_per_user)),
+            max_per_tool=int(os.getenv('TOOL_MAX_PER_TOOL', cls.max_per_tool)),
+            max_queue=int(os.getenv('TOOL_QUEUE_SIZE', cls.max_queue)),
+            max_wait=int(os.getenv('TOOL_QUEUE_MAX_WAIT_MS', int(cls.max_wait * 1000))) / 1000,
+            tenant_weights=weights
+        )
+
+
+class ToolShed(Exception):
+    """Raised when a queued tool call is dropped instead of run"""
+    
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class _Waiter:
+    """A tool call queued for a slot"""
+    __slots__ = ('tool', 'user_id', 'tenant', 'tag', 'deadline', 'future')
+    
+    def __init__(self, tool: str, user_id: Optional[str], tenant: str, tag: float, deadline: float):
+        self.tool = tool
+        self.user_id = user_id
+        self.tenant = tenant
+        self.tag = tag
+        self.deadline = deadline
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class _TenantStats:
+    """Per-tenant scheduling counters"""
+    __slots__ = ('admitted', 'queued', 'shed', 'total_wait', 'max_wait')
+    
+    def __init__(self):
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class ToolScheduler:
+    """Admits tool executions under global, per-tool and per-user caps
+    
+    Calls over a cap wait in a shared queue ordered by weighted fair queuing:
+    each tenant's calls get virtual finish tags spaced by ``1 / weight``, and
+    a freed slot goes to the lowest-tagged waiter that fits its caps, so a
+    tenant firing many calls cannot starve the others. A call still queued
+    at its deadline is shed, as its turn has most likely moved on; when the
+    queue is full, the waiter closest to its deadline is shed first.
+    """
+    
+    DEFAULT_TENANT = ''
+    
+    def __init__(self, config: Optional[ToolSchedulerConfig] = None, tool_limit: Optional[Callable[[str], Optional[int]]] = None):
+        self.config = config or ToolSchedulerConfig()
+        self.tool_limit = tool_limit or (lambda name: None)  # Per-tool cap override; None uses max_per_tool
+        self.running = 0
+        self.per_tool: Dict[str, int] = {}
+        self.per_user: Dict[str, int] = {}
+        self.waiters: List[_Waiter] = []
+        self.virtual_time = 0.0
+        self.last_tag: Dict[str, float] = {}
+        self.tenants: Dict[str, _TenantStats] = {}
+        self.shed: Dict[str, int] = {SHED_DEADLINE: 0, SHED_OVERFLOW: 0}
+    
+    async def run(
+        self,
+        tool: str,
+        user_id: Optional[str],
+        tenant_id: Optional[str],
+        deadline: Optional[float],
+        work: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Run ``work`` once admitted; raises ``ToolShed`` if dropped while queued"""
+        await self.acquire(tool, user_id, tenant_id, deadline)
+        try:
+            return await work()
+        finally:
+            self.release(tool, user_id)
+    
+    async def acquire(self, tool: str, user_id: Optional[str], tenant_id: Optional[str], deadline: Optional[float] = None):
+        """Take a slot for a tool call, queueing until ``deadline`` (monotonic seconds) if needed"""
+        tenant = tenant_id or self.DEFAULT_TENANT
+        stats = self._tenant(tenant)
+        now = time.monotonic()
+        if deadline is None:
+            deadline = now + self.config.max_wait
+        # Anyone still queued is blocked by a cap, so a call that fits now is not jumping ahead
+        if self._has_room(tool, user_id):
+            self._start(tool, user_id)
+            stats.admitted += 1
+            return
+        
+        if len(self.waiters) >= self.config.max_queue:
+            victim = min(self.waiters, key=lambda waiter: waiter.deadline, default=None)
+            if victim is None or victim.deadline >= deadline:
+                self._count_shed(stats, SHED_OVERFLOW)
+                raise ToolShed(SHED_OVERFLOW, 'Tool capacity is exhausted, please try again shortly')
+            self.waiters.remove(victim)
+            self._shed(victim, SHED_OVERFLOW)
+        
+        weight = self.config.tenant_weights.get(tenant, 1.0)
+        tag = self.last_tag[tenant] = max(self.virtual_time, self.last_tag.get(tenant, 0.0)) + 1.0 / weight
+        waiter = _Waiter(tool, user_id, tenant, tag, deadline)
+        self.waiters.append(waiter)
+        stats.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), max(0.0, deadline - now))
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                self.waiters.remove(waiter)
+                waiter.future.cancel()
+                self._count_shed(stats, SHED_DEADLINE)
+                raise ToolShed(SHED_DEADLINE, 'Tool call waited too long for capacity and was dropped')
+            waiter.future.result()  # Admitted or shed just as the deadline passed
+        except asyncio.CancelledError:
+            # Caller went away while queued: give the slot back if it was granted meanwhile
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                self.release(tool, user_id)
+            raise
+        finally:
+            waited = time.monotonic() - now
+            stats.total_wait += waited
+            stats.max_wait = max(stats.max_wait, waited)
+    
+    def release(self, tool: str, user_id: Optional[str]):
+        """Free a slot and admit waiters that now fit"""
+        self.running -= 1
+        self._decrement(self.per_tool, tool)
+        if user_id is not None:
+            self._decrement(self.per_user, user_id)
+        self._dispatch()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get running and queued counts, shed counts and per-tenant queue wait"""
+        tenants = {}
+        for tenant, stats in self.tenants.items():
+            tenants[tenant or 'default'] = {
+                'weight': self.config.tenant_weights.get(tenant, 1.0),
+                'queued': sum(1 for waiter in self.waiters if waiter.tenant == tenant),
+                'admitted': stats.admitted,
+                'shed': stats.shed,
+                'avgQueueWaitMs': round(stats.total_wait / stats.queued * 1000, 1) if stats.queued else None,
+                'maxQueueWaitMs': round(stats.max_wait * 1000, 1)
+            }
+        return {
+            'running': self.running,
+            'queued': len(self.waiters),
+            'runningPerTool': dict(self.per_tool),
+            'shed': dict(self.shed),
+            'tenants': tenants,
+            'maxConcurrent': self.config.max_concurrent or None,
+            'maxPerUser': self.config.max_per_user or None
+        }
+    
+    def _has_room(self, tool: str, user_id: Optional[str]) -> bool:
+        """Whether one more execution fits under every cap"""
+        if self.config.max_concurrent and self.running >= self.config.max_concurrent:
+            return False
+        if user_id is not None and self.config.max_per_user and self.per_user.get(user_id, 0) >= self.config.max_per_user:
+            return False
+        limit = self.tool_limit(tool)
+        if limit is None:
+            limit = self.config.max_per_tool
+        return not limit or self.per_tool.get(tool, 0) < limit
+    
+    def _start(self, tool: str, user_id: Optional[str]):
+        """Record a running execution"""
+        self.running += 1
+        self.per_tool[tool] = self.per_tool.get(tool, 0) + 1
+        if user_id is not None:
+            self.per_user[user_id] = self.per_user.get(user_id, 0) + 1
+    
+    def _dispatch(self):
+        """Hand free slots to the lowest-tagged waiters that fit, shedding those past their deadline"""
+        now = time.monotonic()
+        for waiter in sorted(self.waiters, key=lambda waiter: waiter.tag):
+            if self.config.max_concurrent and self.running >= self.config.max_concurrent:
+                break
+            if waiter.future.done():
+                continue
+            if waiter.deadline <= now:
+                self.waiters.remove(waiter)
+                self._shed(waiter, SHED_DEADLINE)
+                continue
+            if not self._has_room(waiter.tool, waiter.user_id):
+                continue
+            self.waiters.remove(waiter)
+            self.virtual_time = waiter.tag
+            self._start(waiter.tool, waiter.user_id)
+            self._tenant(waiter.tenant).admitted += 1
+            waiter.future.set_result(None)
+    
+    def _shed(self, waiter: _Waiter, reason: str):
+        """Drop a queued waiter"""
+        self._count_shed(self._tenant(waiter.tenant), reason)
+        waiter.future.set_exception(ToolShed(reason, 'Tool call was dropped to keep up with load'))
+    
+    def _count_shed(self, stats: _TenantStats, reason: str):
+        """Count a shed call"""
+        self.shed[reason] += 1
+        stats.shed += 1
+    
+    def _tenant(self, tenant: str) -> _TenantStats:
+        """Get or create a tenant's counters"""
+        stats = self.tenants.get(tenant)
+        if stats is None:
+            stats = self.tenants[tenant] = _TenantStats()
+        return stats
+    
+    @staticmethod
+    def _decrement(counts: Dict[str, int], key: str):
+        """Decrement a counter, dropping it at zero"""
+        counts[key] -= 1
+        if not counts[key]:
+            del counts[key]
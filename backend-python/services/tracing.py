@@ -0,0 +1,172 @@
+"""Trace Sink - Non-blocking, sampled structured event tracing"""
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class TraceSink:
+    """Buffers trace events in a bounded queue and writes them from a background thread
+
+    Hot paths call ``emit`` (or check ``enabled`` before building an expensive
+    payload). Events are sampled per category; a category with rate 0 returns
+    after a single dict lookup. When the queue is full, events are dropped and
+    counted rather than blocking the caller.
+    """
+    
+    def __init__(
+        self,
+        log_path: Optional[str] = None,
+        sample_rates: Optional[Dict[str, float]] = None,
+        default_rate: float = 1.0,
+        max_queue: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.5
+    ):
+        self.log_path: Optional[str] = None
+        self.sample_rates: Dict[str, float] = {}
+        self.default_rate = 0.0
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._writer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.emitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.write_errors = 0
+        if log_path:
+            self.configure(log_path, sample_rates, default_rate, max_queue)
+    
+    def configure(
+        self,
+        log_path: Optional[str],
+        sample_rates: Optional[Dict[str, float]] = None,
+        default_rate: float = 1.0,
+        max_queue: Optional[int] = None
+    ):
+        """(Re)configure the sink; a falsy log_path disables tracing"""
+        self.sample_rates = dict(sample_rates or {})
+        self.default_rate = default_rate if log_path else 0.0
+        self.log_path = log_path or None
+        if max_queue and max_queue != self._queue.maxsize and self._queue.empty():
+            self._queue = queue.Queue(maxsize=max_queue)
+        if not self.log_path:
+            self.sample_rates = {}
+        elif not self._writer:
+            self._writer = threading.Thread(target=self._run_writer, name='trace-writer', daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+    
+    def configure_from_env(self):
+        """Configure from TRACE_LOG_PATH, TRACE_SAMPLE_RATES and TRACE_QUEUE_SIZE
+
+        TRACE_SAMPLE_RATES is a comma-separated list of ``category=rate``
+        pairs; ``*`` sets the default rate for unlisted categories.
+        """
+        rates: Dict[str, float] = {}
+        for item in os.getenv('TRACE_SAMPLE_RATES', '').split(','):
+            if '=' in item:
+                category, rate = item.split('=', 1)
+                try:
+                    rates[category.strip()] = max(0.0, min(1.0, float(rate)))
+                except ValueError:
+                    print(f"[Trace] Ignoring invalid sample rate: {item}")
+        default_rate = rates.pop('*', 1.0)
+        self.configure(
+            os.getenv('TRACE_LOG_PATH'),
+            rates,
+            default_rate,
+            int(os.getenv('TRACE_QUEUE_SIZE', 0)) or None
+        )
+    
+    def enabled(self, category: str) -> bool:
+        """Whether events in this category can be recorded at all"""
+        return self.sample_rates.get(category, self.default_rate) > 0
+    
+    def emit(
+        self,
+        category: str,
+        location: str,
+        message: str,
+        data: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None
+    ):
+        """Record an event if sampled in; never blocks"""
+        rate = self.sample_rates.get(category, self.default_rate)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return
+        
+        event = {
+            'timestamp': int(time.time() * 1000),
+            'category': category,
+            'location': location,
+            'message': message,
+            'data': data or {},
+        }
+        if session_id:
+            event['sessionId'] = session_id
+        
+        try:
+            self._queue.put_nowait(event)
+            self.emitted += 1
+        except queue.Full:
+            self.dropped += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sink counters"""
+        return {
+            'enabled': bool(self.log_path),
+            'queued': self._queue.qsize(),
+            'emitted': self.emitted,
+            'written': self.written,
+            'dropped': self.dropped,
+            'writeErrors': self.write_errors
+        }
+    
+    def close(self):
+        """Stop the writer after flushing queued events"""
+        if not self._writer:
+            return
+        self._stop.set()
+        self._writer.join(timeout=5)
+        self._writer = None
+    
+    def _drain(self, first: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Collect up to batch_size queued events"""
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run_writer(self):
+        """Background loop: block for one event, then write a batch"""
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = self._drain(first)
+            log_path = self.log_path
+            if not log_path:
+                self.dropped += len(batch)
+                continue
+            try:
+                lines = ''.join(json.dumps(event, default=str) + '\n' for event in batch)
+                with open(log_path, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+                self.written += len(batch)
+            except Exception as e:
+                self.write_errors += 1
+                print(f"[Trace] Failed to write {len(batch)} events: {e}")
+
+
+# Global instance (disabled until configured)
+tracer = TraceSink()
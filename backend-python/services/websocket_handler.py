@@ -3,28 +3,61 @@ import sys
 import os
 import json
 import asyncio
+import binascii
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional
 from fastapi import WebSocket
 from models import ConnectionState, TranscriptionData
 from services.session_manager import session_manager
+from services.client_writer import ClientWriter, SLOW_CLIENT_ACTIONS
 from services.gemini_proxy import GeminiProxy
-from utils.audio_utils import validate_audio_data
+from services.admission import AdmissionRejected
+from services.ingress_pipeline import IngressPipeline, IngressConfig
+from services.tracing import tracer
+from utils.transcoder import EgressTranscoder, TRANSCODER_AVAILABLE, PCM16, normalize_encoding
+from utils.audio_utils import validate_audio_data, parse_audio_frame, pack_model_audio_frame, pcm_mime_type, decode_base64, encode_base64
+
+
+MODEL_AUDIO_SAMPLE_RATE = 24000  # Gemini Live output: 16-bit mono PCM
+MODEL_AUDIO_BYTES_PER_SECOND = MODEL_AUDIO_SAMPLE_RATE * 2
+OUTPUT_SAMPLE_RATES = (8000, 16000, 24000)  # Rates a client may request for model audio
 
 
 class WebSocketHandler:
     """Manages WebSocket connections and message routing"""
     
-    def __init__(self, gemini_proxy: GeminiProxy):
+    def __init__(
+        self,
+        gemini_proxy: GeminiProxy,
+        send_queue_size: int = 256,
+        slow_client_policy: Iterable[str] = SLOW_CLIENT_ACTIONS,
+        ingress_config: Optional[IngressConfig] = None
+    ):
         """Initialize WebSocket handler"""
         self.gemini_proxy = gemini_proxy
+        self.send_queue_size = send_queue_size
+        self.slow_client_policy = tuple(slow_client_policy)
+        self.ingress_config = ingress_config or IngressConfig()
         self.clients: Dict[str, WebSocket] = {}
+        self.writers: Dict[str, ClientWriter] = {}
+        self.pipelines: Dict[str, IngressPipeline] = {}
+        self.model_turns: Dict[str, int] = {}  # Current model turn per session, for interrupt flushing
+        self.audio_sequences: Dict[str, int] = {}  # Next expected binary audio sequence per session
+        self.binary_audio: Dict[str, bool] = {}  # Sessions that opted in to binary model audio frames
+        self.model_audio_sequences: Dict[str, int] = {}  # Next binary model audio sequence per session
+        self.transcoders: Dict[str, EgressTranscoder] = {}  # Sessions that asked for another output format
     
     async def handle_connection(self, ws: WebSocket, session_id: str):
         """Handle a new WebSocket connection"""
         await ws.accept()
         self.clients[session_id] = ws
+        writer = ClientWriter(ws, session_id, self.send_queue_size, self.slow_client_policy)
+        self.writers[session_id] = writer
+        writer.start()
+        pipeline = self._create_pipeline(session_id)
+        self.pipelines[session_id] = pipeline
+        pipeline.start()
         
         # Send connection confirmation
         await self.send(session_id, {
@@ -35,9 +68,17 @@ class WebSocketHandler:
         
         try:
             while True:
-                data = await ws.receive_text()
+                frame = await ws.receive()
+                if frame['type'] == 'websocket.disconnect':
+                    break
+                
+                # Binary frames carry raw PCM audio; text frames carry JSON messages
+                if frame.get('bytes') is not None:
+                    await self.handle_audio_frame(session_id, frame['bytes'])
+                    continue
+                
                 try:
-                    message = json.loads(data)
+                    message = json.loads(frame.get('text') or '')
                     await self.handle_message(session_id, message)
                 except json.JSONDecodeError:
                     await self.send(session_id, {
@@ -51,13 +92,43 @@ class WebSocketHandler:
             await self.handle_disconnect(session_id)
             if session_id in self.clients:
                 del self.clients[session_id]
+            if self.writers.get(session_id) is writer:
+                del self.writers[session_id]
+            if self.pipelines.get(session_id) is pipeline:
+                del self.pipelines[session_id]
+            await pipeline.close()
+            await writer.close()
+            self.audio_sequences.pop(session_id, None)
+            self.model_turns.pop(session_id, None)
+            self.binary_audio.pop(session_id, None)
+            self.model_audio_sequences.pop(session_id, None)
+            self.transcoders.pop(session_id, None)
+    
+    def _create_pipeline(self, session_id: str) -> IngressPipeline:
+        """Create the ingress pipeline that feeds this session's audio upstream"""
+        async def send(pcm: bytes, mime_type: str):
+            await self.gemini_proxy.send_pcm(session_id, pcm, mime_type)
+        
+        async def on_error(err: Exception):
+            tracer.emit('audio', 'websocket_handler.py:on_error', 'Audio send error', {'error': str(err), 'error_type': type(err).__name__}, session_id)
+            print(f"[WS] Audio send error for {session_id}: {err}")
+            await self.send(session_id, {
+                'type': 'error',
+                'data': {'message': str(err)},
+                'sessionId': session_id
+            })
+        
+        async def end_stream():
+            await self.gemini_proxy.send_audio_stream_end(session_id)
+        
+        return IngressPipeline(session_id, send, on_error, self.ingress_config, end_stream)
     
     async def handle_message(self, session_id: str, message: Dict[str, Any]):
-        """Handle incoming WebSocket message"""
+        """Handle incoming WebSocket message (audio is queued, control runs immediately)"""
         msg_type = message.get('type')
         
         if msg_type == 'connect':
-            await self.handle_connect(session_id)
+            await self.handle_connect(session_id, message.get('data'))
         elif msg_type == 'audio':
             await self.handle_audio(session_id, message.get('data'))
         elif msg_type == 'disconnect':
@@ -67,8 +138,11 @@ class WebSocketHandler:
         else:
             print(f"[WS] Unknown message type: {msg_type}")
     
-    async def handle_connect(self, session_id: str):
+    async def handle_connect(self, session_id: str, options: Any = None):
         """Handle connect message"""
+        if isinstance(options, dict):
+            self.binary_audio[session_id] = bool(options.get('binaryAudio'))
+            await self.configure_output(session_id, options)
         session = session_manager.get_session(session_id)
         if not session:
             await self.send(session_id, {
@@ -91,9 +165,20 @@ class WebSocketHandler:
             
             await self.gemini_proxy.connect_session(session_id, on_message, on_error)
             
+            transcoder = self.transcoders.get(session_id)
+            await self.send(session_id, {
+                'type': 'status',
+                'data': {
+                    'status': ConnectionState.CONNECTED.value,
+                    'outputMimeType': transcoder.mime_type if transcoder else pcm_mime_type(MODEL_AUDIO_SAMPLE_RATE)
+                },
+                'sessionId': session_id
+            })
+        except AdmissionRejected as e:
+            print(f"[WS] Connection rejected for {session_id}: {e.reason}")
             await self.send(session_id, {
                 'type': 'status',
-                'data': {'status': ConnectionState.CONNECTED.value},
+                'data': {'status': ConnectionState.REJECTED.value, 'reason': e.reason, 'message': str(e)},
                 'sessionId': session_id
             })
         except Exception as e:
@@ -104,29 +189,33 @@ class WebSocketHandler:
                 'sessionId': session_id
             })
     
+    async def configure_output(self, session_id: str, options: Dict[str, Any]):
+        """Set up model audio transcoding from the connect options (outputSampleRate, outputEncoding)"""
+        rate = options.get('outputSampleRate', MODEL_AUDIO_SAMPLE_RATE)
+        requested = options.get('outputEncoding', PCM16)
+        encoding = normalize_encoding(requested)
+        if rate not in OUTPUT_SAMPLE_RATES or not encoding:
+            error = f"Unsupported output format: {rate} Hz {requested}"
+        elif rate == MODEL_AUDIO_SAMPLE_RATE and encoding == PCM16:
+            self.transcoders.pop(session_id, None)
+            return
+        elif not TRANSCODER_AVAILABLE:
+            error = 'Output transcoding requires numpy on the server'
+        else:
+            self.transcoders[session_id] = EgressTranscoder(MODEL_AUDIO_SAMPLE_RATE, rate, encoding)
+            return
+        
+        self.transcoders.pop(session_id, None)
+        await self.send(session_id, {
+            'type': 'error',
+            'data': {'message': f"{error}; sending {pcm_mime_type(MODEL_AUDIO_SAMPLE_RATE)}"},
+            'sessionId': session_id
+        })
+    
     async def handle_audio(self, session_id: str, audio_data: Any):
         """Handle audio data from client"""
-        # #region agent log
-        try:
-            import json
-            log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-            has_data = audio_data is not None
-            data_keys = list(audio_data.keys()) if isinstance(audio_data, dict) else None
-            data_len = len(audio_data.get('data', '')) if isinstance(audio_data, dict) and 'data' in audio_data else None
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"websocket_handler.py:107","message":"Received audio from client","data":{"has_data":has_data,"data_keys":data_keys,"data_len":data_len,"is_valid":validate_audio_data(audio_data) if audio_data else False},"sessionId":"debug-session","runId":"run1","hypothesisId":"O","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
-        
         if not validate_audio_data(audio_data):
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"websocket_handler.py:120","message":"Invalid audio data format","data":{"audio_data_type":type(audio_data).__name__},"sessionId":"debug-session","runId":"run1","hypothesisId":"O","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
+            tracer.emit('audio', 'websocket_handler.py:handle_audio', 'Invalid audio data format', {'audio_data_type': type(audio_data).__name__}, session_id)
             await self.send(session_id, {
                 'type': 'error',
                 'data': {'message': 'Invalid audio data format'},
@@ -134,27 +223,56 @@ class WebSocketHandler:
             })
             return
         
+        tracer.emit('audio', 'websocket_handler.py:handle_audio', 'Received audio from client', {'data_len': len(audio_data['data'])}, session_id)
         try:
-            await self.gemini_proxy.send_audio(session_id, audio_data)
-        except Exception as e:
-            # #region agent log
-            try:
-                import json
-                import traceback
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"websocket_handler.py:135","message":"Audio send error","data":{"error":str(e),"error_type":type(e).__name__,"traceback":traceback.format_exc()},"sessionId":"debug-session","runId":"run1","hypothesisId":"O","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            print(f"[WS] Audio send error for {session_id}: {e}")
+            pcm = decode_base64(audio_data['data'])
+        except (binascii.Error, ValueError):
+            pcm = None
+        if pcm is None or len(pcm) % 2:
+            # PCM must be whole 16-bit samples, as parse_audio_frame requires for binary frames
             await self.send(session_id, {
                 'type': 'error',
-                'data': {'message': str(e)},
+                'data': {'message': 'Invalid audio data format'},
                 'sessionId': session_id
             })
+            return
+        
+        pipeline = self.pipelines.get(session_id)
+        if pipeline:
+            pipeline.enqueue(pcm, audio_data['mimeType'])
+    
+    async def handle_audio_frame(self, session_id: str, frame: bytes):
+        """Handle a binary audio frame (header + raw PCM) from client"""
+        parsed = parse_audio_frame(frame)
+        if not parsed:
+            await self.send(session_id, {
+                'type': 'error',
+                'data': {'message': 'Invalid audio frame'},
+                'sessionId': session_id
+            })
+            return
+        
+        sequence, sample_rate, pcm = parsed
+        tracer.emit('audio', 'websocket_handler.py:handle_audio_frame', 'Received audio frame from client', {'sequence': sequence, 'sample_rate': sample_rate, 'pcm_len': len(pcm)}, session_id)
+        expected = self.audio_sequences.get(session_id)
+        if expected is not None and sequence != expected:
+            print(f"[WS] Audio frame gap for {session_id}: expected {expected}, got {sequence}")
+        self.audio_sequences[session_id] = (sequence + 1) & 0xFFFFFFFF
+        
+        pipeline = self.pipelines.get(session_id)
+        if pipeline:
+            pipeline.enqueue(pcm, pcm_mime_type(sample_rate))
     
     async def handle_disconnect(self, session_id: str):
         """Handle disconnect"""
+        # Send buffered audio while the upstream session is still open
+        pipeline = self.pipelines.get(session_id)
+        if pipeline:
+            session = session_manager.get_session(session_id)
+            if session and session.gemini_session:
+                await pipeline.flush()
+            else:
+                pipeline.clear()
         try:
             await self.gemini_proxy.disconnect_session(session_id)
             await self.send(session_id, {
@@ -167,14 +285,14 @@ class WebSocketHandler:
     
     async def handle_gemini_message(self, session_id: str, message: Any):
         """Handle message from Gemini"""
-        # #region agent log
-        try:
-            import json
-            log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"websocket_handler.py:139","message":"handle_gemini_message called","data":{"session_id":session_id,"has_message":message is not None,"message_type":type(message).__name__},"sessionId":"debug-session","runId":"run1","hypothesisId":"M","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except: pass
-        # #endregion
+        if tracer.enabled('gemini'):
+            data = getattr(message, 'data', None)
+            tracer.emit('gemini', 'websocket_handler.py:handle_gemini_message', 'Relaying message from Gemini', {
+                'message_type': type(message).__name__,
+                'data_len': len(data) if isinstance(data, bytes) else None,
+                'has_server_content': getattr(message, 'server_content', None) is not None
+            }, session_id)
+        
         # Extract function calls (for testing/debugging visibility)
         if hasattr(message, 'tool_call') and message.tool_call:
             tool_call = message.tool_call
@@ -190,78 +308,18 @@ class WebSocketHandler:
                         'sessionId': session_id
                     })
         
-        # Extract audio data
-        # #region agent log
-        try:
-            import json
-            log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-            has_data = hasattr(message, 'data')
-            data_value = getattr(message, 'data', None)
-            data_type = type(data_value).__name__ if data_value is not None else None
-            has_server_content = hasattr(message, 'server_content')
-            server_content_val = getattr(message, 'server_content', None)
-            sc_info = None
-            if server_content_val:
-                sc_info = {
-                    "has_model_turn": hasattr(server_content_val, 'model_turn'),
-                    "model_turn": None
-                }
-                if hasattr(server_content_val, 'model_turn') and server_content_val.model_turn:
-                    mt = server_content_val.model_turn
-                    sc_info["model_turn"] = {
-                        "has_parts": hasattr(mt, 'parts'),
-                        "parts_count": len(mt.parts) if hasattr(mt, 'parts') and mt.parts else 0
-                    }
-                    if hasattr(mt, 'parts') and mt.parts:
-                        parts_info = []
-                        for i, part in enumerate(mt.parts):
-                            part_info = {"index": i}
-                            if hasattr(part, 'inline_data') and part.inline_data:
-                                idata = part.inline_data
-                                part_info["has_inline_data"] = True
-                                part_info["has_data"] = hasattr(idata, 'data')
-                                if hasattr(idata, 'data'):
-                                    part_info["data_type"] = type(idata.data).__name__
-                                    if isinstance(idata.data, bytes):
-                                        part_info["data_len"] = len(idata.data)
-                            else:
-                                part_info["has_inline_data"] = False
-                            parts_info.append(part_info)
-                        sc_info["model_turn"]["parts_info"] = parts_info
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"location":"websocket_handler.py:156","message":"Processing message for audio extraction","data":{"has_data":has_data,"data_type":data_type,"has_server_content":has_server_content,"server_content":sc_info},"sessionId":"debug-session","runId":"run1","hypothesisId":"M","timestamp":int(__import__('time').time()*1000)}) + '\n')
-        except Exception as log_err:
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"websocket_handler.py:156","message":"Error logging message structure","data":{"error":str(log_err)},"sessionId":"debug-session","runId":"run1","hypothesisId":"M","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-        # #endregion
+        # Handle interruptions first so stale audio is dropped before anything else is queued
+        if hasattr(message, 'server_content') and message.server_content:
+            if hasattr(message.server_content, 'interrupted') and message.server_content.interrupted:
+                self.handle_interrupt(session_id)
         
+        # Extract audio data
         # Check response.data directly first (as shown in user's example)
         # Prefer response.data if available, otherwise check server_content
         audio_sent = False
         if hasattr(message, 'data') and message.data is not None:
-            # #region agent log
-            try:
-                import json
-                log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"location":"websocket_handler.py:157","message":"Found response.data (direct audio)","data":{"data_type":type(message.data).__name__,"data_len":len(message.data) if isinstance(message.data, bytes) else None},"sessionId":"debug-session","runId":"run1","hypothesisId":"L","timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
             if isinstance(message.data, bytes):
-                import base64
-                audio_base64 = base64.b64encode(message.data).decode('utf-8')
-                await self.send(session_id, {
-                    'type': 'audio',
-                    'data': {
-                        'audio': audio_base64,
-                        'mimeType': 'audio/pcm;rate=24000'
-                    },
-                    'sessionId': session_id
-                })
+                self.send_model_audio(session_id, message.data)
                 audio_sent = True
         
         # Also check server_content.model_turn.parts[].inline_data.data (structured format)
@@ -275,28 +333,10 @@ class WebSocketHandler:
                         if hasattr(part, 'inline_data') and part.inline_data:
                             inline_data = part.inline_data
                             if hasattr(inline_data, 'data'):
-                                # #region agent log
-                                try:
-                                    import json
-                                    log_path = r"c:\Users\VICKY\Downloads\gemini-live-voice-chat (1)\.cursor\debug.log"
-                                    with open(log_path, 'a', encoding='utf-8') as f:
-                                        f.write(json.dumps({"location":"websocket_handler.py:180","message":"Found audio in server_content.model_turn.parts","data":{"data_type":type(inline_data.data).__name__,"data_len":len(inline_data.data) if isinstance(inline_data.data, bytes) else None},"sessionId":"debug-session","runId":"run1","hypothesisId":"L","timestamp":int(__import__('time').time()*1000)}) + '\n')
-                                except: pass
-                                # #endregion
-                                import base64
                                 audio_data = inline_data.data
-                                if isinstance(audio_data, bytes):
-                                    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-                                else:
-                                    audio_base64 = audio_data  # Already base64 string
-                                await self.send(session_id, {
-                                    'type': 'audio',
-                                    'data': {
-                                        'audio': audio_base64,
-                                        'mimeType': 'audio/pcm;rate=24000'
-                                    },
-                                    'sessionId': session_id
-                                })
+                                if isinstance(audio_data, str):
+                                    audio_data = decode_base64(audio_data)  # Already base64 string
+                                self.send_model_audio(session_id, audio_data)
         
         # Extract transcriptions
         if hasattr(message, 'server_content') and message.server_content:
@@ -342,6 +382,7 @@ class WebSocketHandler:
             
             # Handle turn complete
             if hasattr(server_content, 'turn_complete') and server_content.turn_complete:
+                self.model_turns[session_id] = self.model_turns.get(session_id, 0) + 1
                 await self.send(session_id, {
                     'type': 'transcription',
                     'data': {'text': '', 'isUser': True, 'isFinal': True},
@@ -352,30 +393,86 @@ class WebSocketHandler:
                     'data': {'text': '', 'isUser': False, 'isFinal': True},
                     'sessionId': session_id
                 })
+    
+    def send_model_audio(self, session_id: str, pcm: bytes):
+        """Queue a chunk of model audio, tagged with the current model turn"""
+        writer = self.writers.get(session_id)
+        if not writer:
+            return
+        turn = self.model_turns.get(session_id, 0)
+        sample_rate = MODEL_AUDIO_SAMPLE_RATE
+        mime_type = pcm_mime_type(MODEL_AUDIO_SAMPLE_RATE)
+        transcoder = self.transcoders.get(session_id)
+        if transcoder:
+            pcm = transcoder.process(pcm)
+            sample_rate = transcoder.out_rate
+            mime_type = transcoder.mime_type
+            if not pcm:
+                return
         
-        # Handle interruptions
-        if hasattr(message, 'server_content') and message.server_content:
-            if hasattr(message.server_content, 'interrupted') and message.server_content.interrupted:
-                await self.send(session_id, {
-                    'type': 'audio',
-                    'data': {'interrupt': True},
-                    'sessionId': session_id
-                })
+        if self.binary_audio.get(session_id):
+            sequence = self.model_audio_sequences.get(session_id, 0)
+            self.model_audio_sequences[session_id] = (sequence + 1) & 0xFFFFFFFF
+            frame = pack_model_audio_frame(turn, sequence, sample_rate, pcm)
+            writer.enqueue(frame, turn=turn, audio_bytes=len(pcm))
+            return
+        writer.enqueue({
+            'type': 'audio',
+            'data': {
+                'audio': encode_base64(pcm),
+                'mimeType': mime_type
+            },
+            'sessionId': session_id
+        }, turn=turn, audio_bytes=len(pcm))
+    
+    def handle_interrupt(self, session_id: str):
+        """Drop unsent audio of the interrupted turn and send the interrupt ahead of the queue"""
+        turn = self.model_turns.get(session_id, 0)
+        self.model_turns[session_id] = turn + 1
+        transcoder = self.transcoders.get(session_id)
+        if transcoder:
+            transcoder.reset()
+        writer = self.writers.get(session_id)
+        if not writer:
+            return
+        
+        message = {
+            'type': 'audio',
+            'data': {'interrupt': True, 'turn': turn},
+            'sessionId': session_id
+        }
+        frames, discarded = writer.interrupt(message, turn)
+        bytes_per_second = transcoder.bytes_per_second if transcoder else MODEL_AUDIO_BYTES_PER_SECOND
+        discarded_ms = round(discarded / bytes_per_second * 1000)
+        message['data'].update({'discardedBytes': discarded, 'discardedMs': discarded_ms})
+        tracer.emit('gemini', 'websocket_handler.py:handle_interrupt', 'Model interrupted', {'turn': turn, 'discarded_frames': frames, 'discarded_bytes': discarded, 'discarded_ms': discarded_ms}, session_id)
     
     async def send(self, session_id: str, message: Dict[str, Any]):
-        """Send message to client"""
-        client = self.clients.get(session_id)
-        if client:
-            try:
-                await client.send_json(message)
-            except Exception as e:
-                print(f"[WS] Error sending message to {session_id}: {e}")
+        """Queue message for the client's writer task (never waits on the socket)"""
+        writer = self.writers.get(session_id)
+        if writer:
+            writer.enqueue(message)
     
     async def broadcast(self, message: Dict[str, Any]):
         """Broadcast message to all clients"""
-        for session_id, client in self.clients.items():
-            try:
-                await client.send_json({**message, 'sessionId': session_id})
-            except Exception as e:
-                print(f"[WS] Error broadcasting to {session_id}: {e}")
+        for session_id, writer in list(self.writers.items()):
+            writer.enqueue({**message, 'sessionId': session_id})
+    
+    def get_client_stats(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get inbound/outbound queue stats for a connected session"""
+        writer = self.writers.get(session_id)
+        if not writer:
+            return None
+        pipeline = self.pipelines.get(session_id)
+        return {
+            'outbound': writer.get_stats(),
+            'inbound': pipeline.get_stats() if pipeline else None
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue stats for all connected sessions"""
+        return {
+            'connections': len(self.writers),
+            'sessions': {session_id: self.get_client_stats(session_id) for session_id in list(self.writers)}
+        }
 
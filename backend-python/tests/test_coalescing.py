@@ -0,0 +1,99 @@
+"""Tests for single-flight coalescing of identical concurrent tool calls"""
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.tool_registry import ToolDefinition, ToolRegistry
+
+
+class CoalescingTest(unittest.IsolatedAsyncioTestCase):
+    """Identical concurrent calls share one execution, its result and its fate"""
+    
+    def setUp(self):
+        self.calls = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+        self.error = None
+        
+        async def lookup(args):
+            self.calls += 1
+            try:
+                await self.release.wait()
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            if self.error:
+                raise RuntimeError(self.error)
+            return {'rows': [args['query']]}
+        
+        self.registry = ToolRegistry()
+        self.registry.register(ToolDefinition(
+            'lookup', 'Lookup', {'type': 'object', 'properties': {'query': {'type': 'string'}}}, lookup, coalesce=True
+        ))
+    
+    def _start(self, count: int, query: str = 'q'):
+        """Start ``count`` identical calls"""
+        return [asyncio.create_task(self.registry.execute('lookup', {'query': query})) for _ in range(count)]
+    
+    @staticmethod
+    async def _settle():
+        """Let started calls reach the handler"""
+        for _ in range(5):
+            await asyncio.sleep(0)
+    
+    async def test_concurrent_identical_calls_share_one_result(self):
+        tasks = self._start(3)
+        other = self._start(1, 'other')
+        await self._settle()
+        self.assertEqual(self.calls, 2)
+        self.release.set()
+        results = await asyncio.gather(*tasks)
+        await asyncio.gather(*other)
+        self.assertEqual([result.result for result in results], [{'rows': ['q']}] * 3)
+        self.assertIs(results[0].result, results[2].result)
+        stats = self.registry.stats['lookup']
+        self.assertEqual((stats.shared_calls, stats.coalesced), (4, 2))
+        self.assertEqual(self.registry._flights, {})
+    
+    async def test_error_is_shared_by_every_caller(self):
+        self.error = 'backend down'
+        tasks = self._start(3)
+        await self._settle()
+        self.release.set()
+        results = await asyncio.gather(*tasks)
+        self.assertEqual([result.error for result in results], ['backend down'] * 3)
+        self.assertEqual(self.calls, 1)
+    
+    async def test_cancelled_caller_leaves_the_others_served(self):
+        tasks = self._start(3)
+        await self._settle()
+        tasks[0].cancel()
+        await self._settle()
+        self.assertTrue(tasks[0].cancelled())
+        self.release.set()
+        results = await asyncio.gather(*tasks[1:])
+        self.assertEqual([result.result for result in results], [{'rows': ['q']}] * 2)
+        self.assertEqual((self.calls, self.cancelled), (1, 0))
+    
+    async def test_execution_is_cancelled_when_every_caller_leaves(self):
+        tasks = self._start(2)
+        await self._settle()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._settle()
+        self.assertEqual(self.cancelled, 1)
+        self.assertEqual(self.registry._flights, {})
+        
+        # A later identical call starts a fresh execution instead of joining the cancelled one
+        self.release.set()
+        result = await self.registry.execute('lookup', {'query': 'q'})
+        self.assertEqual(result.result, {'rows': ['q']})
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
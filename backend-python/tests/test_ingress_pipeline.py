@@ -0,0 +1,54 @@
+"""Tests for the per-session ingress pipeline"""
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ingress_pipeline import IngressConfig, IngressPipeline
+
+MIME = 'audio/pcm;rate=16000'
+
+
+class IngressPipelineTest(unittest.IsolatedAsyncioTestCase):
+    """Malformed audio must not stop the sender, and flushing must keep frame order"""
+    
+    async def asyncSetUp(self):
+        self.sent = []
+        self.errors = []
+        
+        async def send(pcm: bytes, mime_type: str):
+            await asyncio.sleep(0.005)
+            self.sent.append(pcm)
+        
+        async def on_error(error: Exception):
+            self.errors.append(error)
+        
+        self.pipeline = IngressPipeline('session', send, on_error, IngressConfig(frame_ms=100))
+        self.pipeline.start()
+    
+    async def asyncTearDown(self):
+        await self.pipeline.close()
+    
+    async def test_odd_length_chunk_is_reported_and_sender_keeps_running(self):
+        self.pipeline.enqueue(b'\x01\x02\x03', MIME)
+        self.pipeline.enqueue(bytes(6400), MIME)
+        await asyncio.sleep(0.05)
+        self.assertEqual([len(pcm) for pcm in self.sent], [6400])
+        self.assertEqual(len(self.errors), 1)
+        self.assertEqual(self.pipeline.get_stats()['processErrors'], 1)
+    
+    async def test_flush_keeps_order_while_sender_is_busy(self):
+        for i in range(20):
+            self.pipeline.enqueue(bytes([i]) * 3200, MIME)
+        await asyncio.sleep(0.01)  # Let the sender get partway through
+        await self.pipeline.flush()
+        self.assertEqual([pcm[0] for pcm in self.sent], list(range(20)))
+        self.pipeline.enqueue(bytes(6400), MIME)
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(self.sent), 21)  # Sender restarted after the flush
+
+
+if __name__ == '__main__':
+    unittest.main()
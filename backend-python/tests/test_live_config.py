@@ -0,0 +1,38 @@
+"""Tests for the cached Live connect config builder"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.live_config import LiveConfigBuilder, LiveConfigVariant
+from tools.tool_registry import ToolDefinition, ToolRegistry
+
+
+class LiveConfigVariantTest(unittest.TestCase):
+    """Variant overrides replace the built-in fields instead of clashing with them"""
+    
+    def setUp(self):
+        registry = ToolRegistry()
+        registry.register(ToolDefinition('ping', 'Ping', {'type': 'object', 'properties': {}}, lambda args: 'pong'))
+        self.builder = LiveConfigBuilder(registry)
+    
+    def test_overrides_replace_builtin_fields(self):
+        self.builder.register_variant('acme', LiveConfigVariant(overrides={
+            'response_modalities': ['TEXT'],
+            'tools': None,
+            'session_resumption': None
+        }))
+        config = self.builder.get('acme')
+        self.assertEqual([str(getattr(m, 'value', m)) for m in config.response_modalities], ['TEXT'])
+        self.assertIsNone(config.tools)
+        self.assertIsNone(config.session_resumption)
+    
+    def test_default_config_keeps_tools(self):
+        self.builder.register_variant('acme', LiveConfigVariant(overrides={'tools': None}))
+        config = self.builder.get()
+        self.assertEqual([d.name for d in config.tools[0].function_declarations], ['ping'])
+
+
+if __name__ == '__main__':
+    unittest.main()
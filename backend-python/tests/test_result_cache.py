@@ -0,0 +1,95 @@
+"""Tests for the tool result cache and its use in ToolRegistry.execute"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.result_cache import ResultCache, canonical_args
+from tools.tool_registry import ToolDefinition, ToolRegistry
+
+
+def key(args: dict, tool: str = 'tool'):
+    """Cache key for a call to ``tool``"""
+    return tool, canonical_args(args)
+
+
+class ResultCacheTest(unittest.TestCase):
+    """Entries expire after their TTL and are evicted least recently used first"""
+    
+    def test_entries_expire_after_ttl(self):
+        cache = ResultCache()
+        with mock.patch('tools.result_cache.time.monotonic', return_value=100.0):
+            cache.put(key({'q': 1}), 'value', ttl=10, max_entries=0)
+            self.assertEqual(cache.get(key({'q': 1})), (True, 'value'))
+        with mock.patch('tools.result_cache.time.monotonic', return_value=110.0):
+            self.assertEqual(cache.get(key({'q': 1})), (False, None))
+        stats = cache.get_tool_stats('tool')
+        self.assertEqual((stats['hits'], stats['misses'], stats['expired'], stats['entries']), (1, 1, 1, 0))
+        self.assertEqual(cache.bytes, 0)
+    
+    def test_byte_bound_evicts_least_recently_used(self):
+        value = 'x' * 30
+        entry_size = len(canonical_args(value)) + len(canonical_args({'q': 1}))
+        cache = ResultCache(max_bytes=entry_size * 2 + 1)
+        cache.put(key({'q': 1}), value, ttl=60, max_entries=0)
+        cache.put(key({'q': 2}), value, ttl=60, max_entries=0)
+        cache.get(key({'q': 1}))  # Now q=2 is the least recently used
+        cache.put(key({'q': 3}), value, ttl=60, max_entries=0)
+        self.assertTrue(cache.get(key({'q': 1}))[0])
+        self.assertFalse(cache.get(key({'q': 2}))[0])
+        self.assertTrue(cache.get(key({'q': 3}))[0])
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+        self.assertEqual(cache.get_tool_stats('tool')['evictions'], 1)
+    
+    def test_per_tool_entry_limit_only_evicts_that_tool(self):
+        cache = ResultCache()
+        cache.put(key({'q': 1}, 'other'), 'kept', ttl=60, max_entries=1)
+        cache.put(key({'q': 1}), 'a', ttl=60, max_entries=1)
+        cache.put(key({'q': 2}), 'b', ttl=60, max_entries=1)
+        self.assertFalse(cache.get(key({'q': 1}))[0])
+        self.assertTrue(cache.get(key({'q': 2}))[0])
+        self.assertTrue(cache.get(key({'q': 1}, 'other'))[0])
+    
+    def test_equal_arguments_share_a_key(self):
+        self.assertEqual(canonical_args({'a': 1, 'b': [1, 2]}), canonical_args({'b': [1, 2], 'a': 1}))
+
+
+class RegistryCacheTest(unittest.IsolatedAsyncioTestCase):
+    """Only successful results are cached"""
+    
+    async def test_failures_are_not_cached(self):
+        calls = []
+        
+        async def flaky(args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError('upstream unavailable')
+            return {'city': args['city']}
+        
+        registry = ToolRegistry()
+        registry.register(ToolDefinition(
+            'flaky', 'Flaky', {'type': 'object', 'properties': {'city': {'type': 'string'}}}, flaky, cache_ttl=60
+        ))
+        failed = await registry.execute('flaky', {'city': 'Oslo'})
+        self.assertEqual(failed.error, 'upstream unavailable')
+        first = await registry.execute('flaky', {'city': 'Oslo'})
+        second = await registry.execute('flaky', {'city': 'Oslo'})
+        self.assertIsNone(first.error)
+        self.assertEqual(second.result, {'city': 'Oslo'})
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(registry.cache.get_tool_stats('flaky')['hits'], 1)
+
+
+class ExampleToolsTest(unittest.TestCase):
+    """The example tools are served from the registry the app uses"""
+    
+    def test_example_tools_register_in_shared_registry(self):
+        import tools.example_tools  # noqa: F401
+        from tools.tool_registry import tool_registry
+        self.assertLessEqual({'get_weather', 'execute_sql_query'}, set(tool_registry.tools))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Tests for the pooled read-only SQLite backend"""
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.sqlite_backend import SQLiteBackend, SQLiteConfig
+
+
+class SQLiteBackendSandboxTest(unittest.IsolatedAsyncioTestCase):
+    """Queries must stay inside their database and leave pooled connections unchanged"""
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = os.path.join(self.tmp.name, 'data')
+        os.mkdir(self.data_dir)
+        self._create(os.path.join(self.data_dir, 'main.db'), 'CREATE TABLE t (id INTEGER)', 'INSERT INTO t VALUES (1)')
+        self.secret = os.path.join(self.tmp.name, 'secret.db')
+        self._create(self.secret, 'CREATE TABLE s (value TEXT)', "INSERT INTO s VALUES ('hidden')")
+        # One connection, so every query reuses the connection the previous one ran on
+        self.backend = SQLiteBackend(SQLiteConfig(data_dir=self.data_dir, pool_size=1, workers=1))
+    
+    async def asyncTearDown(self):
+        await self.backend.close()
+        self.tmp.cleanup()
+    
+    @staticmethod
+    def _create(path: str, *statements: str):
+        conn = sqlite3.connect(path)
+        for statement in statements:
+            conn.execute(statement)
+        conn.commit()
+        conn.close()
+    
+    async def test_attach_is_rejected(self):
+        with self.assertRaises(sqlite3.DatabaseError):
+            await self.backend.query('main', f"ATTACH DATABASE '{self.secret}' AS x")
+        with self.assertRaises(sqlite3.DatabaseError):
+            await self.backend.query('main', 'SELECT * FROM x.s')
+    
+    async def test_attach_cannot_create_files(self):
+        created = os.path.join(self.tmp.name, 'new.db')
+        with self.assertRaises(sqlite3.DatabaseError):
+            await self.backend.query('main', f"ATTACH 'file:{created}?mode=rwc' AS y")
+        self.assertFalse(os.path.exists(created))
+    
+    async def test_pragma_and_temp_objects_are_rejected(self):
+        for sql in ('PRAGMA query_only = OFF', 'CREATE TEMP TABLE leak (v)', 'BEGIN'):
+            with self.subTest(sql=sql), self.assertRaises(sqlite3.DatabaseError):
+                await self.backend.query('main', sql)
+    
+    async def test_reads_still_work_after_rejections(self):
+        with self.assertRaises(sqlite3.DatabaseError):
+            await self.backend.query('main', f"ATTACH DATABASE '{self.secret}' AS x")
+        result = await self.backend.query('main', 'WITH RECURSIVE r(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM r WHERE n < 3) SELECT COUNT(*) AS c FROM t, r')
+        self.assertEqual(result['rows'], [{'c': 3}])
+
+
+if __name__ == '__main__':
+    unittest.main()
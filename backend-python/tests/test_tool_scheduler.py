@@ -0,0 +1,126 @@
+"""Tests for the fair, deadline-aware tool scheduler"""
+import asyncio
+import contextlib
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.tool_scheduler import SHED_DEADLINE, SHED_OVERFLOW, ToolScheduler, ToolSchedulerConfig, ToolShed
+
+
+class ToolSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    """Admission order, caps, shedding and slot accounting"""
+    
+    @staticmethod
+    async def _settle():
+        """Let queued tasks run up to their next wait"""
+        for _ in range(5):
+            await asyncio.sleep(0)
+    
+    async def test_weighted_fair_queuing_favours_heavier_tenant(self):
+        scheduler = ToolScheduler(ToolSchedulerConfig(max_concurrent=1, tenant_weights={'a': 2.0, 'b': 1.0}))
+        await scheduler.acquire('tool', None, 'holder')
+        admitted = []
+        
+        async def call(tenant: str):
+            await scheduler.acquire('tool', None, tenant)
+            admitted.append(tenant)
+            await asyncio.sleep(0)
+            scheduler.release('tool', None)
+        
+        # b queues first, yet a's calls are spaced half as far apart in virtual time
+        tasks = [asyncio.create_task(call('b')) for _ in range(4)] + [asyncio.create_task(call('a')) for _ in range(4)]
+        await self._settle()
+        scheduler.release('tool', None)
+        await asyncio.gather(*tasks)
+        self.assertEqual(sorted(admitted[:6]), ['a'] * 4 + ['b'] * 2)
+        self.assertEqual(scheduler.running, 0)
+    
+    async def test_per_user_cap_queues_only_that_user(self):
+        scheduler = ToolScheduler(ToolSchedulerConfig(max_concurrent=10, max_per_user=1))
+        await scheduler.acquire('tool', 'u1', None)
+        second = asyncio.create_task(scheduler.acquire('tool', 'u1', None))
+        await self._settle()
+        self.assertFalse(second.done())
+        await asyncio.wait_for(scheduler.acquire('tool', 'u2', None), 1)
+        scheduler.release('tool', 'u1')
+        await asyncio.wait_for(second, 1)
+        self.assertEqual(scheduler.per_user, {'u1': 1, 'u2': 1})
+    
+    async def test_per_tool_cap_queues_only_that_tool(self):
+        scheduler = ToolScheduler(ToolSchedulerConfig(max_concurrent=10), tool_limit=lambda name: 1 if name == 'slow' else None)
+        await scheduler.acquire('slow', None, None)
+        second = asyncio.create_task(scheduler.acquire('slow', None, None))
+        await self._settle()
+        self.assertFalse(second.done())
+        await asyncio.wait_for(scheduler.acquire('fast', None, None), 1)
+        scheduler.release('slow', None)
+        await asyncio.wait_for(second, 1)
+        self.assertEqual(scheduler.per_tool, {'slow': 1, 'fast': 1})
+    
+    async def test_call_queued_past_its_deadline_is_shed(self):
+        scheduler = ToolScheduler(ToolSchedulerConfig(max_concurrent=1))
+        await scheduler.acquire('tool', None, None)
+        with self.assertRaises(ToolShed) as caught:
+            await scheduler.acquire('tool', None, None, time.monotonic() + 0.05)
+        self.assertEqual(caught.exception.reason, SHED_DEADLINE)
+        self.assertEqual(scheduler.shed[SHED_DEADLINE], 1)
+        self.assertEqual(scheduler.waiters, [])
+        self.assertEqual(scheduler.running, 1)
+    
+    async def test_full_queue_sheds_the_waiter_closest_to_its_deadline(self):
+        scheduler = ToolScheduler(ToolSchedulerConfig(max_concurrent=1, max_queue=1))
+        await scheduler.acquire('tool', None, None)
+        now = time.monotonic()
+        early = asyncio.create_task(scheduler.acquire('tool', None, None, now + 5))
+        await self._settle()
+        late = asyncio.create_task(scheduler.acquire('tool', None, None, now + 10))
+        await self._settle()
+        with self.assertRaises(ToolShed) as caught:
+            await early
+        self.assertEqual(caught.exception.reason, SHED_OVERFLOW)
+        self.assertFalse(late.done())
+        
+        # A newcomer due sooner than everyone queued is the one turned away
+        with self.assertRaises(ToolShed) as caught:
+            await scheduler.acquire('tool', None, None, now + 1)
+        self.assertEqual(caught.exception.reason, SHED_OVERFLOW)
+        self.assertEqual(scheduler.shed[SHED_OVERFLOW], 2)
+        scheduler.release('tool', None)
+        await asyncio.wait_for(late, 1)
+    
+    async def test_slot_granted_to_a_cancelled_waiter_is_given_back(self):
+        scheduler = ToolScheduler(ToolSchedulerConfig(max_concurrent=1))
+        await scheduler.acquire('tool', 'user', None)
+        
+        async def work():
+            await asyncio.sleep(0)
+        
+        waiter = asyncio.create_task(scheduler.run('tool', 'user', None, None, work))
+        await self._settle()
+        waiter.cancel()  # The waiter is cancelled...
+        scheduler.release('tool', 'user')  # ...and granted the slot before it gets to resume
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertEqual(scheduler.running, 0)
+        self.assertEqual(scheduler.per_tool, {})
+        self.assertEqual(scheduler.per_user, {})
+        await asyncio.wait_for(scheduler.acquire('tool', 'user', None), 1)
+    
+    async def test_waiter_cancelled_while_queued_leaves_the_queue(self):
+        scheduler = ToolScheduler(ToolSchedulerConfig(max_concurrent=1))
+        await scheduler.acquire('tool', None, None)
+        waiter = asyncio.create_task(scheduler.acquire('tool', None, None))
+        await self._settle()
+        waiter.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await waiter
+        self.assertEqual(scheduler.waiters, [])
+        self.assertEqual(scheduler.running, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+"""Tests for tool argument validators compiled from JSON schemas"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.validation import ArgumentError, compile_schema
+
+
+class NumberValidationTest(unittest.TestCase):
+    """Numbers are coerced from strings but must stay finite"""
+    
+    def setUp(self):
+        self.number = compile_schema({'type': 'object', 'properties': {'x': {'type': 'number'}}})
+        self.integer = compile_schema({'type': 'object', 'properties': {'x': {'type': 'integer', 'minimum': 1}}})
+    
+    def test_non_finite_values_are_rejected(self):
+        for value in ('nan', 'inf', '-inf', 'Infinity', float('nan'), float('inf')):
+            for validate in (self.number, self.integer):
+                with self.subTest(value=value), self.assertRaises(ArgumentError) as caught:
+                    validate({'x': value})
+                self.assertEqual(caught.exception.path, 'args.x')
+    
+    def test_numeric_strings_are_coerced(self):
+        self.assertEqual(self.number({'x': '1.5'}), {'x': 1.5})
+        self.assertEqual(self.integer({'x': 5.0}), {'x': 5})
+        self.assertEqual(self.integer({'x': '7'}), {'x': 7})
+    
+    def test_booleans_are_not_numbers(self):
+        with self.assertRaises(ArgumentError):
+            self.number({'x': True})
+
+
+if __name__ == '__main__':
+    unittest.main()
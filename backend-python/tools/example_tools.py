@@ -1,36 +1,27 @@
 """Example function calling tools"""
 from datetime import datetime
-from tools.tool_registry import ToolRegistry, ToolDefinition
-
-tool_registry = ToolRegistry()
+from tools.tool_registry import ToolDefinition, tool_registry
+from tools.sqlite_backend import sqlite_backend
 
 
 # Example 1: SQL Query Tool
 async def execute_sql_query_handler(args: dict):
-    """Execute SQL query handler"""
+    """Execute SQL query handler (read-only, against <SQLITE_DATA_DIR>/<database>.db)"""
     query = args.get('query')
-    database = args.get('database', 'main')
-    
-    # TODO: Replace with actual database connection
-    # Example: result = await db.query(query)
+    database = args.get('database') or 'main'
     
-    # Simulated response
+    result = await sqlite_backend.query(database, query, args.get('maxRows'))
     return {
         'success': True,
         'database': database,
         'query': query,
-        'rows': [
-            {'id': 1, 'name': 'Example', 'value': 100},
-            {'id': 2, 'name': 'Sample', 'value': 200},
-        ],
-        'rowCount': 2,
-        'message': 'Query executed successfully (simulated)',
+        **result,
     }
 
 
 tool_registry.register(ToolDefinition(
     name='execute_sql_query',
-    description='Execute a SQL query on a database. Use this for data retrieval and analytics.',
+    description='Execute a read-only SQL (SQLite) SELECT query on a database. Use this for data retrieval and analytics.',
     parameters={
         'type': 'object',
         'properties': {
@@ -40,12 +31,18 @@ tool_registry.register(ToolDefinition(
             },
             'database': {
                 'type': 'string',
-                'description': 'The database name (optional, defaults to main)',
+                'description': 'The database name (optional, defaults to main); an unknown name returns the available ones',
+            },
+            'maxRows': {
+                'type': 'integer',
+                'description': 'Maximum number of rows to return (optional)',
+                'minimum': 1,
             },
         },
         'required': ['query'],
     },
-    handler=execute_sql_query_handler
+    handler=execute_sql_query_handler,
+    coalesce=True  # Read-only, so identical concurrent queries can share one execution
 ))
 
 
@@ -94,7 +91,9 @@ tool_registry.register(ToolDefinition(
         },
         'required': ['metric', 'startDate', 'endDate'],
     },
-    handler=get_analytics_handler
+    handler=get_analytics_handler,
+    cache_ttl=60.0,
+    coalesce=True
 ))
 
 
@@ -138,13 +137,15 @@ tool_registry.register(ToolDefinition(
                 'description': 'The search query',
             },
             'maxResults': {
-                'type': 'number',
+                'type': 'integer',
                 'description': 'Maximum number of results to return (default: 5)',
             },
         },
         'required': ['query'],
     },
-    handler=search_knowledge_base_handler
+    handler=search_knowledge_base_handler,
+    cache_ttl=300.0,
+    coalesce=True
 ))
 
 
@@ -239,6 +240,8 @@ tool_registry.register(ToolDefinition(
         },
         'required': ['location'],
     },
-    handler=get_weather_handler
+    handler=get_weather_handler,
+    cache_ttl=300.0,
+    coalesce=True
 ))
 
@@ -0,0 +1,80 @@
+"""Tool Executors - Bounded thread and process pools for synchronous tool handlers"""
+import asyncio
+import functools
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+# Execution modes a ToolDefinition can declare
+INLINE = 'inline'  # On the event loop; for async handlers, or sync handlers known to return at once
+THREAD = 'thread'  # Thread pool; for blocking I/O such as sync DB drivers and HTTP clients
+PROCESS = 'process'  # Process pool; for CPU-heavy handlers (handler, args and result must pickle)
+EXECUTION_MODES = (INLINE, THREAD, PROCESS)
+
+
+def _run_timed(handler: Callable, args: Dict[str, Any], kwargs: Dict[str, Any]) -> Tuple[float, Any]:
+    """Run a handler in a worker, noting when it started so queue wait can be told apart from run time"""
+    return time.monotonic(), handler(args, **kwargs)
+
+
+class ToolExecutors:
+    """Lazily created, bounded worker pools for sync handlers
+    
+    Pools are sized by ``thread_workers`` and ``process_workers`` (0 uses
+    the executor's default, derived from the CPU count) and only started
+    on first use. Process workers are
+    spawned rather than forked, so they never inherit the event loop or
+    open sockets; handlers must therefore be module-level functions.
+    """
+    
+    def __init__(self, thread_workers: int = 8, process_workers: int = 0):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self._pools: Dict[str, Executor] = {}
+        self.in_flight: Dict[str, int] = {THREAD: 0, PROCESS: 0}
+    
+    def configure_from_env(self):
+        """Configure from TOOL_THREAD_WORKERS and TOOL_PROCESS_WORKERS (before the pools start)"""
+        self.thread_workers = int(os.getenv('TOOL_THREAD_WORKERS', self.thread_workers))
+        self.process_workers = int(os.getenv('TOOL_PROCESS_WORKERS', self.process_workers))
+    
+    async def run(self, mode: str, handler: Callable, args: Dict[str, Any], kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+        """Run a sync handler in the pool for ``mode``; returns (result, seconds spent queued)"""
+        pool = self._pool(mode)
+        submitted = time.monotonic()
+        self.in_flight[mode] += 1
+        try:
+            started, result = await asyncio.get_running_loop().run_in_executor(
+                pool, functools.partial(_run_timed, handler, args, kwargs)
+            )
+        finally:
+            self.in_flight[mode] -= 1
+        return result, max(0.0, started - submitted)
+    
+    def shutdown(self):
+        """Stop the pools without waiting for running handlers"""
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool sizes and calls in flight (running or queued)"""
+        # Effective sizes: 0 leaves sizing to ThreadPoolExecutor / ProcessPoolExecutor defaults
+        return {
+            THREAD: {'workers': self.thread_workers or min(32, (os.cpu_count() or 1) + 4), 'started': THREAD in self._pools, 'inFlight': self.in_flight[THREAD]},
+            PROCESS: {'workers': self.process_workers or os.cpu_count(), 'started': PROCESS in self._pools, 'inFlight': self.in_flight[PROCESS]}
+        }
+    
+    def _pool(self, mode: str) -> Executor:
+        """Get or start the pool for a mode"""
+        pool: Optional[Executor] = self._pools.get(mode)
+        if pool is None:
+            if mode == THREAD:
+                pool = ThreadPoolExecutor(max_workers=self.thread_workers or None, thread_name_prefix='tool')
+            else:
+                pool = ProcessPoolExecutor(max_workers=self.process_workers or None, mp_context=multiprocessing.get_context('spawn'))
+            self._pools[mode] = pool
+        return pool
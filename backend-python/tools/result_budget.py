@@ -0,0 +1,118 @@
+"""Result Budget - Keeps tool results small before they go back to the model"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+BYTES_PER_TOKEN = 4  # Rough size of a token in JSON text, for token budgets
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144)  # Upper bounds of the result size histogram
+TRUNCATION_KEY = '_truncated'
+
+
+def json_size(value: Any) -> int:
+    """Length of a value as compact JSON, roughly what is sent upstream"""
+    return len(json.dumps(value, separators=(',', ':'), default=str))
+
+
+@dataclass
+class ResultBudget:
+    """Limits on a tool result (0 disables a limit)"""
+    max_bytes: int = 16384
+    max_rows: int = 50  # Items kept in each list, e.g. SQL rows or search hits
+    max_tokens: int = 0  # Estimated at BYTES_PER_TOKEN bytes per token
+    fields: Optional[List[str]] = None  # Keys kept in each row; None keeps all
+    
+    @classmethod
+    def from_env(cls) -> 'ResultBudget':
+        """Load the default budget from TOOL_RESULT_MAX_* environment variables"""
+        return cls(
+            max_bytes=int(os.getenv('TOOL_RESULT_MAX_BYTES', cls.max_bytes)),
+            max_rows=int(os.getenv('TOOL_RESULT_MAX_ROWS', cls.max_rows)),
+            max_tokens=int(os.getenv('TOOL_RESULT_MAX_TOKENS', cls.max_tokens))
+        )
+    
+    @property
+    def byte_limit(self) -> int:
+        """Effective size limit in bytes (0 for none)"""
+        limits = [limit for limit in (self.max_bytes, self.max_tokens * BYTES_PER_TOKEN) if limit]
+        return min(limits) if limits else 0
+
+
+def apply_budget(result: Any, budget: ResultBudget) -> Tuple[Any, int, int]:
+    """Fit a result to a budget; returns (result, original bytes, final bytes)
+    
+    Lists are projected to ``budget.fields`` and cut to their top
+    ``max_rows`` items, then the longest list is halved until the result
+    fits ``byte_limit``. A truncated result gains a ``_truncated`` entry
+    saying how many items each list had and kept, so the model knows it is
+    seeing a sample. Results that still do not fit are replaced by that
+    summary and a text preview. The input is never mutated.
+    """
+    original = json_size(result)
+    limit = budget.byte_limit
+    if not isinstance(result, (dict, list)):
+        if limit and original > limit and isinstance(result, str):
+            result = {'text': result[:limit], TRUNCATION_KEY: {'originalBytes': original}}
+            return result, original, json_size(result)
+        return result, original, original
+    
+    # Work on a shallow copy whose top-level lists can be replaced
+    fitted: Dict[str, Any] = {'rows': result} if isinstance(result, list) else dict(result)
+    lists = {key: value for key, value in fitted.items() if isinstance(value, list)}
+    totals = {key: len(value) for key, value in lists.items()}
+    changed = False
+    
+    for key, rows in lists.items():
+        if budget.fields is not None and any(isinstance(row, dict) for row in rows):
+            rows = [_project(row, budget.fields) for row in rows]
+            changed = True
+        if budget.max_rows and len(rows) > budget.max_rows:
+            rows = rows[:budget.max_rows]
+            changed = True
+        lists[key] = fitted[key] = rows
+    
+    size = json_size(fitted) if changed else original
+    while limit and size > limit:
+        key = max(lists, key=lambda name: len(lists[name]), default=None)
+        if key is None or len(lists[key]) <= 1:
+            break
+        lists[key] = fitted[key] = lists[key][:len(lists[key]) // 2]
+        changed = True
+        size = json_size(fitted)
+    
+    if not changed and not (limit and size > limit):
+        return result, original, original
+    dropped = {key: {'total': totals[key], 'kept': len(rows)} for key, rows in lists.items() if len(rows) < totals[key]}
+    summary = {'lists': dropped, 'originalBytes': original}
+    if budget.fields is not None:
+        summary['fields'] = list(budget.fields)
+    fitted[TRUNCATION_KEY] = summary
+    
+    size = json_size(fitted)
+    if limit and size > limit:
+        # Even one row per list (or a large non-list value) is too big: send the summary and the start of the text
+        preview = json.dumps(fitted, separators=(',', ':'), default=str)[:max(0, limit - 256)]
+        fitted = {TRUNCATION_KEY: summary, 'preview': preview}
+        size = json_size(fitted)
+    return fitted, original, size
+
+
+def size_bucket(size: int) -> int:
+    """Index of the histogram bucket for a size"""
+    for index, bound in enumerate(SIZE_BUCKETS):
+        if size <= bound:
+            return index
+    return len(SIZE_BUCKETS)
+
+
+def bucket_labels() -> List[str]:
+    """Histogram bucket names, e.g. "le1024" and a final "gt262144" """
+    return [f"le{bound}" for bound in SIZE_BUCKETS] + [f"gt{SIZE_BUCKETS[-1]}"]
+
+
+def _project(row: Any, fields: List[str]) -> Any:
+    """Keep only ``fields`` of a dict row"""
+    if not isinstance(row, dict):
+        return row
+    return {field: row[field] for field in fields if field in row}
@@ -0,0 +1,127 @@
+"""Result Cache - TTL/LRU cache of tool results keyed on canonical arguments"""
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+
+# (tool name, canonical JSON of the arguments)
+CacheKey = Tuple[str, str]
+
+
+class _Entry(NamedTuple):
+    """A cached result"""
+    value: Any
+    expires_at: float
+    size: int
+
+
+class _ToolCacheStats:
+    """Per-tool cache counters"""
+    __slots__ = ('hits', 'misses', 'evictions', 'expired')
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+
+def canonical_args(args: Dict[str, Any]) -> str:
+    """Canonical JSON for tool arguments, so equal arguments share a cache key"""
+    return json.dumps(args, sort_keys=True, separators=(',', ':'), default=str)
+
+
+class ResultCache:
+    """LRU cache of tool results with per-tool TTL and entry limits
+    
+    Each tool gets its own LRU order, capped at the tool's ``max_entries``;
+    a global LRU order across all tools keeps the total estimated size
+    (the result's JSON length) under ``max_bytes``. Cached values are
+    shared between callers and must not be mutated.
+    """
+    
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: 'OrderedDict[CacheKey, _Entry]' = OrderedDict()  # Global LRU order
+        self._per_tool: Dict[str, 'OrderedDict[CacheKey, None]'] = {}  # Per-tool LRU order
+        self._stats: Dict[str, _ToolCacheStats] = {}
+    
+    def get(self, key: CacheKey) -> Tuple[bool, Any]:
+        """Look up a result; returns (hit, value)"""
+        stats = self._tool_stats(key[0])
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            stats.expired += 1
+            entry = None
+        if entry is None:
+            stats.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self._per_tool[key[0]].move_to_end(key)
+        stats.hits += 1
+        return True, entry.value
+    
+    def put(self, key: CacheKey, value: Any, ttl: float, max_entries: int):
+        """Store a result for ``ttl`` seconds, evicting least recently used entries over the limits"""
+        try:
+            size = len(canonical_args(value)) + len(key[1])
+        except (TypeError, ValueError):
+            return  # Not serializable, so it could not be sent upstream either
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        
+        tool_keys = self._per_tool.setdefault(key[0], OrderedDict())
+        while max_entries > 0 and len(tool_keys) >= max_entries:
+            self._evict(next(iter(tool_keys)))
+        while self._entries and self.bytes + size > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+        
+        self._entries[key] = _Entry(value, time.monotonic() + ttl, size)
+        tool_keys[key] = None
+        self.bytes += size
+    
+    def get_tool_stats(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get hit/miss/eviction counters for a tool, or None if it never used the cache"""
+        stats = self._stats.get(name)
+        if stats is None:
+            return None
+        lookups = stats.hits + stats.misses
+        return {
+            'entries': len(self._per_tool.get(name, ())),
+            'hits': stats.hits,
+            'misses': stats.misses,
+            'hitRate': round(stats.hits / lookups, 3) if lookups else None,
+            'evictions': stats.evictions,
+            'expired': stats.expired
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get total entries and memory use"""
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'maxBytes': self.max_bytes
+        }
+    
+    def _tool_stats(self, name: str) -> _ToolCacheStats:
+        """Get or create a tool's counters"""
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = _ToolCacheStats()
+        return stats
+    
+    def _evict(self, key: CacheKey):
+        """Drop an entry to make room"""
+        self._remove(key)
+        self._tool_stats(key[0]).evictions += 1
+    
+    def _remove(self, key: CacheKey):
+        """Drop an entry"""
+        entry = self._entries.pop(key)
+        self._per_tool[key[0]].pop(key, None)
+        self.bytes -= entry.size
@@ -0,0 +1,301 @@
+"""SQLite Backend - Pooled read-only SQLite connections for the SQL query tool"""
+import asyncio
+import math
+import os
+import pathlib
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+FETCH_BATCH = 200  # Rows pulled from the cursor at a time
+PROGRESS_STEPS = 1000  # SQLite VM instructions between deadline checks
+
+_DATABASE_NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+
+# The only statement actions a query may perform; anything else (ATTACH, PRAGMA, temp tables, transactions) is denied
+_ALLOWED_ACTIONS = frozenset((sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE))
+
+
+@dataclass
+class SQLiteConfig:
+    """SQLite backend settings (0 disables the query timeout)"""
+    data_dir: str = DEFAULT_DATA_DIR  # Database "name" is the file <data_dir>/<name>.db
+    pool_size: int = 4  # Connections per database
+    workers: int = 8  # Threads running queries across all databases
+    query_timeout: float = 5.0  # Seconds a single query may run
+    max_rows: int = 1000  # Hard cap on rows read from a query
+    statement_cache: int = 256  # Prepared statements kept per connection
+    
+    @classmethod
+    def from_env(cls) -> 'SQLiteConfig':
+        """Load from SQLITE_* environment variables"""
+        return cls(
+            data_dir=os.getenv('SQLITE_DATA_DIR', cls.data_dir),
+            pool_size=max(1, int(os.getenv('SQLITE_POOL_SIZE', cls.pool_size))),
+            workers=max(1, int(os.getenv('SQLITE_WORKERS', cls.workers))),
+            query_timeout=int(os.getenv('SQLITE_QUERY_TIMEOUT_MS', int(cls.query_timeout * 1000))) / 1000,
+            max_rows=max(1, int(os.getenv('SQLITE_MAX_ROWS', cls.max_rows))),
+            statement_cache=int(os.getenv('SQLITE_STATEMENT_CACHE', cls.statement_cache))
+        )
+
+
+class QueryTimeout(Exception):
+    """Raised when a query runs past the query timeout"""
+
+
+class _Connection:
+    """A pooled connection and the deadline its progress handler enforces"""
+    __slots__ = ('conn', 'deadline')
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.deadline = math.inf
+        # Returning non-zero aborts the running statement with OperationalError("interrupted")
+        conn.set_progress_handler(lambda: time.monotonic() > self.deadline, PROGRESS_STEPS)
+
+
+class _ConnectionPool:
+    """Read-only connections to one database file, opened on demand up to ``size``"""
+    
+    def __init__(self, path: str, size: int, statement_cache: int):
+        self.path = path
+        self.size = size
+        self.statement_cache = statement_cache
+        self.opened = 0
+        self.waiting = 0
+        self.idle: 'asyncio.Queue[_Connection]' = asyncio.Queue()
+        self.queries = 0
+        self.rows = 0
+        self.capped = 0  # Queries stopped at the row cap
+        self.timeouts = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.query_time = 0.0
+        self.wait_time = 0.0  # Seconds spent waiting for a free connection
+    
+    async def acquire(self, executor: ThreadPoolExecutor) -> _Connection:
+        """Take an idle connection, open one if under ``size``, or wait for one to be released"""
+        if self.idle.empty() and self.opened < self.size:
+            self.opened += 1
+            opening = asyncio.get_running_loop().run_in_executor(executor, self._connect)
+            try:
+                return await asyncio.shield(opening)
+            except asyncio.CancelledError:
+                opening.add_done_callback(self._pool_when_opened)
+                raise
+            except Exception:
+                self.opened -= 1
+                raise
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            return await self.idle.get()
+        finally:
+            self.waiting -= 1
+            self.wait_time += time.monotonic() - started
+    
+    def release(self, connection: _Connection):
+        """Return a connection to the pool"""
+        self.idle.put_nowait(connection)
+    
+    def release_when_done(self, running: asyncio.Future, connection: _Connection):
+        """Return a connection once the worker still using it finishes"""
+        if not running.cancelled():
+            running.exception()  # Retrieve it so an abandoned query's error is not logged as unhandled
+        self.release(connection)
+    
+    def close(self):
+        """Close idle connections"""
+        while not self.idle.empty():
+            self.idle.get_nowait().conn.close()
+            self.opened -= 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get connection counts and query counters"""
+        return {
+            'connections': self.opened,
+            'idle': self.idle.qsize(),
+            'waiting': self.waiting,
+            'queries': self.queries,
+            'rows': self.rows,
+            'rowCapHits': self.capped,
+            'timeouts': self.timeouts,
+            'cancelled': self.cancelled,
+            'errors': self.errors,
+            'avgQueryMs': round(self.query_time / self.queries * 1000, 2) if self.queries else None,
+            'connectionWaitMs': round(self.wait_time * 1000, 1)
+        }
+    
+    def _connect(self) -> _Connection:
+        """Open a read-only connection (runs on a worker thread)"""
+        conn = sqlite3.connect(
+            f"{pathlib.Path(self.path).resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,  # Used by one worker thread at a time, handed over through the pool
+            cached_statements=self.statement_cache
+        )
+        conn.execute('PRAGMA query_only = ON')
+        # Connections are shared across sessions, so queries must not reach other files or leave state behind
+        conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 0)
+        conn.set_authorizer(_authorize)
+        return _Connection(conn)
+    
+    def _pool_when_opened(self, opening: asyncio.Future):
+        """Pool a connection whose opener was cancelled"""
+        if opening.cancelled() or opening.exception() is not None:
+            self.opened -= 1
+        else:
+            self.release(opening.result())
+
+
+class SQLiteBackend:
+    """Runs read-only queries against SQLite files on worker threads
+    
+    Each database name maps to a file in ``data_dir`` with its own pool of
+    read-only connections. An authorizer limits queries to plain reads
+    (no ATTACH, PRAGMA or temp objects), so one caller can neither reach
+    files outside ``data_dir`` nor change a connection the next caller
+    inherits. Connections are reused across calls, so the
+    per-connection prepared-statement cache (``statement_cache``) turns
+    repeated queries into re-executions without re-parsing. Rows are
+    streamed from the cursor in batches and reading stops at ``max_rows``;
+    a query running past ``query_timeout`` is aborted inside SQLite, and a
+    cancelled call interrupts its query so the connection is freed promptly.
+    """
+    
+    def __init__(self, config: Optional[SQLiteConfig] = None):
+        self.config = config or SQLiteConfig()
+        self._pools: Dict[str, _ConnectionPool] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def configure_from_env(self):
+        """Configure from SQLITE_* environment variables (before the first query)"""
+        self.config = SQLiteConfig.from_env()
+    
+    async def query(self, database: str, sql: str, max_rows: Optional[int] = None) -> Dict[str, Any]:
+        """Run a query and return its columns and up to ``max_rows`` rows (capped by the config)"""
+        pool = self._pool(database)
+        executor = self._get_executor()
+        limit = min(max_rows or self.config.max_rows, self.config.max_rows)
+        connection = await pool.acquire(executor)
+        started = time.monotonic()
+        running = asyncio.get_running_loop().run_in_executor(executor, self._execute, connection, sql, limit)
+        try:
+            columns, rows, capped = await asyncio.shield(running)
+        except asyncio.CancelledError:
+            # Stop the statement; the connection goes back once the worker lets go of it
+            connection.conn.interrupt()
+            running.add_done_callback(lambda done: pool.release_when_done(done, connection))
+            pool.cancelled += 1
+            raise
+        except Exception as e:
+            pool.release(connection)
+            if isinstance(e, QueryTimeout):
+                pool.timeouts += 1
+            else:
+                pool.errors += 1
+            raise
+        pool.release(connection)
+        elapsed = time.monotonic() - started
+        pool.queries += 1
+        pool.rows += len(rows)
+        pool.capped += capped
+        pool.query_time += elapsed
+        return {
+            'columns': columns,
+            'rows': rows,
+            'rowCount': len(rows),
+            'rowLimitReached': capped,
+            'elapsedMs': round(elapsed * 1000, 1)
+        }
+    
+    async def close(self):
+        """Close idle connections and stop the worker threads"""
+        for pool in self._pools.values():
+            pool.close()
+        self._pools.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def databases(self) -> List[str]:
+        """Names of the databases in ``data_dir``"""
+        try:
+            names = os.listdir(self.config.data_dir)
+        except OSError:
+            return []
+        return sorted(name[:-3] for name in names if name.endswith('.db') and _DATABASE_NAME.match(name[:-3]))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-database pool and query counters"""
+        return {
+            'databases': {name: pool.get_stats() for name, pool in self._pools.items()},
+            'poolSize': self.config.pool_size,
+            'maxRows': self.config.max_rows,
+            'queryTimeoutMs': int(self.config.query_timeout * 1000) or None
+        }
+    
+    def _pool(self, database: str) -> _ConnectionPool:
+        """Get or create the pool for a database name"""
+        pool = self._pools.get(database)
+        if pool is None:
+            if not _DATABASE_NAME.match(database):
+                raise ValueError(f"Invalid database name: {database}")
+            path = os.path.join(self.config.data_dir, f"{database}.db")
+            if not os.path.isfile(path):
+                available = self.databases()
+                if not available:
+                    raise ValueError(f"No SQLite databases in {self.config.data_dir}; add <name>.db files there or set SQLITE_DATA_DIR")
+                raise ValueError(f"Unknown database: {database} (available: {', '.join(available)})")
+            pool = self._pools[database] = _ConnectionPool(path, self.config.pool_size, self.config.statement_cache)
+        return pool
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get or start the query threads"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.config.workers, thread_name_prefix='sqlite')
+        return self._executor
+    
+    def _execute(self, connection: _Connection, sql: str, limit: int) -> Tuple[List[str], List[Dict[str, Any]], bool]:
+        """Run a query on a worker thread, streaming at most ``limit`` rows from the cursor"""
+        timeout = self.config.query_timeout
+        connection.deadline = time.monotonic() + timeout if timeout else math.inf
+        try:
+            cursor = connection.conn.execute(sql)
+            try:
+                columns = [column[0] for column in cursor.description or ()]
+                rows: List[Dict[str, Any]] = []
+                while len(rows) < limit:
+                    batch = cursor.fetchmany(min(FETCH_BATCH, limit - len(rows)))
+                    if not batch:
+                        break
+                    rows.extend(dict(zip(columns, map(_json_value, row))) for row in batch)
+                capped = len(rows) >= limit and cursor.fetchone() is not None
+            finally:
+                cursor.close()  # Resets the statement, so rows past the cap are never computed
+        except sqlite3.OperationalError as e:
+            if time.monotonic() > connection.deadline:
+                raise QueryTimeout(f"Query exceeded {timeout:g}s and was stopped") from e
+            raise
+        finally:
+            connection.deadline = math.inf
+        return columns, rows, capped
+
+
+def _authorize(action: int, *_: Any) -> int:
+    """SQLite authorizer allowing plain reads only"""
+    return sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+
+
+def _json_value(value: Any) -> Any:
+    """Make a column value JSON-friendly (BLOBs become hex)"""
+    return value.hex() if isinstance(value, bytes) else value
+
+
+# Global instance
+sqlite_backend = SQLiteBackend()
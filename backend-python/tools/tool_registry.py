@@ -1,9 +1,132 @@
 """Tool Registry - Register all available function calling tools"""
-from typing import Dict, Any, Callable, List, Optional
+from typing import Dict, Any, Callable, List, Optional, Tuple
+import asyncio
+import inspect
+import pickle
+import threading
+import time
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models import FunctionResult
+from tools.result_cache import ResultCache, canonical_args
+from tools.executors import ToolExecutors, EXECUTION_MODES, INLINE, THREAD, PROCESS
+from tools.validation import ArgumentError, Validator, compile_schema
+from tools.result_budget import ResultBudget, apply_budget, bucket_labels, size_bucket, SIZE_BUCKETS
+
+
+class ToolCancelled(Exception):
+    """Raised by a handler that stops early because its call was cancelled"""
+
+
+class CancellationToken:
+    """Cooperative cancellation flag passed to handlers that declare a ``cancel_token`` parameter
+    
+    Async handlers are cancelled directly; the token matters for sync handlers,
+    which run in a worker thread and should check it between steps (e.g. between
+    fetched row batches or HTTP retries) and stop early once it is set.
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+    
+    @property
+    def cancelled(self) -> bool:
+        """Whether the call has been cancelled"""
+        return self._event.is_set()
+    
+    def cancel(self):
+        """Ask the handler to stop"""
+        self._event.set()
+    
+    def raise_if_cancelled(self):
+        """Raise ``ToolCancelled`` if the call has been cancelled"""
+        if self._event.is_set():
+            raise ToolCancelled('Tool call was cancelled')
+
+
+class ToolStats:
+    """Per-tool execution counters"""
+    
+    SMOOTHING = 0.2
+    
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.invalid = 0  # Calls rejected by argument validation
+        self.timeouts = 0
+        self.cancelled = 0
+        self.avg_run_time: Optional[float] = None  # Seconds, smoothed over completed runs
+        self.avg_queue_wait: Optional[float] = None  # Seconds waiting for a pool worker, smoothed
+        self.cancelled_time = 0.0  # Seconds cancelled calls had already run
+        self.avoided_time = 0.0  # Estimated seconds cancelled calls would still have run
+        self.shared_calls = 0  # Calls that went through single-flight coalescing
+        self.coalesced = 0  # Of those, calls that joined an execution already in flight
+        self.result_sizes = [0] * (len(SIZE_BUCKETS) + 1)  # Histogram of result bytes before budgeting
+        self.truncated = 0  # Results cut down to fit the budget
+        self.trimmed_bytes = 0  # Bytes those cuts kept from the model
+    
+    def record_run(self, elapsed: float, queue_wait: Optional[float] = None):
+        """Record a completed run; ``queue_wait`` is the part of ``elapsed`` spent waiting for a pool worker"""
+        self.runs += 1
+        if queue_wait is not None:
+            elapsed -= queue_wait
+            self.avg_queue_wait = self._smooth(self.avg_queue_wait, queue_wait)
+        self.avg_run_time = self._smooth(self.avg_run_time, elapsed)
+    
+    def record_result(self, size: int, sent: int):
+        """Record a result's size as produced and as sent after budgeting"""
+        self.result_sizes[size_bucket(size)] += 1
+        if sent != size:
+            self.truncated += 1
+            self.trimmed_bytes += max(0, size - sent)
+    
+    def _smooth(self, average: Optional[float], sample: float) -> float:
+        """Exponentially smoothed average"""
+        return sample if average is None else average + self.SMOOTHING * (sample - average)
+    
+    def record_cancel(self, elapsed: float):
+        """Record a cancelled run and the work it avoided"""
+        self.cancelled += 1
+        self.cancelled_time += elapsed
+        if self.avg_run_time is not None:
+            self.avoided_time += max(0.0, self.avg_run_time - elapsed)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get run, error and cancellation counters"""
+        return {
+            'runs': self.runs,
+            'errors': self.errors,
+            'invalidArguments': self.invalid,
+            'timeouts': self.timeouts,
+            'cancelled': self.cancelled,
+            'avgRunMs': round(self.avg_run_time * 1000, 1) if self.avg_run_time is not None else None,
+            'avgQueueWaitMs': round(self.avg_queue_wait * 1000, 1) if self.avg_queue_wait is not None else None,
+            'cancelledToolSeconds': round(self.cancelled_time, 3),
+            'avoidedToolSeconds': round(self.avoided_time, 3),
+            'coalesced': self.coalesced,
+            'coalescingRatio': round(self.coalesced / self.shared_calls, 3) if self.shared_calls else None,
+            'resultBytes': dict(zip(bucket_labels(), self.result_sizes)),
+            'truncatedResults': self.truncated,
+            'trimmedBytes': self.trimmed_bytes
+        }
+
+
+class _Flight:
+    """An execution shared by identical concurrent calls"""
+    __slots__ = ('task', 'waiters')
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+def _accepts_cancel_token(handler: Callable) -> bool:
+    """Whether a handler declares a ``cancel_token`` parameter"""
+    try:
+        return 'cancel_token' in inspect.signature(handler).parameters
+    except (TypeError, ValueError):
+        return False
 
 
 class ToolDefinition:
@@ -14,12 +137,38 @@ class ToolDefinition:
         name: str,
         description: str,
         parameters: Dict[str, Any],
-        handler: Callable[[Dict[str, Any]], Any]
+        handler: Callable[[Dict[str, Any]], Any],
+        timeout: Optional[float] = None,
+        cache_ttl: Optional[float] = None,
+        cache_max_entries: int = 256,
+        coalesce: bool = False,
+        execution: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        result_budget: Optional[ResultBudget] = None
     ):
         self.name = name
         self.description = description
         self.parameters = parameters
         self.handler = handler
+        self.timeout = timeout  # Seconds; None uses the caller's default, 0 disables
+        self.accepts_cancel_token = _accepts_cancel_token(handler)
+        self.cache_ttl = cache_ttl  # Seconds to reuse a successful result for the same arguments; None disables caching
+        self.cache_max_entries = cache_max_entries
+        self.coalesce = coalesce  # Identical concurrent calls share one execution; only for side-effect-free tools
+        self.max_concurrency = max_concurrency  # Executions at once across all sessions; None uses the scheduler default, 0 for no limit
+        self.result_budget = result_budget  # Size/row limits on results sent to the model; None uses the registry default
+        # Where the handler runs; None picks inline for async handlers and the thread pool for sync ones
+        is_async = asyncio.iscoroutinefunction(handler)
+        self.execution = execution or (INLINE if is_async else THREAD)
+        if self.execution not in EXECUTION_MODES:
+            raise ValueError(f"Tool {name}: unknown execution mode {self.execution!r}")
+        if is_async and self.execution != INLINE:
+            raise ValueError(f"Tool {name}: async handlers run inline, not in a {self.execution} pool")
+        if self.execution == PROCESS:
+            try:
+                pickle.dumps(handler)
+            except Exception as e:
+                raise ValueError(f"Tool {name}: process handlers must be picklable module-level functions ({e})")
 
 
 class ToolRegistry:
@@ -27,10 +176,30 @@ class ToolRegistry:
     
     def __init__(self):
         self.tools: Dict[str, ToolDefinition] = {}
+        self.stats: Dict[str, ToolStats] = {}
+        self.validators: Dict[str, Validator] = {}  # Compiled from each tool's parameters schema
+        self.cache = ResultCache()
+        self.executors = ToolExecutors()
+        self.result_budget = ResultBudget()  # Default for tools without their own
+        self._flights: Dict[Tuple[str, str], _Flight] = {}
+        self.version = 0  # Bumped on every change so derived caches can invalidate
+    
+    def configure_from_env(self):
+        """Configure from TOOL_CACHE_MAX_BYTES, the TOOL_*_WORKERS pool sizes and the TOOL_RESULT_MAX_* budget"""
+        self.cache.max_bytes = int(os.getenv('TOOL_CACHE_MAX_BYTES', self.cache.max_bytes))
+        self.result_budget = ResultBudget.from_env()
+        self.executors.configure_from_env()
+    
+    def shutdown(self):
+        """Stop the worker pools"""
+        self.executors.shutdown()
     
     def register(self, tool: ToolDefinition):
-        """Register a tool"""
+        """Register a tool, compiling its parameters schema into a validator"""
+        self.validators[tool.name] = compile_schema(tool.parameters)
         self.tools[tool.name] = tool
+        self.stats.setdefault(tool.name, ToolStats())
+        self.version += 1
     
     def get(self, name: str) -> Optional[ToolDefinition]:
         """Get a tool by name"""
@@ -40,8 +209,8 @@ class ToolRegistry:
         """Get all registered tools"""
         return list(self.tools.values())
     
-    async def execute(self, name: str, args: Dict[str, Any]) -> FunctionResult:
-        """Execute a tool"""
+    async def execute(self, name: str, args: Dict[str, Any], timeout: Optional[float] = None) -> FunctionResult:
+        """Execute a tool, giving up after the tool's timeout (or ``timeout`` if it has none)"""
         tool = self.tools.get(name)
         if not tool:
             return FunctionResult(
@@ -50,28 +219,145 @@ class ToolRegistry:
                 error=f"Tool {name} not found"
             )
         
+        # Reject malformed arguments before any handler or downstream system sees them
+        validate = self.validators.get(name)
+        if validate is not None:
+            try:
+                args = validate(args if args is not None else {})
+            except ArgumentError as e:
+                self.stats.setdefault(name, ToolStats()).invalid += 1
+                return FunctionResult(
+                    call_id='',
+                    result=None,
+                    error=f"Invalid arguments: {e}",
+                    error_type='invalid_arguments'
+                )
+        
+        key = None
+        if tool.cache_ttl or tool.coalesce:
+            try:
+                key = (name, canonical_args(args))
+            except (TypeError, ValueError):
+                pass
+        if key is not None and tool.cache_ttl:
+            hit, cached = self.cache.get(key)
+            if hit:
+                return FunctionResult(call_id='', result=cached)
+        if key is not None and tool.coalesce:
+            return await self._execute_shared(tool, args, timeout, key)
+        return await self._run(tool, args, timeout, key)
+    
+    async def _execute_shared(self, tool: ToolDefinition, args: Dict[str, Any], timeout: Optional[float], key: Tuple[str, str]) -> FunctionResult:
+        """Join an identical execution already in flight, or start one that later callers can join
+        
+        The execution runs as its own task, so a caller that is cancelled
+        only stops waiting; the execution is cancelled once no caller is
+        left. Every caller gets the same result, including errors.
+        """
+        stats = self.stats.setdefault(tool.name, ToolStats())
+        stats.shared_calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.create_task(self._run(tool, args, timeout, key)))
+            flight.task.add_done_callback(lambda _: self._end_flight(key, flight))
+        else:
+            stats.coalesced += 1
+        
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Nobody wants the result any more; later identical calls start afresh
+                self._end_flight(key, flight)
+                flight.task.cancel()
+    
+    def _end_flight(self, key: Tuple[str, str], flight: _Flight):
+        """Stop routing new calls to a shared execution"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+    
+    async def _run(self, tool: ToolDefinition, args: Dict[str, Any], timeout: Optional[float], key: Optional[Tuple[str, str]]) -> FunctionResult:
+        """Run the handler once, fitting a successful result to its budget and caching it if the tool opts in"""
+        name = tool.name
+        stats = self.stats.setdefault(name, ToolStats())
+        limit = tool.timeout if tool.timeout is not None else timeout
+        token = CancellationToken()
+        started = time.monotonic()
         try:
-            # Check if handler is async
             if callable(tool.handler):
-                import asyncio
-                if asyncio.iscoroutinefunction(tool.handler):
-                    result = await tool.handler(args)
-                else:
-                    result = tool.handler(args)
+                result, queue_wait = await asyncio.wait_for(self._call(tool, args, token), limit or None)
             else:
-                result = None
+                result, queue_wait = None, None
+            stats.record_run(time.monotonic() - started, queue_wait)
+            result = self._fit(tool, stats, result)
+            if key is not None and tool.cache_ttl:
+                self.cache.put(key, result, tool.cache_ttl, tool.cache_max_entries)
             
             return FunctionResult(
                 call_id='',
                 result=result
             )
+        except asyncio.CancelledError:
+            # Interrupted turn, disconnect or expiry: stop cooperative sync handlers too
+            token.cancel()
+            stats.record_cancel(time.monotonic() - started)
+            raise
+        except asyncio.TimeoutError:
+            token.cancel()
+            stats.timeouts += 1
+            return FunctionResult(
+                call_id='',
+                result=None,
+                error=f"Tool {name} timed out" + (f" after {limit:g}s" if limit else ''),
+                error_type='timeout'
+            )
         except Exception as e:
+            stats.errors += 1
             return FunctionResult(
                 call_id='',
                 result=None,
                 error=str(e)
             )
     
+    def _fit(self, tool: ToolDefinition, stats: ToolStats, result: Any) -> Any:
+        """Fit a result to the tool's budget, recording its size"""
+        try:
+            fitted, size, sent = apply_budget(result, tool.result_budget or self.result_budget)
+        except (TypeError, ValueError):
+            return result  # Not serializable; sending it upstream reports the error
+        stats.record_result(size, sent)
+        if sent != size:
+            print(f"[Function Call] Trimmed {tool.name} result from {size} to {sent} bytes")
+        return fitted
+    
+    async def _call(self, tool: ToolDefinition, args: Dict[str, Any], token: CancellationToken) -> Tuple[Any, Optional[float]]:
+        """Invoke a handler in its execution mode; returns (result, seconds queued for a pool worker)"""
+        # The token cannot cross a process boundary, so process handlers run to completion
+        kwargs = {'cancel_token': token} if tool.accepts_cancel_token and tool.execution != PROCESS else {}
+        if tool.execution != INLINE:
+            return await self.executors.run(tool.execution, tool.handler, args, kwargs)
+        if asyncio.iscoroutinefunction(tool.handler):
+            return await tool.handler(args, **kwargs), None
+        return tool.handler(args, **kwargs), None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-tool counters, cache and coalescing totals, and the tool time saved by cancellation"""
+        tools = {}
+        for name, stats in self.stats.items():
+            tools[name] = stats.get_stats()
+            tools[name]['cache'] = self.cache.get_tool_stats(name)
+        shared_calls = sum(stats.shared_calls for stats in self.stats.values())
+        return {
+            'tools': tools,
+            'avoidedToolSeconds': round(sum(stats.avoided_time for stats in self.stats.values()), 3),
+            'coalescingRatio': round(sum(stats.coalesced for stats in self.stats.values()) / shared_calls, 3) if shared_calls else None,
+            'inFlightShared': len(self._flights),
+            'pools': self.executors.get_stats(),
+            'cache': self.cache.get_stats()
+        }
+    
     def get_gemini_tools_format(self) -> List[Dict[str, Any]]:
         """Get tools in Gemini API format"""
         return [
@@ -0,0 +1,212 @@
+"""Argument Validation - Compiles tool JSON schemas into fast validating/coercing functions"""
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Checks a value against a compiled schema; returns it (or a coerced copy) or raises ArgumentError
+Validator = Callable[[Any], Any]
+
+_TRUE = ('true', 'yes', '1')
+_FALSE = ('false', 'no', '0')
+
+
+class ArgumentError(Exception):
+    """Raised when model-supplied arguments do not match a tool's schema"""
+    
+    def __init__(self, path: str, message: str):
+        super().__init__(f"{path} {message}")
+        self.path = path
+
+
+def compile_schema(schema: Optional[Dict[str, Any]], path: str = 'args') -> Validator:
+    """Compile a JSON schema (the subset used for function declarations) into a validator
+    
+    Supports ``type`` (object, string, number, integer, boolean, array, in
+    either case), ``properties``, ``required``, ``additionalProperties:
+    false``, ``items``, ``enum``, ``nullable``, string length and
+    ``pattern``, numeric ``minimum``/``maximum`` and array length. Values
+    the model commonly gets slightly wrong are coerced: integral floats and
+    numeric strings to integers, numeric strings to numbers, numbers to
+    strings and "true"/"false" to booleans. Unknown keywords are ignored.
+    """
+    schema = schema or {}
+    kind = str(schema.get('type') or ('object' if 'properties' in schema else '')).lower()
+    if kind not in _COMPILERS:
+        raise ValueError(f"Unsupported schema type at {path}: {schema.get('type')!r}")
+    check = _COMPILERS[kind](schema, path)
+    
+    if 'enum' in schema:
+        allowed = frozenset(schema['enum'])
+        inner = check
+        
+        def check(value: Any) -> Any:
+            value = inner(value)
+            if value not in allowed:
+                raise ArgumentError(path, f"must be one of {sorted(allowed, key=str)}")
+            return value
+    
+    if schema.get('nullable'):
+        strict = check
+        
+        def check(value: Any) -> Any:
+            return None if value is None else strict(value)
+    
+    return check
+
+
+def _compile_any(schema: Dict[str, Any], path: str) -> Validator:
+    """Untyped schema: accept anything"""
+    return lambda value: value
+
+
+def _compile_object(schema: Dict[str, Any], path: str) -> Validator:
+    """Object with typed properties; copies the dict only when a property is coerced"""
+    properties = {key: compile_schema(sub, f"{path}.{key}") for key, sub in (schema.get('properties') or {}).items()}
+    required = tuple(schema.get('required') or ())
+    closed = schema.get('additionalProperties') is False
+    
+    def check(value: Any) -> Any:
+        if not isinstance(value, dict):
+            raise ArgumentError(path, 'must be an object')
+        for key in required:
+            if key not in value:
+                raise ArgumentError(f"{path}.{key}", 'is required')
+        result = value
+        for key, item in value.items():
+            check_property = properties.get(key)
+            if check_property is None:
+                if closed:
+                    raise ArgumentError(f"{path}.{key}", 'is not allowed')
+                continue
+            checked = check_property(item)
+            if checked is not item:
+                if result is value:
+                    result = dict(value)  # Never mutate the caller's arguments
+                result[key] = checked
+        return result
+    
+    return check
+
+
+def _compile_string(schema: Dict[str, Any], path: str) -> Validator:
+    """String, accepting numbers as their text"""
+    min_length = schema.get('minLength')
+    max_length = schema.get('maxLength')
+    pattern = re.compile(schema['pattern']) if schema.get('pattern') else None
+    
+    def check(value: Any) -> Any:
+        if not isinstance(value, str):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
+            else:
+                raise ArgumentError(path, 'must be a string')
+        if min_length is not None and len(value) < min_length:
+            raise ArgumentError(path, f"must be at least {min_length} characters")
+        if max_length is not None and len(value) > max_length:
+            raise ArgumentError(path, f"must be at most {max_length} characters")
+        if pattern is not None and not pattern.search(value):
+            raise ArgumentError(path, f"must match {pattern.pattern}")
+        return value
+    
+    return check
+
+
+def _bounds(schema: Dict[str, Any], path: str, check_type: Validator) -> Validator:
+    """Add minimum/maximum checks to a numeric validator"""
+    minimum = schema.get('minimum')
+    maximum = schema.get('maximum')
+    if minimum is None and maximum is None:
+        return check_type
+    
+    def check(value: Any) -> Any:
+        value = check_type(value)
+        if minimum is not None and value < minimum:
+            raise ArgumentError(path, f"must be at least {minimum}")
+        if maximum is not None and value > maximum:
+            raise ArgumentError(path, f"must be at most {maximum}")
+        return value
+    
+    return check
+
+
+def _compile_number(schema: Dict[str, Any], path: str) -> Validator:
+    """Finite number, accepting numeric strings"""
+    def check(value: Any) -> Any:
+        if isinstance(value, str):
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, float) and math.isfinite(value):
+            return value
+        raise ArgumentError(path, 'must be a number')
+    
+    return _bounds(schema, path, check)
+
+
+def _compile_integer(schema: Dict[str, Any], path: str) -> Validator:
+    """Integer, accepting integral floats and integer strings"""
+    def check(value: Any) -> Any:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, str):
+            try:
+                return int(value)
+            except ValueError:
+                pass
+        raise ArgumentError(path, 'must be an integer')
+    
+    return _bounds(schema, path, check)
+
+
+def _compile_boolean(schema: Dict[str, Any], path: str) -> Validator:
+    """Boolean, accepting true/false strings"""
+    def check(value: Any) -> Any:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str):
+            lowered = value.lower()
+            if lowered in _TRUE:
+                return True
+            if lowered in _FALSE:
+                return False
+        raise ArgumentError(path, 'must be a boolean')
+    
+    return check
+
+
+def _compile_array(schema: Dict[str, Any], path: str) -> Validator:
+    """Array with optionally typed items"""
+    check_item = compile_schema(schema['items'], f"{path}[]") if schema.get('items') else None
+    min_items = schema.get('minItems')
+    max_items = schema.get('maxItems')
+    
+    def check(value: Any) -> Any:
+        if not isinstance(value, (list, tuple)):
+            raise ArgumentError(path, 'must be an array')
+        if min_items is not None and len(value) < min_items:
+            raise ArgumentError(path, f"must have at least {min_items} items")
+        if max_items is not None and len(value) > max_items:
+            raise ArgumentError(path, f"must have at most {max_items} items")
+        if check_item is None:
+            return value
+        checked: List[Any] = [check_item(item) for item in value]
+        return value if all(new is old for new, old in zip(checked, value)) else checked
+    
+    return check
+
+
+_COMPILERS: Dict[str, Callable[[Dict[str, Any], str], Validator]] = {
+    '': _compile_any,
+    'object': _compile_object,
+    'string': _compile_string,
+    'number': _compile_number,
+    'integer': _compile_integer,
+    'boolean': _compile_boolean,
+    'array': _compile_array,
+}
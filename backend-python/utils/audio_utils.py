@@ -1,6 +1,16 @@
 """Audio utility functions for backend processing"""
 import base64
-from typing import Any
+import struct
+from typing import Any, Optional, Tuple
+
+
+# Binary client->server audio frame: little-endian uint32 sequence number,
+# uint32 sample rate, followed by raw 16-bit PCM samples.
+AUDIO_FRAME_HEADER = struct.Struct('<II')
+
+# Binary server->client model audio frame: little-endian uint32 model turn,
+# uint32 sequence number, uint32 sample rate, followed by raw 16-bit PCM.
+MODEL_AUDIO_FRAME_HEADER = struct.Struct('<III')
 
 
 def decode_base64(base64_str: str) -> bytes:
@@ -23,3 +33,41 @@ def validate_audio_data(data: Any) -> bool:
         return False
     return True
 
+
+def pack_audio_frame(sequence: int, sample_rate: int, pcm: bytes) -> bytes:
+    """Builds a binary audio frame from a header and raw PCM bytes."""
+    return AUDIO_FRAME_HEADER.pack(sequence & 0xFFFFFFFF, sample_rate) + pcm
+
+
+def parse_audio_frame(frame: bytes) -> Optional[Tuple[int, int, bytes]]:
+    """Splits a binary audio frame into (sequence, sample_rate, pcm).
+
+    Returns None if the frame is too short, declares no sample rate, or
+    carries an odd number of PCM bytes.
+    """
+    if len(frame) <= AUDIO_FRAME_HEADER.size:
+        return None
+    sequence, sample_rate = AUDIO_FRAME_HEADER.unpack_from(frame)
+    pcm = frame[AUDIO_FRAME_HEADER.size:]
+    if not sample_rate or len(pcm) % 2:
+        return None
+    return sequence, sample_rate, pcm
+
+
+def pack_model_audio_frame(turn: int, sequence: int, sample_rate: int, pcm: bytes) -> bytes:
+    """Builds a binary model audio frame for the client."""
+    return MODEL_AUDIO_FRAME_HEADER.pack(turn & 0xFFFFFFFF, sequence & 0xFFFFFFFF, sample_rate) + pcm
+
+
+def pcm_mime_type(sample_rate: int) -> str:
+    """Returns the PCM MIME type for a sample rate."""
+    return f'audio/pcm;rate={sample_rate}'
+
+
+def parse_pcm_rate(mime_type: str, default: int = 16000) -> int:
+    """Extracts the sample rate from a MIME type like 'audio/pcm;rate=16000'."""
+    for param in mime_type.split(';')[1:]:
+        key, _, value = param.partition('=')
+        if key.strip() == 'rate' and value.strip().isdigit():
+            return int(value)
+    return default
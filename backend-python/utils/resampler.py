@@ -0,0 +1,161 @@
+"""Streaming PCM conversion: sample format, channel downmix and polyphase resampling"""
+from math import gcd
+from typing import Dict, Tuple
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:
+    # Resampling is optional; callers check RESAMPLER_AVAILABLE before converting
+    np = None
+
+RESAMPLER_AVAILABLE = np is not None
+
+INT16 = 'int16'
+FLOAT32 = 'float32'
+_SAMPLE_WIDTHS = {INT16: 2, FLOAT32: 4}
+
+
+class PolyphaseResampler:
+    """Rational-ratio FIR resampler that keeps filter state across chunks
+
+    The anti-aliasing low-pass is a Kaiser-windowed sinc designed once at the
+    upsampled rate and split into ``up`` phases. Each chunk is filtered with
+    vectorized window dot products (strided views and a matmul per phase for
+    small ``up`` such as 48 kHz -> 16 kHz, one gather otherwise); the last
+    ``taps - 1`` input samples and the fractional output position carry over,
+    so chunk boundaries produce exactly the same output as one continuous
+    stream.
+    """
+    
+    STRIDED_MAX_UP = 8
+    
+    def __init__(self, in_rate: int, out_rate: int, zero_crossings: int = 10, cutoff: float = 0.9, beta: float = 8.0):
+        if np is None:
+            raise ImportError("numpy is required for resampling. Install it with: pip install numpy")
+        divisor = gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+        self.taps = max(2, -(-2 * zero_crossings * max(self.up, self.down) // self.up))
+        
+        # Prototype low-pass at the upsampled rate, cutoff relative to the narrower band
+        length = self.up * self.taps
+        fc = cutoff * 0.5 / max(self.up, self.down)
+        m = np.arange(length) - (length - 1) / 2
+        h = 2 * fc * np.sinc(2 * fc * m) * np.kaiser(length, beta) * self.up
+        # phases[p, k] = h[p + k * up]: coefficient for input sample (base - k)
+        self.phases = h.reshape(self.taps, self.up).T.astype(np.float32)
+        # Same coefficients ordered oldest-first, for dot products against sliding windows
+        self.phases_rev = np.ascontiguousarray(self.phases[:, ::-1])
+        self._k = np.arange(self.taps)
+        
+        self.history = np.zeros(self.taps - 1, dtype=np.float32)
+        self.offset = 0  # Next output position (in 1/up input samples) relative to chunk start
+    
+    def process(self, samples: 'np.ndarray') -> 'np.ndarray':
+        """Resample a chunk of mono float32 samples"""
+        n_in = samples.size
+        if self.up == self.down:
+            return samples
+        
+        span = n_in * self.up - self.offset
+        n_out = max(0, -(-span // self.down))
+        buffer = np.concatenate((self.history, samples.astype(np.float32, copy=False)))
+        
+        if not n_out:
+            out = np.zeros(0, dtype=np.float32)
+        elif self.up <= self.STRIDED_MAX_UP:
+            out = self._filter_strided(buffer, n_out)
+        else:
+            out = self._filter_gather(buffer, n_out)
+        
+        self.offset = self.offset + n_out * self.down - n_in * self.up
+        self.history = buffer[-(self.taps - 1):].copy()
+        return out
+    
+    def _filter_gather(self, buffer: 'np.ndarray', n_out: int) -> 'np.ndarray':
+        """Gather every output's input window and apply its phase in one pass"""
+        positions = self.offset + np.arange(n_out) * self.down
+        base = positions // self.up + (self.taps - 1)
+        windows = buffer[base[:, None] - self._k[None, :]]
+        return np.einsum('ij,ij->i', windows, self.phases[positions % self.up])
+    
+    def _filter_strided(self, buffer: 'np.ndarray', n_out: int) -> 'np.ndarray':
+        """Outputs sharing a phase read evenly spaced windows: use strided views and matmul"""
+        windows = sliding_window_view(buffer, self.taps)
+        out = np.empty(n_out, dtype=np.float32)
+        for first in range(min(self.up, n_out)):
+            position = self.offset + first * self.down
+            start = position // self.up  # Window [start, start + taps) ends at this output's base sample
+            count = len(range(first, n_out, self.up))
+            out[first::self.up] = windows[start:start + count * self.down:self.down] @ self.phases_rev[position % self.up]
+        return out
+
+
+class PcmConverter:
+    """Converts a client audio stream to 16-bit mono PCM at a target rate
+
+    Handles float32 or int16 input, interleaved multi-channel downmix and
+    resampling. Partial sample frames at the end of a chunk are carried over
+    to the next one.
+    """
+    
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1, encoding: str = INT16):
+        if np is None:
+            raise ImportError("numpy is required for audio conversion. Install it with: pip install numpy")
+        if encoding not in _SAMPLE_WIDTHS:
+            raise ValueError(f"Unsupported PCM encoding: {encoding}")
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = max(1, channels)
+        self.encoding = encoding
+        self.frame_bytes = _SAMPLE_WIDTHS[encoding] * self.channels
+        self.resampler = PolyphaseResampler(in_rate, out_rate) if in_rate != out_rate else None
+        self.remainder = b''
+    
+    @property
+    def passthrough(self) -> bool:
+        """Whether input is already 16-bit mono at the target rate"""
+        return self.resampler is None and self.channels == 1 and self.encoding == INT16
+    
+    def to_float(self, pcm: bytes) -> 'np.ndarray':
+        """Decode to mono float32 samples in int16 scale"""
+        if self.remainder:
+            pcm = self.remainder + pcm
+        usable = len(pcm) - len(pcm) % self.frame_bytes
+        self.remainder = pcm[usable:]
+        if self.encoding == FLOAT32:
+            samples = np.frombuffer(pcm, dtype='<f4', count=usable // 4) * np.float32(32767)
+        else:
+            samples = np.frombuffer(pcm, dtype='<i2', count=usable // 2).astype(np.float32)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1, dtype=np.float32)
+        return samples
+    
+    def process(self, pcm: bytes) -> bytes:
+        """Convert a chunk; may return fewer bytes than a full chunk's worth"""
+        if self.passthrough:
+            return pcm
+        samples = self.to_float(pcm)
+        if self.resampler:
+            samples = self.resampler.process(samples)
+        return float_to_int16(samples).tobytes()
+
+
+def float_to_int16(samples: 'np.ndarray') -> 'np.ndarray':
+    """Round and clip int16-scale float samples to int16"""
+    return np.clip(np.rint(samples), -32768, 32767).astype('<i2')
+
+
+def parse_pcm_format(mime_type: str, default_rate: int = 16000) -> Tuple[int, int, str]:
+    """Extract (rate, channels, encoding) from e.g. 'audio/pcm;rate=48000;channels=2;encoding=float32'"""
+    params: Dict[str, str] = {}
+    for param in mime_type.split(';')[1:]:
+        key, _, value = param.partition('=')
+        params[key.strip().lower()] = value.strip().lower()
+    rate = int(params['rate']) if params.get('rate', '').isdigit() else default_rate
+    channels = int(params['channels']) if params.get('channels', '').isdigit() else 1
+    encoding = FLOAT32 if params.get('encoding') in ('float32', 'f32', 'f32le') else INT16
+    return rate, channels, encoding
@@ -0,0 +1,102 @@
+"""Egress audio transcoding: resampling plus G.711 mu-law/A-law encoding"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import Optional
+from utils.resampler import PcmConverter
+from utils.audio_utils import pcm_mime_type
+
+try:
+    import numpy as np
+except ImportError:
+    # Transcoding is optional; callers check TRANSCODER_AVAILABLE before requesting it
+    np = None
+
+
+# Output encodings a client can request
+PCM16 = 'pcm16'
+MULAW = 'mulaw'
+ALAW = 'alaw'
+_ENCODING_ALIASES = {
+    'pcm16': PCM16, 'pcm': PCM16, 'linear16': PCM16,
+    'mulaw': MULAW, 'ulaw': MULAW, 'pcmu': MULAW,
+    'alaw': ALAW, 'pcma': ALAW
+}
+_BYTES_PER_SAMPLE = {PCM16: 2, MULAW: 1, ALAW: 1}
+_MIME_TYPES = {PCM16: 'audio/pcm', MULAW: 'audio/pcmu', ALAW: 'audio/pcma'}
+
+TRANSCODER_AVAILABLE = np is not None
+
+
+def normalize_encoding(name: str) -> Optional[str]:
+    """Map a requested encoding name to PCM16, MULAW or ALAW (None if unknown)"""
+    return _ENCODING_ALIASES.get(str(name).strip().lower())
+
+
+def _build_ulaw_table() -> 'np.ndarray':
+    """G.711 mu-law byte for every int16 sample, indexed by the sample as uint16"""
+    pcm = np.arange(-32768, 32768, dtype=np.int32) >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(pcm), 8159) + 0x21
+    segment = np.searchsorted(np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), magnitude)
+    code = np.where(segment >= 8, 0x7F, (np.minimum(segment, 7) << 4) | ((magnitude >> (segment + 1)) & 0x0F))
+    return _index_by_uint16((code ^ mask).astype(np.uint8))
+
+
+def _build_alaw_table() -> 'np.ndarray':
+    """G.711 A-law byte for every int16 sample, indexed by the sample as uint16"""
+    pcm = np.arange(-32768, 32768, dtype=np.int32) >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    magnitude = np.where(pcm >= 0, pcm, -pcm - 1)
+    segment = np.searchsorted(np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF]), magnitude)
+    shift = np.maximum(segment, 1)
+    code = np.where(segment >= 8, 0x7F, (np.minimum(segment, 7) << 4) | ((magnitude >> shift) & 0x0F))
+    return _index_by_uint16((code ^ mask).astype(np.uint8))
+
+
+def _index_by_uint16(table: 'np.ndarray') -> 'np.ndarray':
+    """Reorder a table built over -32768..32767 so int16 samples viewed as uint16 index it"""
+    return np.roll(table, -32768)
+
+
+# 64 KiB lookup tables turn encoding into a single vectorized gather
+_G711_TABLES = {MULAW: _build_ulaw_table(), ALAW: _build_alaw_table()} if np is not None else {}
+
+
+def encode_g711(pcm: bytes, encoding: str) -> bytes:
+    """Encode 16-bit little-endian PCM as G.711 mu-law or A-law (one byte per sample)"""
+    samples = np.frombuffer(pcm, dtype='<i2', count=len(pcm) // 2)
+    return _G711_TABLES[encoding][samples.view('<u2')].tobytes()
+
+
+class EgressTranscoder:
+    """Converts the model's 16-bit mono output stream to a client's requested format
+    
+    Resampler state carries across chunks, so a turn's audio is filtered as
+    one continuous stream. Call ``reset`` when a turn is interrupted so the
+    next turn does not start with the tail of the discarded one.
+    """
+    
+    def __init__(self, in_rate: int, out_rate: int, encoding: str = PCM16):
+        if encoding not in _BYTES_PER_SAMPLE:
+            raise ValueError(f"Unsupported output encoding: {encoding}")
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.encoding = encoding
+        self.bytes_per_second = out_rate * _BYTES_PER_SAMPLE[encoding]
+        self.mime_type = pcm_mime_type(out_rate).replace('audio/pcm', _MIME_TYPES[encoding], 1)
+        self.converter: Optional[PcmConverter] = None
+        self.reset()
+    
+    def reset(self):
+        """Drop resampler history and any partial sample"""
+        self.converter = PcmConverter(self.in_rate, self.out_rate) if self.in_rate != self.out_rate else None
+    
+    def process(self, pcm: bytes) -> bytes:
+        """Transcode a chunk; may return fewer bytes than a full chunk's worth"""
+        if self.converter:
+            pcm = self.converter.process(pcm)
+        if self.encoding == PCM16:
+            return pcm
+        return encode_g711(pcm, self.encoding)
@@ -0,0 +1,117 @@
+"""Voice activity detection over 16-bit PCM"""
+from typing import Any, Dict, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    # VAD is optional; callers check VAD_AVAILABLE before enabling it
+    np = None
+
+VAD_AVAILABLE = np is not None
+
+
+class VoiceActivityDetector:
+    """Frame-wise energy / zero-crossing VAD with hangover and pre-roll
+
+    Each chunk is split into ``frame_ms`` frames and classified in one pass
+    with NumPy: a frame is speech when its RMS level exceeds
+    ``threshold_db`` dBFS and its zero-crossing rate is below ``max_zcr``
+    (broadband noise), or when it is ``loud_margin_db`` above the threshold
+    regardless of ZCR. Speech keeps the gate open for ``hangover_ms`` after
+    the last speech frame, and up to ``preroll_ms`` of audio preceding an
+    onset is forwarded with it so onsets are not clipped.
+    """
+    
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 20,
+        threshold_db: float = -45.0,
+        max_zcr: float = 0.35,
+        loud_margin_db: float = 15.0,
+        hangover_ms: int = 300,
+        preroll_ms: int = 200
+    ):
+        if np is None:
+            raise ImportError("numpy is required for voice activity detection. Install it with: pip install numpy")
+        self.sample_rate = sample_rate
+        self.frame_len = max(1, sample_rate * frame_ms // 1000)
+        self.frame_ms = frame_ms
+        # Compare mean square against thresholds instead of taking sqrt/log per frame
+        full_scale = 32768.0 ** 2
+        self.threshold_ms = full_scale * 10 ** (threshold_db / 10)
+        self.loud_ms = full_scale * 10 ** ((threshold_db + loud_margin_db) / 10)
+        self.max_crossings = max_zcr * (self.frame_len - 1)
+        self.hangover_frames = hangover_ms // frame_ms
+        self.preroll_frames = preroll_ms // frame_ms
+        self.remainder = np.zeros(0, dtype=np.int16)
+        self.preroll = np.zeros((0, self.frame_len), dtype=np.int16)
+        self.frames_since_speech = self.hangover_frames + 1
+        self.active = False
+        self.forwarded_frames = 0
+        self.suppressed_frames = 0
+        self.stream_ends = 0
+    
+    def process(self, pcm: bytes) -> Tuple[bytes, bool]:
+        """Classify a chunk; returns (audio to forward, whether speech just ended)"""
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        if self.remainder.size:
+            samples = np.concatenate((self.remainder, samples))
+        n_frames = samples.size // self.frame_len
+        self.remainder = samples[n_frames * self.frame_len:].copy()
+        if not n_frames:
+            return b'', False
+        
+        frames = samples[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        as_float = frames.astype(np.float32)
+        mean_square = np.einsum('ij,ij->i', as_float, as_float) / self.frame_len
+        crossings = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1)
+        speech = (mean_square > self.loud_ms) | ((mean_square > self.threshold_ms) & (crossings < self.max_crossings))
+        
+        # Frames since the most recent speech frame, carried across chunks
+        index = np.arange(n_frames)
+        last_speech = np.maximum.accumulate(np.where(speech, index, -1))
+        since = np.where(last_speech >= 0, index - last_speech, self.frames_since_speech + index + 1)
+        gate = since <= self.hangover_frames
+        self.frames_since_speech = int(since[-1])
+        
+        # Forward open frames plus up to preroll_frames before each opening
+        next_open = np.minimum.accumulate(np.where(gate, index, n_frames)[::-1])[::-1]
+        forward = (next_open < n_frames) & (next_open - index <= self.preroll_frames)
+        
+        lead = frames[:0]
+        first_open = int(next_open[0])
+        if first_open < min(n_frames, self.preroll_frames) and self.preroll.shape[0]:
+            # The opening is near the chunk start; take the rest of its pre-roll from the last chunk
+            lead = self.preroll[-(self.preroll_frames - first_open):]
+        
+        forwarded = int(np.count_nonzero(forward))
+        self.forwarded_frames += forwarded + lead.shape[0]
+        self.suppressed_frames += n_frames - forwarded - lead.shape[0]
+        
+        # Keep trailing unforwarded audio as pre-roll for the next onset
+        if forwarded:
+            last_forward = n_frames - 1 - int(np.argmax(forward[::-1]))
+            self.preroll = frames[last_forward + 1:][-self.preroll_frames:].copy() if self.preroll_frames else self.preroll
+        elif self.preroll_frames:
+            self.preroll = np.concatenate((self.preroll, frames))[-self.preroll_frames:]
+        
+        was_active = self.active
+        self.active = bool(gate[-1])
+        ended = was_active and not self.active
+        if ended:
+            self.stream_ends += 1
+        if not forwarded:
+            return b'', ended
+        if lead.shape[0]:
+            return np.concatenate((lead, frames[forward])).tobytes(), ended
+        return frames[forward].tobytes(), ended
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get forwarded vs suppressed audio durations"""
+        return {
+            'forwardedMs': self.forwarded_frames * self.frame_ms,
+            'suppressedMs': self.suppressed_frames * self.frame_ms,
+            'streamEnds': self.stream_ends,
+            'active': self.active
+        }